@@ -0,0 +1,308 @@
+# By: Javad KAZEM
+#
+import numpy as np
+import os
+import sys
+import re
+import json
+import time
+import threading
+import subprocess
+try:
+    import queue
+except ImportError:                               # python 2
+    import Queue as queue
+
+'''
+(1) This module extracts the same data from many ODB files with several worker processes
+
+(2) The driver (CL_ODBB_Run) starts NWorkers "abaqus python" processes running this file.
+    Each worker opens its own ODB files, extracts an extraction plan (see CL_ODBR_ExtractPlan)
+    and saves the result of each ODB as OutDir/ODB-<Index>.npz.
+    The driver hands the ODB files to the idle workers, retries the ODBs which were locked
+    or whose worker process crashed (an ODB which fails in the worker is not tried again,
+    the same error would come again) and writes one line per finished ODB in a manifest file, so that
+    a stopped run can be resumed (an interrupted run kills its workers).
+
+Example (run with "abaqus python", not in Abaqus CAE):
+import sys
+sys.path.append('d://_CL_Python//')
+from CL_Abaqus_ODB_Batch import *
+Jobs = [(i, 'D://DOE//' + str(i) + '//Jobnew.odb') for i in range(1001)]
+Plan = [('PART-SPECIMEN-1', 'Step-Rolling', -1, 'U', 'data')]
+Done, Failed = CL_ODBB_Run(Jobs, Plan, 'D://DOE-Results', NWorkers=8)
+R = CL_ODBB_Load(os.path.join('D://DOE-Results', 'ODB-0.npz'))
+
+(3) The workers import CL_Abaqus_ODB_Reader from the directory of this file.
+
+'''
+#====================================================================
+# prefix of the lines exchanged between the driver and the workers
+CL_ODBB_Tag = 'ODBB:'
+#====================================================================
+def CL_ODBB_Run(Jobs, Plan, OutDir, NWorkers=4, Command=None, Opener='odbAccess:openOdb',
+                Writer=None, Manifest=None, Retries=2, RetryDelay=30.0, Bulk=True, Profile=False):
+    # This function extracts the plan from all ODB files and returns:
+    #       Done   : (list) indices of the extracted ODB files
+    #       Failed : (dict) {Index : error message} of the ODB files which failed, or which were
+    #                still locked (or crashed their worker) after all retries
+    #
+    # Jobs       : a list of (Index, ODB file name)
+    # Plan       : the extraction plan (see CL_ODBR_ExtractPlan)
+    # OutDir     : directory of the result files ODB-<Index>.npz
+    # NWorkers   : number of worker processes (at least 1)
+    # Command    : command starting a python with Abaqus (default: ['abaqus', 'python'])
+    # Opener     : 'module:function' opening an ODB as function(path, readOnly=True)
+    # Writer     : None or a function Writer(Index, R) called for each finished ODB in the driver
+    #              (R as returned by CL_ODBR_ExtractPlan, see CL_ODBB_Load)
+    # Manifest   : manifest file name (default: OutDir/manifest.jsonl), the ODB files already
+    #              marked as done in the manifest are not extracted again
+    # Retries    : number of times a locked ODB (or an ODB whose worker crashed) is tried again
+    # RetryDelay : waiting time (s) before a locked ODB (or an ODB whose worker crashed) is tried again
+    # Bulk       : see CL_ODBR_ExtractPlan
+    # Profile    : True -> each worker writes the profiling report of each ODB as
+    #              OutDir/ODB-<Index>.profile.json (see CL_ODBR_ProfileStart)
+    # The status of each ODB in the manifest is 'done', 'failed' (error in the worker),
+    # 'locked' (.lck file, or error about a lock) or 'crashed' (the worker process stopped).
+    #
+    if int(NWorkers) < 1:
+        raise ValueError('NWorkers must be at least 1: ' + str(NWorkers))
+    if Command is None:
+        Command = ['abaqus', 'python']
+    if Manifest is None:
+        Manifest = os.path.join(OutDir, 'manifest.jsonl')
+    if not os.path.isdir(OutDir):
+        os.makedirs(OutDir)
+    #------------------------ skip the ODB files finished in a previous run
+    Done    = sorted(i for i, s in CL_ODBB_ReadManifest(Manifest).items() if s['status'] == 'done')
+    Skip    = set(Done)
+    Failed  = {}
+    Pending = 0
+    Todo    = queue.Queue()
+    for Index, FName in Jobs:
+        if Index in Skip:
+            continue
+        Todo.put({'index': Index, 'path': FName, 'attempt': 0, 'after': 0.0,
+                  'out': os.path.join(OutDir, 'ODB-' + str(Index) + '.npz')})
+        Pending += 1
+    if Pending == 0:
+        return sorted(Done), Failed
+    #------------------------ start the workers
+    Config  = {'plan': _CL_ODBB_EncodePlan(Plan), 'opener': Opener, 'bulk': Bulk, 'profile': Profile}
+    Results = queue.Queue()
+    Stop    = threading.Event()
+    Workers = [None]*min(int(NWorkers), Pending)       # the worker process of each feeder thread
+    Threads = []
+    for k in range(len(Workers)):
+        T = threading.Thread(target=_CL_ODBB_Feeder, args=(Command, Config, Todo, Results, Stop, Workers, k))
+        T.daemon = True
+        T.start()
+        Threads.append(T)
+    #------------------------ collect the results
+    try:
+        with open(Manifest, 'a') as M:
+            while Pending > 0:
+                Job, Status, Error, Time = Results.get()
+                Index = Job['index']
+                if Status in ('locked', 'crashed') and Job['attempt'] < Retries:
+                    Job['attempt'] += 1
+                    Job['after']    = time.time() + RetryDelay
+                    Todo.put(Job)
+                    continue
+                if Status == 'done':
+                    if Writer is not None:
+                        Writer(Index, CL_ODBB_Load(Job['out']))
+                    Done.append(Index)
+                else:
+                    Failed[Index] = Error
+                M.write(json.dumps({'index': Index, 'path': Job['path'], 'status': Status,
+                                    'error': Error, 'time': Time}) + '\n')
+                M.flush()
+                Pending -= 1
+    finally:
+        #------------------------ stop the workers (killed if the run was interrupted)
+        Stop.set()
+        while True:
+            try:
+                Todo.get_nowait()
+            except queue.Empty:
+                break
+        if Pending > 0:
+            for P in Workers:
+                if P is not None and P.poll() is None:
+                    P.kill()
+        for _ in Threads:
+            Todo.put(None)
+        for T in Threads:
+            T.join()
+    return sorted(Done), Failed
+#====================================================================
+def CL_ODBB_ReadManifest(Manifest):
+    # This function returns the last status of each ODB in a manifest file as
+    # a dictionary {Index : {'index', 'path', 'status', 'error', 'time'}}
+    #
+    # Manifest : manifest file name (written by CL_ODBB_Run)
+    #
+    S = {}
+    if not os.path.isfile(Manifest):
+        return S
+    with open(Manifest) as M:
+        for Line in M:
+            Line = Line.strip()
+            if not Line:
+                continue
+            try:
+                R = json.loads(Line)
+            except ValueError:
+                continue                          # line cut by a killed run
+            S[R['index']] = R
+    return S
+#====================================================================
+def CL_ODBB_Load(FName):
+    # This function loads a result file written by a worker and returns it as a dictionary
+    # {(InsName, StepName, FrameIndex, FieldName) : {SubFieldName : array}}
+    #
+    # FName : the name of the result file (OutDir/ODB-<Index>.npz)
+    #
+    R = {}
+    with np.load(FName, allow_pickle=True) as Z:
+        for Key in Z.files:
+            InsName, StepName, Frame, FieldName, Name = Key.split('|')
+            R.setdefault((InsName, StepName, int(Frame), FieldName), {})[Name] = Z[Key]
+    return R
+#====================================================================
+def _CL_ODBB_Save(FName, R):
+    # saves the result of CL_ODBR_ExtractPlan (written to a temporary file and renamed,
+    # so that a result file is always complete)
+    #
+    A = {}
+    for (InsName, StepName, Frame, FieldName), F in R.items():
+        for Name, V in F.items():
+            if V is None:
+                continue
+            A['|'.join([InsName, StepName, str(Frame), FieldName, Name])] = np.asarray(V)
+    Tmp = FName + '.tmp.npz'
+    np.savez(Tmp, **A)
+    if os.path.exists(FName):
+        os.remove(FName)
+    os.rename(Tmp, FName)
+#====================================================================
+def _CL_ODBB_EncodePlan(Plan):
+    # converts the plan to JSON compatible lists (slices -> {'slice':[start,stop,step]})
+    #
+    P = []
+    for InsName, StepName, Frames, FieldName, SubFieldNames in Plan:
+        if isinstance(Frames, slice):
+            Frames = {'slice': [Frames.start, Frames.stop, Frames.step]}
+        elif not isinstance(Frames, (str, int)):
+            Frames = [int(f) for f in Frames]
+        if not isinstance(SubFieldNames, str):
+            SubFieldNames = list(SubFieldNames)
+        P.append([InsName, StepName, Frames, FieldName, SubFieldNames])
+    return P
+#====================================================================
+def _CL_ODBB_DecodePlan(P):
+    # inverse of _CL_ODBB_EncodePlan
+    #
+    Plan = []
+    for InsName, StepName, Frames, FieldName, SubFieldNames in P:
+        if isinstance(Frames, dict):
+            Frames = slice(*Frames['slice'])
+        Plan.append((InsName, StepName, Frames, FieldName, SubFieldNames))
+    return Plan
+#====================================================================
+def _CL_ODBB_Feeder(Command, Config, Todo, Results, Stop, Workers, k):
+    # runs in a thread of the driver: keeps one worker process (Workers[k]) busy with the jobs
+    # of the queue (a worker which dies is restarted for the next job), until Stop is set.
+    # A job to retry later is put back in the queue, so the worker takes the other jobs meanwhile.
+    #
+    P = None
+    while not Stop.is_set():
+        Job = Todo.get()
+        if Job is None or Stop.is_set():
+            break
+        Wait = Job['after'] - time.time()
+        if Wait > 0:
+            Todo.put(Job)
+            Stop.wait(min(Wait, 1.0))
+            continue
+        t0 = time.time()
+        try:
+            if P is None or P.poll() is not None:
+                P = Workers[k] = _CL_ODBB_StartWorker(Command, Config)
+            Msg = {'index': Job['index'], 'path': Job['path'], 'out': Job['out']}
+            P.stdin.write(CL_ODBB_Tag + json.dumps(Msg) + '\n')
+            P.stdin.flush()
+            while True:
+                Line = P.stdout.readline()
+                if not Line:
+                    raise RuntimeError('worker process stopped (exit code ' + str(P.wait()) + ')')
+                if Line.startswith(CL_ODBB_Tag):
+                    break                         # other lines are Abaqus messages
+            Reply = json.loads(Line[len(CL_ODBB_Tag):])
+            Results.put((Job, Reply['status'], Reply['error'], Reply['time']))
+        except Exception as E:
+            if P is not None and P.poll() is None:
+                P.kill()
+            P = None
+            Results.put((Job, 'crashed', str(E), time.time() - t0))
+    if P is not None and P.poll() is None:
+        P.stdin.close()
+        P.wait()
+#====================================================================
+def _CL_ODBB_StartWorker(Command, Config):
+    # starts one worker process and sends it its configuration
+    #
+    P = subprocess.Popen(list(Command) + [os.path.abspath(__file__), 'worker'],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                         universal_newlines=True, shell=(os.name == 'nt'))
+    P.stdin.write(CL_ODBB_Tag + json.dumps(Config) + '\n')
+    P.stdin.flush()
+    return P
+#====================================================================
+def _CL_ODBB_Worker():
+    # main loop of a worker process: reads one job per line from stdin,
+    # writes one status line per job to stdout ('done', 'locked' or 'failed')
+    #
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from CL_Abaqus_ODB_Reader import CL_ODBR_ExtractPlan, CL_ODBR_ProfileStart, CL_ODBR_ProfileStop
+    from CL_Abaqus_ODB_Reader import CL_ODBR_ProfileWrite, CL_ODBR_Phase
+    Config = json.loads(sys.stdin.readline()[len(CL_ODBB_Tag):])
+    Plan   = _CL_ODBB_DecodePlan(Config['plan'])
+    Module, Function = Config['opener'].split(':')
+    Opener = getattr(__import__(Module, fromlist=[Function]), Function)
+    for Line in iter(sys.stdin.readline, ''):
+        if not Line.startswith(CL_ODBB_Tag):
+            continue
+        Job    = json.loads(Line[len(CL_ODBB_Tag):])
+        t0     = time.time()
+        Status = 'done'
+        Error  = None
+        ODB    = None
+        if Config.get('profile'):
+            CL_ODBR_ProfileStart(Job['path'])
+        try:
+            if os.path.exists(os.path.splitext(Job['path'])[0] + '.lck'):
+                raise RuntimeError('ODB is locked')
+            with CL_ODBR_Phase('openOdb'):
+                ODB = Opener(Job['path'], readOnly=True)
+            R = CL_ODBR_ExtractPlan(ODB, Plan, Bulk=Config['bulk'])
+            with CL_ODBR_Phase('savez'):
+                _CL_ODBB_Save(Job['out'], R)
+        except Exception as E:
+            Status = 'locked' if re.search(r'\block', str(E), re.I) else 'failed'
+            Error  = '%s: %s' % (type(E).__name__, E)
+        finally:
+            if ODB is not None:
+                try:
+                    ODB.close()
+                except Exception:
+                    pass
+            if Config.get('profile'):
+                CL_ODBR_ProfileWrite(CL_ODBR_ProfileStop(), Job['out'][:-4] + '.profile.json')
+        Reply = {'index': Job['index'], 'status': Status, 'error': Error, 'time': time.time() - t0}
+        sys.stdout.write(CL_ODBB_Tag + json.dumps(Reply) + '\n')
+        sys.stdout.flush()
+#====================================================================
+if __name__ == '__main__' and sys.argv[1:2] == ['worker']:
+    _CL_ODBB_Worker()
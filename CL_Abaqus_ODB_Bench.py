@@ -0,0 +1,151 @@
+# By: Javad KAZEM
+#
+import numpy as np
+import sys
+import json
+import time
+import platform
+import tracemalloc
+from CL_Abaqus_ODB_Reader import *
+from CL_Abaqus_ODB_Mock import CL_ODBM_SyntheticODB
+from CL_Abaqus_ODB_Derived import CL_ODBD_FieldOutput
+
+'''
+(1) This module measures the speed of the functions of CL_Abaqus_ODB_Reader on synthetic ODB files
+
+(2) The ODB files are made by CL_ODBM_SyntheticODB (no Abaqus needed). For each mesh size,
+    each function is run Repeat times (the best time is kept) and once more to measure the
+    peak memory (tracemalloc). The results are written to a JSON file which can be compared
+    with the results of another version.
+
+Example:
+python CL_Abaqus_ODB_Bench.py run --sizes 1000 10000 100000 --out bench-new.json
+python CL_Abaqus_ODB_Bench.py compare bench-old.json bench-new.json
+
+'''
+#====================================================================
+# sub-field modes of CL_ODBR_FieldOutput measured by the benchmark
+CL_ODBT_Modes = {
+                 'data'       : ['data'],
+                 'mises'      : ['mises'],
+                 'labels'     : ['elementLabel', 'integrationPoint'],
+                 'invariants' : ['mises', 'tresca', 'press', 'inv3', 'maxPrincipal', 'midPrincipal', 'minPrincipal'],
+                 'All'        : 'All'}
+#====================================================================
+def CL_ODBT_Cases(ODB, InsName, StepName, Modes=None):
+    # This function returns the list of the benchmark cases of an ODB as (name, function, number of items)
+    #
+    # ODB      : the (synthetic) ODB object
+    # InsName  : the name of the instance
+    # StepName : the name of the step
+    # Modes    : the names of the sub-field modes (default: all of CL_ODBT_Modes)
+    #
+    Ins = ODB.rootAssembly.instances[InsName]
+    NN  = len(Ins.nodes)
+    NE  = len(Ins.elements)
+    NF  = len(ODB.steps[StepName].frames)
+    NV  = sum(len(B.data) for B in ODB.steps[StepName].frames[-1].fieldOutputs['S']
+                                      .getSubset(region=Ins).bulkDataBlocks)
+    C = [('NOD'       , lambda: CL_ODBR_NOD(ODB, InsName), NN),
+         ('ELM'       , lambda: CL_ODBR_ELM(ODB, InsName), NE),
+         ('ELMCSR'    , lambda: CL_ODBR_ELMCSR(ODB, InsName), NE),
+         ('FramesTime', lambda: CL_ODBR_FramesTime(ODB, StepName), NF)]
+    for Mode in (sorted(CL_ODBT_Modes) if Modes is None else Modes):
+        Names = CL_ODBT_Modes[Mode]
+        C.append(('FieldOutput/S/' + Mode,
+                  lambda Names=Names: CL_ODBR_FieldOutput(ODB, InsName, StepName, -1, 'S', Names), NV))
+        C.append(('FieldOutputBulk/S/' + Mode,
+                  lambda Names=Names: CL_ODBR_FieldOutputBulk(ODB, InsName, StepName, -1, 'S', Names), NV))
+    if Modes is None or 'invariants' in Modes:
+        Names = CL_ODBT_Modes['invariants']
+        C.append(('Derived/S/invariants', lambda: CL_ODBD_FieldOutput(ODB, InsName, StepName, -1, 'S', Names), NV))
+    return C
+#====================================================================
+def CL_ODBT_Run(Sizes=(1000, 10000), NIP=1, NF=10, Repeat=3, Modes=None, FName=None, Log=True):
+    # This function runs the benchmark and returns the results as a dictionary
+    # {'meta': {...}, 'results': [{'case', 'size', 'n', 'time', 'throughput', 'peak'}, ...]}
+    #       time       : best time (s) of Repeat runs
+    #       throughput : number of items (nodes, elements, frames or values) per second
+    #       peak       : peak memory allocated by the function (bytes)
+    #
+    # Sizes  : approximate numbers of elements of the synthetic meshes
+    # NIP    : number of integration points per element
+    # NF     : number of frames
+    # Repeat : number of timed runs of each case
+    # Modes  : sub-field modes of CL_ODBT_Modes (default: all)
+    # FName  : None, or the name of the JSON file to write
+    #
+    R = {'meta': {'python': platform.python_version(), 'numpy': np.__version__,
+                  'platform': platform.platform(), 'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                  'NIP': NIP, 'NF': NF, 'repeat': Repeat},
+         'results': []}
+    for Size in Sizes:
+        ODB = CL_ODBM_SyntheticODB(NE=int(Size), NIP=NIP, NF=NF, Wedges=0.1)
+        for Name, Function, n in CL_ODBT_Cases(ODB, 'PART-1-1', 'Step-1', Modes):
+            Function()                            # warm up (the mock builds its objects)
+            Best = np.inf
+            for _ in range(Repeat):
+                t0 = time.perf_counter()
+                Function()
+                Best = min(Best, time.perf_counter() - t0)
+            tracemalloc.start()
+            Function()
+            Peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            R['results'].append({'case': Name, 'size': int(Size), 'n': int(n), 'time': Best,
+                                 'throughput': n/Best if Best > 0 else None, 'peak': Peak})
+            if Log:
+                print('%-28s %9d %10.4f s %12.0f /s %10.1f MB' % (Name, Size, Best,
+                      n/Best if Best > 0 else 0, Peak/2.0**20))
+    if FName is not None:
+        with open(FName, 'w') as f:
+            json.dump(R, f, indent=1)
+    return R
+#====================================================================
+def CL_ODBT_Compare(Old, New, Log=True):
+    # This function compares two benchmark results (dictionaries or JSON file names)
+    # and returns a list of (case, size, old time, new time, speedup)
+    #
+    if not isinstance(Old, dict):
+        with open(Old) as f:
+            Old = json.load(f)
+    if not isinstance(New, dict):
+        with open(New) as f:
+            New = json.load(f)
+    T = dict(((r['case'], r['size']), r['time']) for r in Old['results'])
+    C = []
+    for r in New['results']:
+        Key = (r['case'], r['size'])
+        if Key not in T:
+            continue
+        C.append((r['case'], r['size'], T[Key], r['time'], T[Key]/r['time'] if r['time'] > 0 else None))
+        if Log:
+            print('%-28s %9d %10.4f s %10.4f s %8.2fx' % (C[-1][0], C[-1][1], C[-1][2], C[-1][3], C[-1][4] or 0))
+    return C
+#====================================================================
+def _CL_ODBT_Main(Args):
+    # command line interface
+    #
+    import argparse
+    P = argparse.ArgumentParser(description='Benchmark of CL_Abaqus_ODB_Reader on synthetic ODB files')
+    S = P.add_subparsers(dest='command')
+    Run = S.add_parser('run')
+    Run.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    Run.add_argument('--nip', type=int, default=1)
+    Run.add_argument('--frames', type=int, default=10)
+    Run.add_argument('--repeat', type=int, default=3)
+    Run.add_argument('--modes', nargs='+', default=None, choices=sorted(CL_ODBT_Modes))
+    Run.add_argument('--out', default='bench.json')
+    Cmp = S.add_parser('compare')
+    Cmp.add_argument('old')
+    Cmp.add_argument('new')
+    A = P.parse_args(Args)
+    if A.command == 'run':
+        CL_ODBT_Run(A.sizes, A.nip, A.frames, A.repeat, A.modes, A.out)
+    elif A.command == 'compare':
+        CL_ODBT_Compare(A.old, A.new)
+    else:
+        P.print_help()
+#====================================================================
+if __name__ == '__main__':
+    _CL_ODBT_Main(sys.argv[1:])
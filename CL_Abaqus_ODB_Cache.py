@@ -0,0 +1,214 @@
+# By: Javad KAZEM
+#
+import numpy as np
+import os
+import sys
+import json
+import time
+import hashlib
+from CL_Abaqus_ODB_Reader import *
+
+'''
+(1) This module keeps the arrays extracted from ODB files in a cache directory
+
+(2) An entry is identified by the ODB file (path, size and modification time) and the request
+    (function, instance, step, frame, field, components). When the same data is requested again
+    it is loaded from the cache and the ODB file is not opened at all.
+    When the cache is larger than MaxSize, the least recently used entries are deleted.
+
+Example:
+import sys
+sys.path.append('d://_CL_Python//')
+from CL_Abaqus_ODB_Cache import *
+NOD, NLabel = CL_ODBC_NOD(session, ODBFName, 'PART-SPECIMEN-1')
+S = CL_ODBC_FieldOutput(session, ODBFName, 'PART-SPECIMEN-1', 'Step-Rolling', -1, 'S', ['data','mises'])
+
+(3) The cache can be inspected and cleared from the command line:
+python CL_Abaqus_ODB_Cache.py list  [--dir CacheDir] [--odb ODBFName]
+python CL_Abaqus_ODB_Cache.py clear [--dir CacheDir] [--odb ODBFName]
+
+'''
+#====================================================================
+# default cache directory and maximum size (bytes)
+CL_ODBC_Dir     = os.environ.get('CL_ODBR_CACHE', os.path.join(os.path.expanduser('~'), '.cl_odbr_cache'))
+CL_ODBC_MaxSize = 5*2**30
+#====================================================================
+def CL_ODBC_NOD(session, FName, InsName, CacheDir=None, MaxSize=None):
+    # cached version of CL_ODBR_NOD, returns NOD, NLabel
+    #
+    # session  : abaqus session (only used if the data is not in the cache)
+    # FName    : full path of the ODB file
+    # InsName  : (string), the name of the instance
+    # CacheDir : cache directory (default: CL_ODBC_Dir)
+    # MaxSize  : maximum size of the cache in bytes (default: CL_ODBC_MaxSize)
+    #
+    def Extract():
+        NOD, NLabel = CL_ODBR_NOD(CL_ODBR_OpenODB(session, FName), InsName)
+        return {'NOD': NOD, 'NLabel': NLabel}
+    A = CL_ODBC_Get(FName, ['NOD', InsName], Extract, CacheDir, MaxSize)
+    return A['NOD'], A['NLabel']
+#====================================================================
+def CL_ODBC_ELM(session, FName, InsName, CacheDir=None, MaxSize=None):
+    # cached version of CL_ODBR_ELM, returns ELM, ELabel, EType
+    #
+    # session, FName, CacheDir, MaxSize : see CL_ODBC_NOD
+    # InsName : (string), the name of the instance
+    #
+    def Extract():
+        ELM, ELabel, EType = CL_ODBR_ELM(CL_ODBR_OpenODB(session, FName), InsName)
+        return {'ELM': ELM, 'ELabel': ELabel, 'EType': np.array(EType, str)}
+    A = CL_ODBC_Get(FName, ['ELM', InsName], Extract, CacheDir, MaxSize)
+    return A['ELM'], A['ELabel'], A['EType'].tolist()
+#====================================================================
+def CL_ODBC_FieldOutput(session, FName, InsName, StepName, Frame, FieldName, SubFieldNames,
+                        CacheDir=None, MaxSize=None):
+    # cached version of CL_ODBR_FieldOutputBulk, returns a dictionary of arrays
+    #
+    # session, FName, CacheDir, MaxSize : see CL_ODBC_NOD
+    # InsName, StepName, Frame, FieldName, SubFieldNames : see CL_ODBR_FieldOutputBulk
+    #
+    Names = SubFieldNames if isinstance(SubFieldNames, str) else list(SubFieldNames)
+    def Extract():
+        ODB = CL_ODBR_OpenODB(session, FName)
+        return CL_ODBR_FieldOutputBulk(ODB, InsName, StepName, Frame, FieldName, SubFieldNames)
+    Request = ['FieldOutput', InsName, StepName, int(Frame), FieldName, Names]
+    return CL_ODBC_Get(FName, Request, Extract, CacheDir, MaxSize)
+#====================================================================
+def CL_ODBC_Get(FName, Request, Extract, CacheDir=None, MaxSize=None):
+    # This function returns the dictionary of arrays of a request, from the cache
+    # if possible, otherwise from Extract() (and then it is stored in the cache)
+    #
+    # FName    : full path of the ODB file
+    # Request  : a list of strings and numbers describing the request
+    # Extract  : a function returning a dictionary {name : array or None}
+    # CacheDir : cache directory (default: CL_ODBC_Dir)
+    # MaxSize  : maximum size of the cache in bytes (default: CL_ODBC_MaxSize)
+    #
+    CacheDir = CL_ODBC_Dir if CacheDir is None else CacheDir
+    Key      = CL_ODBC_Key(FName, Request)
+    Data     = os.path.join(CacheDir, Key + '.npz')
+    if os.path.isfile(Data):
+        try:
+            A = _CL_ODBC_Read(Data)
+            os.utime(Data, None)                  # last use time (for the LRU eviction)
+            return A
+        except Exception:
+            pass                                  # damaged entry, extracted again
+    A = Extract()
+    if not os.path.isdir(CacheDir):
+        os.makedirs(CacheDir)
+    Meta = {'odb': CL_ODBC_Fingerprint(FName), 'request': Request, 'created': time.time(),
+            'none': [k for k, v in A.items() if v is None]}
+    Tmp = Data + '.%d.tmp.npz' % os.getpid()
+    np.savez(Tmp, **dict((k, v) for k, v in A.items() if v is not None))
+    with open(os.path.join(CacheDir, Key + '.json'), 'w') as f:
+        json.dump(Meta, f)
+    os.replace(Tmp, Data)
+    CL_ODBC_Evict(CacheDir, CL_ODBC_MaxSize if MaxSize is None else MaxSize)
+    return A
+#====================================================================
+def CL_ODBC_Fingerprint(FName):
+    # returns [absolute path, size, modification time] of an ODB file
+    #
+    St = os.stat(FName)
+    return [os.path.abspath(FName), St.st_size, St.st_mtime]
+#====================================================================
+def CL_ODBC_Key(FName, Request):
+    # returns the name of the cache entry of a request on an ODB file
+    #
+    S = json.dumps([CL_ODBC_Fingerprint(FName), Request], sort_keys=True)
+    return hashlib.sha1(S.encode('utf-8')).hexdigest()
+#====================================================================
+def CL_ODBC_Entries(CacheDir=None):
+    # This function returns the list of the cache entries (least recently used first)
+    # as dictionaries {'key', 'bytes', 'used', 'odb', 'request', 'created'}
+    #
+    CacheDir = CL_ODBC_Dir if CacheDir is None else CacheDir
+    E = []
+    if not os.path.isdir(CacheDir):
+        return E
+    for f in os.listdir(CacheDir):
+        if not f.endswith('.npz') or f.endswith('.tmp.npz'):
+            continue
+        Key  = f[:-4]
+        Data = os.path.join(CacheDir, f)
+        Meta = {}
+        try:
+            with open(os.path.join(CacheDir, Key + '.json')) as m:
+                Meta = json.load(m)
+            St = os.stat(Data)
+        except (IOError, OSError, ValueError):
+            continue
+        E.append({'key': Key, 'bytes': St.st_size, 'used': St.st_mtime, 'odb': Meta.get('odb'),
+                  'request': Meta.get('request'), 'created': Meta.get('created')})
+    E.sort(key=lambda e: e['used'])
+    return E
+#====================================================================
+def CL_ODBC_Evict(CacheDir=None, MaxSize=None):
+    # This function deletes the least recently used entries until the cache is smaller than MaxSize
+    #
+    MaxSize = CL_ODBC_MaxSize if MaxSize is None else MaxSize
+    E       = CL_ODBC_Entries(CacheDir)
+    Size    = sum(e['bytes'] for e in E)
+    for e in E:
+        if Size <= MaxSize:
+            break
+        _CL_ODBC_Delete(CacheDir, e['key'])
+        Size -= e['bytes']
+#====================================================================
+def CL_ODBC_Clear(CacheDir=None, FName=None):
+    # This function deletes all the cache entries (or the entries of one ODB file)
+    # and returns the number of deleted entries
+    #
+    n = 0
+    for e in CL_ODBC_Entries(CacheDir):
+        if FName is not None and (e['odb'] is None or e['odb'][0] != os.path.abspath(FName)):
+            continue
+        _CL_ODBC_Delete(CacheDir, e['key'])
+        n += 1
+    return n
+#====================================================================
+def _CL_ODBC_Delete(CacheDir, Key):
+    # deletes the files of one entry
+    #
+    CacheDir = CL_ODBC_Dir if CacheDir is None else CacheDir
+    for Ext in ('.npz', '.json'):
+        try:
+            os.remove(os.path.join(CacheDir, Key + Ext))
+        except OSError:
+            pass
+#====================================================================
+def _CL_ODBC_Read(Data):
+    # loads one entry (the names stored as None are restored)
+    #
+    with open(Data[:-4] + '.json') as m:
+        Meta = json.load(m)
+    with np.load(Data, allow_pickle=True) as Z:
+        A = dict((k, Z[k]) for k in Z.files)
+    for k in Meta['none']:
+        A[k] = None
+    return A
+#====================================================================
+def _CL_ODBC_Main(Args):
+    # command line interface
+    #
+    import argparse
+    P = argparse.ArgumentParser(description='Inspect or clear the ODB extraction cache')
+    P.add_argument('command', choices=['list', 'clear'])
+    P.add_argument('--dir', default=CL_ODBC_Dir, help='cache directory')
+    P.add_argument('--odb', default=None, help='only the entries of this ODB file')
+    A = P.parse_args(Args)
+    if A.command == 'clear':
+        print('%d entries deleted' % CL_ODBC_Clear(A.dir, A.odb))
+        return
+    E = CL_ODBC_Entries(A.dir)
+    if A.odb is not None:
+        E = [e for e in E if e['odb'] is not None and e['odb'][0] == os.path.abspath(A.odb)]
+    for e in E:
+        print('%s %10d %s %s %s' % (e['key'][:12], e['bytes'],
+                                    time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(e['used'])),
+                                    e['odb'][0] if e['odb'] else '?', json.dumps(e['request'])))
+    print('%d entries, %.1f MB in %s' % (len(E), sum(e['bytes'] for e in E)/2.0**20, A.dir))
+#====================================================================
+if __name__ == '__main__':
+    _CL_ODBC_Main(sys.argv[1:])
@@ -0,0 +1,312 @@
+# By: Javad KAZEM
+#
+import numpy as np
+import os
+import json
+from CL_Abaqus_ODB_Reader import *
+
+'''
+(1) This module assembles the fields of the cases of a DOE into one dataset
+
+(2) The cases are read one by one (extracted from the ODB files or loaded from the files of
+    a previous extraction) and each field is written directly into one preallocated stacked
+    array (n_cases, ...) which can be a memory map (a .npy file), so the stack does not have
+    to fit in the memory. The reductions (per-case max/min/mean and location of the maximum,
+    per-node max/min/mean and case of the maximum) are updated while the cases are read,
+    the per-node percentiles are computed at the end from the stack by blocks of nodes.
+
+Example:
+import sys
+sys.path.append('d://_CL_Python//')
+from CL_Abaqus_ODB_Dataset import *
+Fields = [('U'   , 'PART-SPECIMEN-1', 'Step-Rolling', -1, 'U'   , 'data' ),
+          ('Svm' , 'PART-SPECIMEN-1', 'Step-Rolling', -1, 'S'   , 'mises'),
+          ('PEEQ', 'PART-SPECIMEN-1', 'Step-Rolling', -1, 'PEEQ', 'data' )]
+Loader = CL_ODBA_ODBLoader(session, 'D://DOE//%d//Jobnew.odb', Fields)
+D = CL_ODBA_Dataset(range(0, 1001), ['U', 'Svm', 'PEEQ'], Loader, OutDir='D://DOE-Results//Dataset',
+                    Percentiles=[5, 50, 95])
+D['fields']['Svm']['case_max']        # maximum von Mises stress of each case
+D['fields']['U']['stack'].shape       # (1001, n_nodes, 3)
+
+'''
+#====================================================================
+# reductions updated while the cases are read
+CL_ODBA_Reductions = ['max', 'min', 'mean', 'argmax']
+#====================================================================
+def CL_ODBA_Dataset(Cases, Names, Loader, OutDir=None, Reductions=None, Percentiles=(),
+                    Stack=True, Memory=2**27, Log=True):
+    # This function reads the cases and returns the dataset as a dictionary:
+    #       'cases'  : (list) the case indices, row k of the arrays is the case Cases[k]
+    #       'failed' : {Index : error message} of the cases which could not be read
+    #                  (their rows are nan, or 0 for integer fields)
+    #       'fields' : {Name : {...}} with for each field:
+    #           'stack'                    : (n_cases, ...) array, or None if Stack is False
+    #           'case_max', 'case_min', 'case_mean' : (n_cases, ...) reductions over the rows of a case
+    #           'case_argmax'              : (n_cases, ...) the row (node, element, ...) of the maximum
+    #           'node_max', 'node_min', 'node_mean' : (...) reductions over the cases, per row
+    #           'node_argmax'              : (...) the position in Cases of the maximum, per row
+    #           'percentiles'              : {q : (...) array} per row percentiles over the cases
+    #       (for a field with components, the reductions are done per component)
+    #
+    # Cases       : the case indices (for example range(Index_from, Index_to+1))
+    # Names       : the names of the fields
+    # Loader      : a function Loader(Index) returning {Name : array} for a case
+    #               (see CL_ODBA_ODBLoader, CL_ODBA_BatchLoader, CL_ODBA_NpzLoader)
+    # OutDir      : None (arrays in memory) or a directory: the stacks are memory maps
+    #               OutDir/<Name>.npy and the reductions are saved too (see CL_ODBA_Load)
+    # Reductions  : the reductions of CL_ODBA_Reductions to compute (default: all)
+    # Percentiles : the percentiles (0-100) per row over the cases, they need Stack = True
+    # Stack       : False -> only the reductions are kept
+    # Memory      : size (bytes) of the blocks of the stack read when the percentiles are computed
+    #
+    Cases      = [int(i) for i in Cases]
+    Reductions = list(CL_ODBA_Reductions if Reductions is None else Reductions)
+    for R in Reductions:
+        if R not in CL_ODBA_Reductions:
+            raise ValueError('Unknown reduction: ' + str(R))
+    if Percentiles and not Stack:
+        raise ValueError('the percentiles need the stack (Stack=True)')
+    if OutDir is not None and not os.path.isdir(OutDir):
+        os.makedirs(OutDir)
+    NC     = len(Cases)
+    Fields = dict((Name, None) for Name in Names)
+    Failed = {}
+    #------------------------ read the cases
+    for k, Index in enumerate(Cases):
+        try:
+            V = Loader(Index)
+            V = dict((Name, np.asarray(V[Name])) for Name in Names)
+            for Name in Names:
+                F = Fields[Name]
+                if F is not None and (V[Name].shape != F['shape']):
+                    raise ValueError('%s has the shape %s instead of %s' % (Name, V[Name].shape, F['shape']))
+        except Exception as E:
+            Failed[Index] = '%s: %s' % (type(E).__name__, E)
+            if Log:
+                print('Case %d failed: %s' % (Index, Failed[Index]))
+            continue
+        for Name in Names:
+            if Fields[Name] is None:
+                Fields[Name] = _CL_ODBA_Start(Name, V[Name], NC, OutDir, Reductions, Stack)
+            _CL_ODBA_Add(Fields[Name], k, V[Name])
+        if Log:
+            print('Case %d read (%d/%d)' % (Index, k+1, NC))
+    #------------------------ finish the reductions
+    D = {'cases': Cases, 'failed': Failed, 'fields': {}}
+    for Name in Names:
+        F = Fields[Name]
+        if F is None:
+            D['fields'][Name] = None
+            continue
+        for k, Index in enumerate(Cases):
+            if Index in Failed and F['stack'] is not None:
+                F['stack'][k] = np.nan if F['stack'].dtype.kind == 'f' else 0
+        R = _CL_ODBA_Finish(F)
+        R['percentiles'] = {}
+        for q in Percentiles:
+            R['percentiles'][q] = CL_ODBA_Percentile(R['stack'], q, [Index not in Failed for Index in Cases], Memory)
+        D['fields'][Name] = R
+    if OutDir is not None:
+        _CL_ODBA_Save(OutDir, D)
+    return D
+#====================================================================
+def CL_ODBA_Percentile(A, q, Rows=None, Memory=2**27):
+    # This function returns the q-th percentile over the cases (axis 0) of a stack,
+    # computed by blocks of rows of about Memory bytes (as float64), so that a memory-mapped
+    # stack is read block by block
+    #
+    # A      : (n_cases, ...) the stack
+    # q      : percentile (0-100)
+    # Rows   : None or a boolean array selecting the cases (for example the cases which did not fail)
+    # Memory : size (bytes) of a block
+    #
+    Sel = np.arange(len(A)) if Rows is None else np.flatnonzero(Rows)
+    if A.ndim == 1:
+        return np.float64(np.nanpercentile(np.asarray(A)[Sel], q))
+    P = np.empty(A.shape[1:], np.float64)
+    Chunk = max(int(Memory)//(max(len(A), 1)*int(np.prod(A.shape[2:]))*8), 1)
+    for i0 in range(0, A.shape[1], Chunk):
+        P[i0:i0+Chunk] = np.nanpercentile(np.asarray(A[:,i0:i0+Chunk])[Sel], q, axis=0)
+    return P
+#====================================================================
+def CL_ODBA_Load(OutDir, MMap=True):
+    # This function loads a dataset saved by CL_ODBA_Dataset(..., OutDir=OutDir)
+    # (the stacks are opened as read-only memory maps if MMap is True)
+    #
+    with open(os.path.join(OutDir, 'dataset.json')) as f:
+        Meta = json.load(f)
+    D = {'cases': Meta['cases'], 'failed': dict((int(i), e) for i, e in Meta['failed'].items()), 'fields': {}}
+    for Name in Meta['names']:
+        Path = os.path.join(OutDir, Name + '.reductions.npz')
+        if not os.path.isfile(Path):
+            D['fields'][Name] = None
+            continue
+        F = {'stack': None, 'percentiles': {}}
+        with np.load(Path) as Z:
+            for Key in Z.files:
+                if Key.startswith('percentile_'):
+                    F['percentiles'][float(Key[11:])] = Z[Key]
+                else:
+                    F[Key] = Z[Key]
+        Stack = os.path.join(OutDir, Name + '.npy')
+        if os.path.isfile(Stack):
+            F['stack'] = np.load(Stack, mmap_mode='r' if MMap else None)
+        D['fields'][Name] = F
+    return D
+#====================================================================
+def CL_ODBA_ODBLoader(session, FName, Fields, Bulk=True):
+    # This function returns a loader extracting the fields of a case from its ODB file
+    #
+    # session : abaqus session
+    # FName   : the ODB file of a case, a string with %d (replaced by the case index)
+    #           or a function FName(Index)
+    # Fields  : a list of (Name, InsName, StepName, Frame, FieldName, SubFieldName)
+    # Bulk    : see CL_ODBR_ExtractPlan
+    #
+    Plan = [(InsName, StepName, Frame, FieldName, [SubFieldName])
+            for Name, InsName, StepName, Frame, FieldName, SubFieldName in Fields]
+    def Loader(Index):
+        ODB = CL_ODBR_OpenODB(session, FName(Index) if callable(FName) else FName % Index)
+        try:
+            R = CL_ODBR_ExtractPlan(ODB, Plan, Bulk)
+            NF = dict((StepName, len(ODB.steps[StepName].frames)) for _, _, StepName, _, _, _ in Fields)
+        finally:
+            ODB.close()
+        return _CL_ODBA_Pick(R, Fields, NF)
+    return Loader
+#====================================================================
+def CL_ODBA_BatchLoader(OutDir, Fields):
+    # This function returns a loader reading the fields of a case from the result file
+    # OutDir/ODB-<Index>.npz of CL_ODBB_Run (a negative frame counts from the last extracted frame)
+    #
+    # OutDir : the output directory of CL_ODBB_Run
+    # Fields : see CL_ODBA_ODBLoader
+    #
+    from CL_Abaqus_ODB_Batch import CL_ODBB_Load
+    def Loader(Index):
+        return _CL_ODBA_Pick(CL_ODBB_Load(os.path.join(OutDir, 'ODB-%d.npz' % Index)), Fields, None)
+    return Loader
+#====================================================================
+def CL_ODBA_NpzLoader(Files):
+    # This function returns a loader reading one array per field from .npz files,
+    # for example the files written by Example 3
+    #
+    # Files : a list of (Name, file name with %d replaced by the case index)
+    #
+    # Example: CL_ODBA_NpzLoader([('U', os.path.join(ExtDir, 'Specimen-U-%d.npz'))])
+    #
+    def Loader(Index):
+        V = {}
+        for Name, FName in Files:
+            with np.load(FName % Index) as Z:
+                V[Name] = Z[Z.files[0]]
+        return V
+    return Loader
+#====================================================================
+def _CL_ODBA_Pick(R, Fields, NF):
+    # picks the arrays of the fields from the result of CL_ODBR_ExtractPlan
+    # (NF : {StepName : number of frames}, or None to count from the extracted frames)
+    #
+    V = {}
+    for Name, InsName, StepName, Frame, FieldName, SubFieldName in Fields:
+        Frames = sorted(f for (i, s, f, n) in R if (i, s, n) == (InsName, StepName, FieldName))
+        if NF is not None and Frame < 0:
+            Frame = NF[StepName] + Frame
+        elif Frame < 0:
+            Frame = Frames[Frame] if len(Frames) >= -Frame else Frame
+        if Frame not in Frames:
+            raise KeyError('not extracted: ' + '/'.join([InsName, StepName, str(Frame), FieldName]))
+        V[Name] = R[(InsName, StepName, Frame, FieldName)][SubFieldName]
+        if V[Name] is None:
+            raise KeyError('no ' + SubFieldName + ' in ' + FieldName)
+    return V
+#====================================================================
+def _CL_ODBA_Start(Name, A, NC, OutDir, Reductions, Stack):
+    # allocates the stack and the reductions of one field from its first case
+    #
+    F = {'name': Name, 'shape': A.shape, 'reductions': Reductions, 'stack': None}
+    dtype = A.dtype if A.dtype.kind in 'iuf' else np.float64
+    if Stack:
+        if OutDir is None:
+            F['stack'] = np.empty((NC,) + A.shape, dtype)
+        else:
+            F['stack'] = np.lib.format.open_memmap(os.path.join(OutDir, Name + '.npy'), mode='w+',
+                                                   dtype=dtype, shape=(NC,) + A.shape)
+    Row = A.shape[1:]                                      # one value per component
+    if 'max' in Reductions or 'argmax' in Reductions:
+        F['case_max'] = np.full((NC,) + Row, np.nan)
+        F['node_max'] = np.full(A.shape, -np.inf)
+    if 'min' in Reductions:
+        F['case_min'] = np.full((NC,) + Row, np.nan)
+        F['node_min'] = np.full(A.shape, np.inf)
+    if 'mean' in Reductions:
+        F['case_mean'] = np.full((NC,) + Row, np.nan)
+        F['node_sum']  = np.zeros(A.shape)
+        F['node_n']    = np.zeros(A.shape, np.int64)
+    if 'argmax' in Reductions:
+        F['case_argmax'] = np.full((NC,) + Row, -1, np.int64)
+        F['node_argmax'] = np.full(A.shape, -1, np.int64)
+    return F
+#====================================================================
+def _CL_ODBA_Add(F, k, A):
+    # adds the case of row k to the stack and to the reductions of a field
+    #
+    if F['stack'] is not None:
+        F['stack'][k] = A
+    A = A.astype(np.float64)
+    Valid = ~np.isnan(A)
+    if not Valid.any():
+        return
+    if 'case_max' in F:
+        F['case_max'][k] = np.nanmax(A, axis=0)
+        New = Valid & (A > F['node_max'])
+        F['node_max'][New] = A[New]
+        if 'node_argmax' in F:
+            F['case_argmax'][k] = np.nanargmax(np.where(Valid, A, -np.inf), axis=0)
+            F['node_argmax'][New] = k
+    if 'case_min' in F:
+        F['case_min'][k] = np.nanmin(A, axis=0)
+        np.fmin(F['node_min'], A, out=F['node_min'])
+    if 'case_mean' in F:
+        F['case_mean'][k] = np.nanmean(A, axis=0)
+        F['node_sum'] += np.where(Valid, A, 0.0)
+        F['node_n']   += Valid
+#====================================================================
+def _CL_ODBA_Finish(F):
+    # returns the reductions of a field (the rows without any value are nan)
+    #
+    R = {'stack': F['stack']}
+    if 'case_max' in F:
+        R['node_max'] = np.where(np.isinf(F['node_max']), np.nan, F['node_max'])
+        if 'max' in F['reductions']:
+            R['case_max'] = F['case_max']
+    if 'case_min' in F:
+        R['case_min'] = F['case_min']
+        R['node_min'] = np.where(np.isinf(F['node_min']), np.nan, F['node_min'])
+    if 'case_mean' in F:
+        R['case_mean'] = F['case_mean']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            R['node_mean'] = F['node_sum']/F['node_n']
+    if 'case_argmax' in F:
+        R['case_argmax'] = F['case_argmax']
+        R['node_argmax'] = F['node_argmax']
+        if 'max' not in F['reductions']:
+            R.pop('node_max')
+    return R
+#====================================================================
+def _CL_ODBA_Save(OutDir, D):
+    # saves the reductions and the list of cases of a dataset (the stacks are already in OutDir)
+    #
+    for Name, F in D['fields'].items():
+        if F is None:
+            continue
+        if F['stack'] is not None and hasattr(F['stack'], 'flush'):
+            F['stack'].flush()
+        A = dict((Key, V) for Key, V in F.items() if Key not in ('stack', 'percentiles'))
+        for q, P in F['percentiles'].items():
+            A['percentile_%g' % q] = P
+        np.savez(os.path.join(OutDir, Name + '.reductions.npz'), **A)
+    Meta = {'cases': D['cases'], 'failed': dict((str(i), e) for i, e in D['failed'].items()),
+            'names': list(D['fields'])}
+    with open(os.path.join(OutDir, 'dataset.json'), 'w') as f:
+        json.dump(Meta, f, indent=1)
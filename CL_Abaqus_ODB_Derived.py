@@ -0,0 +1,242 @@
+# By: Javad KAZEM
+#
+import numpy as np
+from CL_Abaqus_ODB_Reader import *
+
+'''
+(1) This module computes the derived quantities of the field outputs (invariants, principal values
+    and directions) from the raw components with NumPy
+
+(2) Only the 'data' of the field is read from the ODB (in bulk, see CL_ODBR_FieldOutputBulk),
+    the invariants are then computed for all values at once instead of being read one
+    FieldValue property at a time. The tensors use the component order of Abaqus
+    (S11, S22, S33, S12, S13, S23) and the principal directions are given as rows,
+    like localCoordSystem.
+
+Example:
+import sys
+sys.path.append('d://_CL_Python//')
+from CL_Abaqus_ODB_Derived import *
+S = CL_ODBD_FieldOutput(ODB, 'PART-SPECIMEN-1', 'Step-Rolling', -1, 'S',
+                        ['mises', 'tresca', 'press', 'maxPrincipal', 'minPrincipal'])
+P, Dir = CL_ODBD_Principals(S['data'], Directions=True)
+
+'''
+#====================================================================
+# the derived sub-fields computed by this module
+CL_ODBD_SubFields = ['magnitude', 'mises', 'tresca', 'press', 'inv3',
+                     'maxPrincipal', 'midPrincipal', 'minPrincipal',
+                     'maxInPlanePrincipal', 'minInPlanePrincipal', 'outOfPlanePrincipal',
+                     'principalDirections']
+# number of values processed at once (limits the size of the temporary (n,3,3) arrays)
+CL_ODBD_Chunk = 2**18
+#====================================================================
+def CL_ODBD_FieldOutput(ODB, InsName, StepName, Frame, FieldName, SubFieldNames):
+    # This function returns the field outputs as a dictionary of arrays, like CL_ODBR_FieldOutputBulk,
+    # but the derived sub-fields (CL_ODBD_SubFields) are computed from 'data' with NumPy
+    # (with the type and the components of the block of each value, see CL_ODBD_DeriveBlocks).
+    # 'data' is always returned.
+    #
+    # ODB, InsName, StepName, Frame, FieldName, SubFieldNames : see CL_ODBR_FieldOutputBulk
+    #       'principalDirections' : (n,3,3) the directions of min, mid, max principal (rows)
+    #
+    Names = ['data']
+    for Name in (list(CL_ODBR_AllSubFields) if SubFieldNames == 'All' else
+                 [SubFieldNames] if isinstance(SubFieldNames, str) else list(SubFieldNames)):
+        if Name not in Names:
+            Names.append(Name)
+    Derived = [Name for Name in Names if Name in CL_ODBD_SubFields]
+    Read    = [Name for Name in Names if Name not in CL_ODBD_SubFields]
+    Extra   = [] if not Derived else [Name for Name in ('type', 'componentLabels') if Name not in Read]
+    F = CL_ODBR_FieldOutputBulk(ODB, InsName, StepName, Frame, FieldName, Read + Extra)
+    Type, Labels = F['type'], F['componentLabels']
+    for Name in Extra:
+        del F[Name]
+    if Derived:
+        F.update(CL_ODBD_DeriveBlocks(F['data'], Derived, Type, Labels))
+    return F
+#====================================================================
+def CL_ODBD_DeriveBlocks(Data, Names, Type, Labels):
+    # This function returns the derived quantities of values of several kinds (for example the
+    # stresses of solids and shells of one instance) as a dictionary {Name : array}: the values
+    # of each block (type and component labels) are derived with their own type and components
+    # (nan for the values of a block where the quantity is not defined)
+    #
+    # Data   : (n,NC) the 'data' of CL_ODBR_FieldOutputBulk (columns: see CL_ODBR_ComponentColumns)
+    # Names  : a list of names of CL_ODBD_SubFields
+    # Type   : (n,) the 'type' of each value
+    # Labels : (n,) the 'componentLabels' of each value
+    #
+    Data   = np.asarray(Data)
+    Type   = np.asarray(Type, str)
+    Labels = np.asarray(Labels, str)
+    if not len(Data) or ((Type == Type[0]).all() and (Labels == Labels[0]).all()):
+        return CL_ODBD_Derive(Data, Names, Type[0] if len(Data) else None)
+    Kinds, Code = np.unique(np.char.add(np.char.add(Type, '|'), Labels), return_inverse=True)
+    Columns = CL_ODBR_ComponentColumns(Labels)
+    Out = np.float32 if Data.dtype == np.float32 else np.float64
+    F   = dict((Name, None) for Name in Names)
+    for k, Kind in enumerate(Kinds):
+        Rows = np.flatnonzero(Code == k)
+        T, L = Kind.split('|', 1)
+        D    = Data[Rows]
+        if L and Data.ndim == 2 and len(Columns) == Data.shape[1]:
+            D = D[:,[Columns.index(c) for c in L.split(',')]]
+        for Name, V in CL_ODBD_Derive(D, Names, T).items():
+            if V is None:
+                continue
+            if F[Name] is None:
+                F[Name] = np.full((len(Data),) + V.shape[1:], np.nan, Out)
+            F[Name][Rows] = V
+    return F
+#====================================================================
+def CL_ODBD_Derive(Data, Names, Type=None):
+    # This function returns the derived quantities of the values as a dictionary {Name : array}
+    #
+    # Data  : (n,NC) array of the components (see CL_ODBD_Tensor) or (n,NC) vectors
+    # Names : a list of names of CL_ODBD_SubFields
+    # Type  : the type of the field ('SCALAR', 'VECTOR', 'TENSOR_3D_FULL', ...), if None
+    #         the data with 4 or 6 components are tensors and the other ones are vectors
+    #
+    # A name which is not defined for this kind of field (for example 'mises' of a vector)
+    # is returned as None, as Abaqus does.
+    #
+    Data = np.asarray(Data)
+    Out  = np.float32 if Data.dtype == np.float32 else np.float64
+    if Type is None:
+        Vector = Data.ndim == 1 or Data.shape[1] not in (4, 6)
+    else:
+        Vector = not str(Type).startswith('TENSOR')
+    if not Vector and Data.ndim == 1:
+        Data = Data.reshape((1, -1))              # one tensor
+    n    = len(Data)
+    F = {}
+    for Name in Names:
+        if Name not in CL_ODBD_SubFields:
+            raise ValueError('Unknown derived quantity: ' + Name)
+        if Vector:
+            F[Name] = CL_ODBD_Magnitude(Data) if Name == 'magnitude' and Data.ndim == 2 else None
+        elif Name == 'magnitude':
+            F[Name] = None
+        elif Name == 'principalDirections':
+            F[Name] = np.empty((n, 3, 3), Out)
+        else:
+            F[Name] = np.empty(n, Out)
+    Need = [Name for Name in Names if F[Name] is not None and Name != 'magnitude']
+    if not Need:
+        return F
+    Eig = 'principalDirections' in Need
+    Val = Eig or any(Name in ('tresca', 'maxPrincipal', 'midPrincipal', 'minPrincipal') for Name in Need)
+    for i0 in range(0, n, CL_ODBD_Chunk):
+        D = Data[i0:i0+CL_ODBD_Chunk].reshape((-1, Data.shape[-1]))
+        T = CL_ODBD_Tensor(D)
+        if Eig:
+            P, V = np.linalg.eigh(T)
+            F['principalDirections'][i0:i0+len(D)] = np.swapaxes(V, 1, 2)
+        elif Val:
+            P = np.linalg.eigvalsh(T)
+        for Name in Need:
+            R = F[Name][i0:i0+len(D)]
+            if Name == 'mises':
+                R[...] = CL_ODBD_Mises(T)
+            elif Name == 'press':
+                R[...] = CL_ODBD_Press(T)
+            elif Name == 'inv3':
+                R[...] = CL_ODBD_Inv3(T)
+            elif Name == 'tresca':
+                R[...] = P[:,2] - P[:,0]
+            elif Name == 'maxPrincipal':
+                R[...] = P[:,2]
+            elif Name == 'midPrincipal':
+                R[...] = P[:,1]
+            elif Name == 'minPrincipal':
+                R[...] = P[:,0]
+            elif Name == 'maxInPlanePrincipal':
+                R[...] = CL_ODBD_InPlane(T)[1]
+            elif Name == 'minInPlanePrincipal':
+                R[...] = CL_ODBD_InPlane(T)[0]
+            elif Name == 'outOfPlanePrincipal':
+                R[...] = T[:,2,2]
+    return F
+#====================================================================
+def CL_ODBD_Tensor(Data):
+    # This function returns the (n,3,3) symmetric tensors (float64) of the components:
+    #       6 components : S11, S22, S33, S12, S13, S23 (3D)
+    #       4 components : S11, S22, S33, S12           (plane strain, axisymmetric)
+    #       3 components : S11, S22, S12                (plane stress)
+    # Data is (n,NC) (or (NC,) for one tensor). A (n,3,3) array is returned as it is (as float64),
+    # a single (3,3) tensor must be given as (1,3,3) (a (3,3) array is 3 tensors of 3 components).
+    #
+    Data = np.asarray(Data, np.float64)
+    if Data.ndim == 3:
+        if Data.shape[1:] != (3, 3):
+            raise ValueError('Tensors must be (n,3,3), not %s' % (Data.shape,))
+        return Data
+    Data = Data.reshape((-1, Data.shape[-1]))
+    NC   = Data.shape[1]
+    T    = np.zeros((len(Data), 3, 3))
+    if NC == 6:
+        T[:,0,0], T[:,1,1], T[:,2,2] = Data[:,0], Data[:,1], Data[:,2]
+        T[:,0,1] = T[:,1,0] = Data[:,3]
+        T[:,0,2] = T[:,2,0] = Data[:,4]
+        T[:,1,2] = T[:,2,1] = Data[:,5]
+    elif NC == 4:
+        T[:,0,0], T[:,1,1], T[:,2,2] = Data[:,0], Data[:,1], Data[:,2]
+        T[:,0,1] = T[:,1,0] = Data[:,3]
+    elif NC == 3:
+        T[:,0,0], T[:,1,1] = Data[:,0], Data[:,1]
+        T[:,0,1] = T[:,1,0] = Data[:,2]
+    else:
+        raise ValueError('A tensor has 3, 4 or 6 components, not %d' % NC)
+    return T
+#====================================================================
+def CL_ODBD_Mises(T):
+    # von Mises equivalent of the tensors T (n,3,3), see CL_ODBD_Tensor
+    #
+    T  = CL_ODBD_Tensor(T)
+    d0 = T[:,0,0] - T[:,1,1]
+    d1 = T[:,1,1] - T[:,2,2]
+    d2 = T[:,2,2] - T[:,0,0]
+    return np.sqrt(0.5*(d0**2 + d1**2 + d2**2) + 3.0*(T[:,0,1]**2 + T[:,0,2]**2 + T[:,1,2]**2))
+#====================================================================
+def CL_ODBD_Press(T):
+    # equivalent pressure (-trace/3) of the tensors T
+    #
+    T = CL_ODBD_Tensor(T)
+    return -(T[:,0,0] + T[:,1,1] + T[:,2,2])/3.0
+#====================================================================
+def CL_ODBD_Inv3(T):
+    # third invariant of the tensors T as defined by Abaqus: r = (9/2 S:(S.S))^(1/3),
+    # S being the deviatoric part (S:(S.S) = 3 det(S))
+    #
+    T = CL_ODBD_Tensor(T)
+    S = T - np.eye(3)*(np.trace(T, axis1=1, axis2=2)/3.0)[:,None,None]
+    return np.cbrt(13.5*np.linalg.det(S))
+#====================================================================
+def CL_ODBD_Principals(Data, Directions=False):
+    # This function returns the principal values P (n,3) sorted as min, mid, max
+    # and, if Directions is True, the principal directions Dir (n,3,3):
+    # Dir[i,k] is the unit direction of P[i,k] (rows, like localCoordSystem)
+    #
+    # Data : the components (see CL_ODBD_Tensor)
+    #
+    T = CL_ODBD_Tensor(Data)
+    if not Directions:
+        return np.linalg.eigvalsh(T)
+    P, V = np.linalg.eigh(T)
+    return P, np.swapaxes(V, 1, 2)
+#====================================================================
+def CL_ODBD_InPlane(T):
+    # returns the minimum and the maximum in-plane (1-2 plane) principal values of the tensors T
+    #
+    T = CL_ODBD_Tensor(T)
+    c = 0.5*(T[:,0,0] + T[:,1,1])
+    r = np.sqrt((0.5*(T[:,0,0] - T[:,1,1]))**2 + T[:,0,1]**2)
+    return c - r, c + r
+#====================================================================
+def CL_ODBD_Magnitude(Data):
+    # magnitude of vectors (n,NC)
+    #
+    Data = np.asarray(Data)
+    Out  = np.float32 if Data.dtype == np.float32 else np.float64
+    return np.sqrt(np.einsum('ij,ij->i', Data, Data, dtype=np.float64)).astype(Out)
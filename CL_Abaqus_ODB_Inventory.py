@@ -0,0 +1,255 @@
+# By: Javad KAZEM
+#
+import os
+import sys
+import json
+import time
+import fnmatch
+from CL_Abaqus_ODB_Reader import *
+
+'''
+(1) This module keeps an inventory of the ODB files of a directory tree in one catalog file (JSON)
+
+(2) For each ODB the catalog gives the instances (number of nodes and elements, element types),
+    the steps (number of frames, frame times) and the field outputs of the last frame of each
+    step (positions, component labels, invariants), without any field value. An ODB is opened
+    again only if its size or modification time changed since the last scan, so the catalog
+    can be used to check an extraction plan (missing field, bad frame number, ...) and to plan
+    a batch without opening the ODB files.
+
+Example (in Abaqus, or with "abaqus python" and the default Opener):
+import sys
+sys.path.append('d://_CL_Python//')
+from CL_Abaqus_ODB_Inventory import *
+C = CL_ODBI_Scan('D://DOE-Simulations', 'D://DOE-Results//catalog.json', Opener=session.openOdb)
+Plan = [('PART-SPECIMEN-1', 'Step-Rolling', -1, 'U', 'data')]
+for FName in sorted(C['odbs']):
+    print(FName, CL_ODBI_Check(C, FName, Plan))
+
+(3) From the command line:
+abaqus python CL_Abaqus_ODB_Inventory.py scan RootDir [--catalog catalog.json]
+python CL_Abaqus_ODB_Inventory.py list [--catalog catalog.json]
+
+'''
+#====================================================================
+# default name of the catalog file (in the scanned directory) and version of its layout
+CL_ODBI_Catalog = 'odb-catalog.json'
+CL_ODBI_Version = 1
+#====================================================================
+def CL_ODBI_Scan(RootDir, Catalog=None, Opener=None, Pattern='*.odb', ElementTypes=True, Log=True):
+    # This function updates the catalog of the ODB files of a directory tree and returns it
+    # as a dictionary {'version', 'root', 'odbs': {full path : entry}} (see CL_ODBI_Describe).
+    # Each entry also has 'size', 'mtime', 'scanned' and 'error' (None, or why the ODB
+    # could not be read; such an ODB is read again at the next scan).
+    #
+    # RootDir      : the directory searched (with its sub-directories)
+    # Catalog      : the catalog file (default: RootDir/odb-catalog.json)
+    # Opener       : function opening an ODB as Opener(path, readOnly=True)
+    #                (default: odbAccess.openOdb, use session.openOdb in Abaqus CAE)
+    # Pattern      : pattern of the names of the ODB files
+    # ElementTypes : False -> the element types are not counted (faster for large meshes)
+    #
+    if Catalog is None:
+        Catalog = os.path.join(RootDir, CL_ODBI_Catalog)
+    if Opener is None:
+        from odbAccess import openOdb as Opener
+    C = CL_ODBI_Load(Catalog)
+    C['root'] = os.path.abspath(RootDir)
+    Found = []
+    for Dir, _, Files in os.walk(RootDir):
+        for f in sorted(fnmatch.filter(Files, Pattern)):
+            Found.append(os.path.abspath(os.path.join(Dir, f)))
+    Odbs = {}
+    try:
+        for FName in Found:
+            St = os.stat(FName)
+            E  = C['odbs'].get(FName)
+            if E is not None and E['error'] is None and E['size'] == St.st_size and E['mtime'] == St.st_mtime:
+                Odbs[FName] = E                   # unchanged
+                continue
+            E = {'size': St.st_size, 'mtime': St.st_mtime, 'scanned': time.time(), 'error': None}
+            ODB = None
+            try:
+                if os.path.exists(os.path.splitext(FName)[0] + '.lck'):
+                    raise RuntimeError('ODB is locked')
+                ODB = Opener(FName, readOnly=True)
+                E.update(CL_ODBI_Describe(ODB, ElementTypes))
+            except Exception as Err:
+                E['error'] = '%s: %s' % (type(Err).__name__, Err)
+            finally:
+                if ODB is not None:
+                    try:
+                        ODB.close()
+                    except Exception:
+                        pass
+            Odbs[FName] = E
+            if Log:
+                print('%s %s' % (FName, E['error'] or 'scanned'))
+    finally:
+        if len(Odbs) < len(Found):                # stopped: keep the entries not scanned again
+            for FName in Found:
+                if FName not in Odbs and FName in C['odbs']:
+                    Odbs[FName] = C['odbs'][FName]
+        C['odbs'] = Odbs
+        _CL_ODBI_Save(Catalog, C)
+    return C
+#====================================================================
+def CL_ODBI_Describe(ODB, ElementTypes=True):
+    # This function returns the metadata of an ODB as a dictionary:
+    #       'instances' : {InsName : {'nodes': count, 'elements': count, 'types': {EType : count}}}
+    #       'steps'     : {StepName : {'index', 'frames': count, 'time': [frame values],
+    #                                  'timePeriod', 'totalTime', 'fields': {FieldName : {...}}}}
+    #                     the fields of the last frame: 'type', 'description',
+    #                     'positions', 'components', 'invariants'
+    #
+    # ODB          : The ODB object
+    # ElementTypes : False -> 'types' is not computed (it needs a loop over the elements)
+    #
+    D = {'instances': {}, 'steps': {}}
+    for InsName in CL_ODBR_InsNames(ODB):
+        Ins = ODB.rootAssembly.instances[InsName]
+        I   = {'nodes': len(Ins.nodes), 'elements': len(Ins.elements), 'types': None}
+        if ElementTypes:
+            Types = {}
+            for e in Ins.elements:
+                Types[e.type] = Types.get(e.type, 0) + 1
+            I['types'] = dict((str(t), n) for t, n in Types.items())
+        D['instances'][InsName] = I
+    for k, StepName in enumerate(CL_ODBR_StepNames(ODB)):
+        Step = ODB.steps[StepName]
+        S = {'index': k, 'frames': len(Step.frames), 'time': [float(t) for t in CL_ODBR_FramesTime(ODB, StepName)],
+             'timePeriod': float(getattr(Step, 'timePeriod', 0.0)),
+             'totalTime': float(getattr(Step, 'totalTime', 0.0)), 'fields': {}}
+        if S['frames']:
+            FOs = Step.frames[-1].fieldOutputs
+            for FieldName in CL_ODBR_FieldOutputNames(ODB, StepName, -1):
+                FO = FOs[FieldName]
+                S['fields'][FieldName] = {'type': str(FO.type), 'description': str(FO.description),
+                                          'positions': [str(L.position) for L in FO.locations],
+                                          'components': [str(c) for c in FO.componentLabels],
+                                          'invariants': [str(v) for v in FO.validInvariants]}
+        D['steps'][StepName] = S
+    return D
+#====================================================================
+def CL_ODBI_Check(C, FName, Plan):
+    # This function checks an extraction plan (see CL_ODBR_ExtractPlan) against the catalog
+    # and returns the list of the problems found (an empty list if the plan can be extracted)
+    #
+    # C     : the catalog (see CL_ODBI_Scan or CL_ODBI_Load)
+    # FName : the ODB file
+    # Plan  : a list of (InsName, StepName, Frames, FieldName, SubFieldNames)
+    #
+    # The fields are checked against the last frame of the step.
+    #
+    E = C['odbs'].get(os.path.abspath(FName))
+    if E is None:
+        return ['not in the catalog: ' + FName]
+    if E['error'] is not None:
+        return ['not readable: ' + E['error']]
+    P = []
+    for InsName, StepName, Frames, FieldName, SubFieldNames in Plan:
+        Where = '/'.join([InsName, StepName, str(Frames), FieldName])
+        if InsName not in E['instances']:
+            P.append(Where + ': no instance ' + InsName)
+        if StepName not in E['steps']:
+            P.append(Where + ': no step ' + StepName)
+            continue
+        S = E['steps'][StepName]
+        try:
+            if not CL_ODBR_FrameIndices(S['frames'], Frames):
+                P.append(Where + ': no frame selected (the step has %d frames)' % S['frames'])
+        except (IndexError, ValueError, TypeError) as Err:
+            P.append(Where + ': bad frame selection (the step has %d frames): %s' % (S['frames'], Err))
+        if FieldName not in S['fields']:
+            P.append(Where + ': no field ' + FieldName)
+            continue
+        F = S['fields'][FieldName]
+        Known = set(CL_ODBR_AllSubFields + CL_ODBR_BulkConstants + ['baseElementType'])
+        Invariants = set(_CL_ODBI_Invariant(v) for v in F['invariants'])
+        Names = [] if SubFieldNames == 'All' else [SubFieldNames] if isinstance(SubFieldNames, str) else SubFieldNames
+        for Name in Names:
+            if Name not in Known:
+                P.append(Where + ': unknown sub-field ' + Name)
+            elif _CL_ODBI_IsInvariant(Name) and Name not in Invariants:
+                P.append(Where + ': ' + Name + ' is not an invariant of ' + FieldName)
+    return P
+#====================================================================
+def CL_ODBI_Load(Catalog):
+    # This function returns the catalog saved in a file (an empty catalog if there is no file
+    # or if it was written by another version)
+    #
+    C = {'version': CL_ODBI_Version, 'root': None, 'odbs': {}}
+    if not os.path.isfile(Catalog):
+        return C
+    try:
+        with open(Catalog) as f:
+            L = json.load(f)
+    except ValueError:
+        return C
+    if L.get('version') != CL_ODBI_Version:
+        return C
+    return L
+#====================================================================
+# sub-fields which are invariants (Abaqus name of the invariant : sub-field name)
+_CL_ODBI_Invariants = {'MISES': 'mises', 'TRESCA': 'tresca', 'PRESS': 'press', 'INV3': 'inv3',
+                       'MAGNITUDE': 'magnitude', 'MAX_PRINCIPAL': 'maxPrincipal', 'MID_PRINCIPAL': 'midPrincipal',
+                       'MIN_PRINCIPAL': 'minPrincipal', 'MAX_INPLANE_PRINCIPAL': 'maxInPlanePrincipal',
+                       'MIN_INPLANE_PRINCIPAL': 'minInPlanePrincipal',
+                       'OUTOFPLANE_PRINCIPAL': 'outOfPlanePrincipal'}
+#====================================================================
+def _CL_ODBI_Invariant(Name):
+    # sub-field name of an Abaqus invariant name
+    #
+    return _CL_ODBI_Invariants.get(Name, Name)
+#====================================================================
+def _CL_ODBI_IsInvariant(Name):
+    # True if the sub-field is an invariant
+    #
+    return Name in _CL_ODBI_Invariants.values()
+#====================================================================
+def _CL_ODBI_Save(Catalog, C):
+    # writes the catalog (to a temporary file renamed at the end, so it is always complete)
+    #
+    Dir = os.path.dirname(os.path.abspath(Catalog))
+    if not os.path.isdir(Dir):
+        os.makedirs(Dir)
+    with open(Catalog + '.tmp', 'w') as f:
+        json.dump(C, f, indent=1, sort_keys=True)
+    os.replace(Catalog + '.tmp', Catalog)
+#====================================================================
+def _CL_ODBI_Main(Args):
+    # command line interface
+    #
+    import argparse
+    P = argparse.ArgumentParser(description='Inventory of the ODB files of a directory tree')
+    S = P.add_subparsers(dest='command')
+    Scan = S.add_parser('scan')
+    Scan.add_argument('root')
+    Scan.add_argument('--catalog', default=None)
+    Scan.add_argument('--pattern', default='*.odb')
+    Scan.add_argument('--no-types', action='store_true', help='do not count the element types')
+    List = S.add_parser('list')
+    List.add_argument('--catalog', default=CL_ODBI_Catalog)
+    A = P.parse_args(Args)
+    if A.command == 'scan':
+        C = CL_ODBI_Scan(A.root, A.catalog, Pattern=A.pattern, ElementTypes=not A.no_types)
+    elif A.command == 'list':
+        C = CL_ODBI_Load(A.catalog)
+    else:
+        P.print_help()
+        return
+    for FName in sorted(C['odbs']):
+        E = C['odbs'][FName]
+        if E['error'] is not None:
+            print('%s ERROR %s' % (FName, E['error']))
+            continue
+        print(FName)
+        for InsName, I in sorted(E['instances'].items()):
+            print('    instance %-30s %9d nodes %9d elements %s' % (InsName, I['nodes'], I['elements'],
+                                                                  ' '.join(sorted(I['types'] or {}))))
+        for StepName, St in sorted(E['steps'].items(), key=lambda s: s[1]['index']):
+            print('    step     %-30s %9d frames  fields: %s' % (StepName, St['frames'], ' '.join(sorted(St['fields']))))
+    print('%d ODB files in the catalog' % len(C['odbs']))
+#====================================================================
+if __name__ == '__main__':
+    _CL_ODBI_Main(sys.argv[1:])
@@ -0,0 +1,588 @@
+# By: Javad KAZEM
+#
+import numpy as np
+import time
+
+'''
+(1) This module provides a small pure-Python/NumPy stand-in for the Abaqus ODB object model
+
+(2) It mimics the parts of the ODB API used by CL_Abaqus_ODB_Reader
+    (rootAssembly.instances, steps[].frames[].fieldOutputs, getSubset, values, bulkDataBlocks)
+    so that the reader functions can be tested and benchmarked outside Abaqus.
+
+Example:
+from CL_Abaqus_ODB_Mock import *
+from CL_Abaqus_ODB_Reader import *
+ODB = CL_ODBM_MakeODB(nx=10, ny=10, nz=10)
+F   = CL_ODBR_FieldOutputBulk(ODB, 'PART-1-1', 'Step-1', -1, 'S', ['data','mises'])
+
+(3) The field data are synthetic, only their layout follows Abaqus.
+
+'''
+#====================================================================
+class SymbolicConstant(object):
+    # Stand-in for the abaqusConstants symbolic constants (str() gives the name)
+    #
+    def __init__(self, name):
+        self.name = name
+    def __str__(self):
+        return self.name
+    def __repr__(self):
+        return self.name
+    def __eq__(self, other):
+        return str(other) == self.name
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    def __hash__(self):
+        return hash(self.name)
+
+NODAL             = SymbolicConstant('NODAL')
+INTEGRATION_POINT = SymbolicConstant('INTEGRATION_POINT')
+ELEMENT_NODAL     = SymbolicConstant('ELEMENT_NODAL')
+CENTROID          = SymbolicConstant('CENTROID')
+WHOLE_ELEMENT     = SymbolicConstant('WHOLE_ELEMENT')
+SCALAR            = SymbolicConstant('SCALAR')
+VECTOR            = SymbolicConstant('VECTOR')
+TENSOR_3D_FULL    = SymbolicConstant('TENSOR_3D_FULL')
+SINGLE_PRECISION  = SymbolicConstant('SINGLE_PRECISION')
+DOUBLE_PRECISION  = SymbolicConstant('DOUBLE_PRECISION')
+MISES             = SymbolicConstant('MISES')
+TRESCA            = SymbolicConstant('TRESCA')
+PRESS             = SymbolicConstant('PRESS')
+INV3              = SymbolicConstant('INV3')
+MAGNITUDE         = SymbolicConstant('MAGNITUDE')
+MAX_PRINCIPAL     = SymbolicConstant('MAX_PRINCIPAL')
+MID_PRINCIPAL     = SymbolicConstant('MID_PRINCIPAL')
+MIN_PRINCIPAL     = SymbolicConstant('MIN_PRINCIPAL')
+#====================================================================
+class MockNode(object):
+    # OdbMeshNode: label, coordinates, instanceName
+    #
+    def __init__(self, label, coordinates, instanceName):
+        self.label        = label
+        self.coordinates  = coordinates
+        self.instanceName = instanceName
+#====================================================================
+class MockElement(object):
+    # OdbMeshElement: label, type, connectivity, instanceName
+    #
+    def __init__(self, label, type, connectivity, instanceName):
+        self.label        = label
+        self.type         = type
+        self.connectivity = connectivity
+        self.instanceName = instanceName
+#====================================================================
+class MockInstance(object):
+    # OdbInstance: the mesh is kept as arrays and the node/element objects
+    # are only created when Ins.nodes or Ins.elements is accessed
+    #
+    # name         : (string) instance name
+    # NLabel       : (1D array) node labels
+    # NOD          : (2D array) nodal coordinates
+    # ELabel       : (1D array) element labels
+    # EType        : (list) element type of each element
+    # Connectivity : (list) tuple of node labels of each element
+    #
+    def __init__(self, name, NLabel, NOD, ELabel, EType, Connectivity):
+        self.name         = name
+        self.NLabel       = np.asarray(NLabel, np.int32)
+        self.NOD          = np.asarray(NOD, np.float32)
+        self.ELabel       = np.asarray(ELabel, np.int32)
+        self.EType        = list(EType)
+        self.Connectivity = list(Connectivity)
+        self._nodes       = None
+        self._elements    = None
+        self.nodeSets     = {}
+        self.elementSets  = {}
+        self.surfaces     = {}
+    @property
+    def nodes(self):
+        if self._nodes is None:
+            self._nodes = [MockNode(int(l), tuple(float(c) for c in x), self.name)
+                           for l, x in zip(self.NLabel, self.NOD)]
+        return self._nodes
+    @property
+    def elements(self):
+        if self._elements is None:
+            self._elements = [MockElement(int(l), t, tuple(c), self.name)
+                              for l, t, c in zip(self.ELabel, self.EType, self.Connectivity)]
+        return self._elements
+    def NodeSetFromNodeLabels(self, name, nodeLabels):
+        self.nodeSets[name] = MockSet(name, self, NLabel=nodeLabels)
+        return self.nodeSets[name]
+    def ElementSetFromElementLabels(self, name, elementLabels):
+        self.elementSets[name] = MockSet(name, self, ELabel=elementLabels)
+        return self.elementSets[name]
+#====================================================================
+class MockSet(object):
+    # OdbSet (node set, element set or surface) of one instance, kept as label arrays
+    # (the nodes of an element set or a surface are the nodes of its elements)
+    #
+    def __init__(self, name, Instance, NLabel=None, ELabel=None):
+        self.name     = name
+        self.instance = Instance
+        self.ELabel   = None if ELabel is None else np.unique(np.asarray(ELabel, np.int32))
+        if NLabel is None and ELabel is not None:
+            Rows   = np.flatnonzero(np.isin(Instance.ELabel, self.ELabel))
+            NLabel = [n for r in Rows for n in Instance.Connectivity[r]]
+        self.NLabel   = None if NLabel is None else np.unique(np.asarray(NLabel, np.int32))
+#====================================================================
+class MockRootAssembly(object):
+    # OdbAssembly: instances repository
+    #
+    def __init__(self, instances):
+        self.instances = dict((Ins.name, Ins) for Ins in instances)
+#====================================================================
+class MockSectionPoint(object):
+    # SectionPoint: number, description
+    #
+    def __init__(self, number, description=''):
+        self.number      = number
+        self.description = description
+    def __eq__(self, other):
+        return getattr(other, 'number', other) == self.number
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    def __hash__(self):
+        return hash(self.number)
+#====================================================================
+class MockFieldLocation(object):
+    # FieldLocation: position, sectionPoints
+    #
+    def __init__(self, position, sectionPoints=()):
+        self.position      = position
+        self.sectionPoints = tuple(sectionPoints)
+#====================================================================
+class MockFieldBulkData(object):
+    # FieldBulkData: one block of values with the same instance, element type and position
+    #
+    def __init__(self, position, type, instance, componentLabels, data,
+                 elementLabels=None, nodeLabels=None, integrationPoints=None,
+                 conjugateData=None, baseElementType='', precision=SINGLE_PRECISION, sectionPoint=None):
+        self.position          = position
+        self.type              = type
+        self.instance          = instance
+        self.componentLabels   = tuple(componentLabels)
+        self.data              = data
+        self.conjugateData     = conjugateData
+        self.elementLabels     = elementLabels
+        self.nodeLabels        = nodeLabels
+        self.integrationPoints = integrationPoints
+        self.baseElementType   = baseElementType
+        self.precision         = precision
+        self.sectionPoint      = sectionPoint
+        self.localCoordSystem  = None
+        self._mises            = None
+    @property
+    def mises(self):
+        if self._mises is None and self.type == TENSOR_3D_FULL:
+            self._mises = _MockMises(self.data)
+        return self._mises
+    def __len__(self):
+        return len(self.data)
+    def take(self, Rows):
+        # returns a new block that contains only the given rows
+        def _take(A):
+            return None if A is None else A[Rows]
+        return MockFieldBulkData(self.position, self.type, self.instance, self.componentLabels,
+                                 self.data[Rows],
+                                 elementLabels     = _take(self.elementLabels),
+                                 nodeLabels        = _take(self.nodeLabels),
+                                 integrationPoints = _take(self.integrationPoints),
+                                 conjugateData     = _take(self.conjugateData),
+                                 baseElementType   = self.baseElementType,
+                                 precision         = self.precision,
+                                 sectionPoint      = self.sectionPoint)
+#====================================================================
+class MockFieldValue(object):
+    # FieldValue: one row of a bulk block; the invariants are computed on access
+    #
+    def __init__(self, Block, Row):
+        self._B              = Block
+        self._r              = Row
+        self.position        = Block.position
+        self.type            = Block.type
+        self.instance        = Block.instance
+        self.precision       = Block.precision
+        self.baseElementType = Block.baseElementType
+        self.face            = None
+        self.sectionPoint    = None
+        self.localCoordSystem= None
+    def _label(self, A):
+        return None if A is None else int(A[self._r])
+    @property
+    def elementLabel(self):
+        return self._label(self._B.elementLabels)
+    @property
+    def nodeLabel(self):
+        return self._label(self._B.nodeLabels)
+    @property
+    def integrationPoint(self):
+        return self._label(self._B.integrationPoints)
+    @property
+    def data(self):
+        d = self._B.data[self._r]
+        return float(d[0]) if self.type == SCALAR else tuple(float(x) for x in d)
+    @property
+    def conjugateData(self):
+        if self._B.conjugateData is None:
+            return None
+        return tuple(float(x) for x in self._B.conjugateData[self._r])
+    @property
+    def magnitude(self):
+        if self.type != VECTOR:
+            return None
+        return float(np.sqrt(np.sum(np.asarray(self.data, np.float64)**2)))
+    def _tensor(self):
+        if self.type != TENSOR_3D_FULL:
+            return None
+        s = np.asarray(self.data, np.float64)
+        return np.array([[s[0], s[3], s[4]],
+                         [s[3], s[1], s[5]],
+                         [s[4], s[5], s[2]]])
+    def _principals(self):
+        T = self._tensor()
+        return None if T is None else np.linalg.eigvalsh(T)
+    @property
+    def mises(self):
+        return None if self._B.mises is None else float(self._B.mises[self._r])
+    @property
+    def press(self):
+        T = self._tensor()
+        return None if T is None else float(-np.trace(T)/3.0)
+    @property
+    def tresca(self):
+        P = self._principals()
+        return None if P is None else float(P[2] - P[0])
+    @property
+    def inv3(self):
+        T = self._tensor()
+        if T is None:
+            return None
+        D = T - np.eye(3)*np.trace(T)/3.0
+        return float(np.cbrt(4.5*np.trace(D.dot(D).dot(D))))
+    @property
+    def maxPrincipal(self):
+        P = self._principals()
+        return None if P is None else float(P[2])
+    @property
+    def midPrincipal(self):
+        P = self._principals()
+        return None if P is None else float(P[1])
+    @property
+    def minPrincipal(self):
+        P = self._principals()
+        return None if P is None else float(P[0])
+    def _inPlane(self):
+        T = self._tensor()
+        if T is None:
+            return None
+        c = 0.5*(T[0,0] + T[1,1])
+        r = np.sqrt((0.5*(T[0,0] - T[1,1]))**2 + T[0,1]**2)
+        return c - r, c + r
+    @property
+    def maxInPlanePrincipal(self):
+        P = self._inPlane()
+        return None if P is None else float(P[1])
+    @property
+    def minInPlanePrincipal(self):
+        P = self._inPlane()
+        return None if P is None else float(P[0])
+    @property
+    def outOfPlanePrincipal(self):
+        T = self._tensor()
+        return None if T is None else float(T[2,2])
+#====================================================================
+class MockFieldOutput(object):
+    # FieldOutput: the values are stored as bulk blocks, FO.values builds
+    # the FieldValue objects on access (like Abaqus does)
+    #
+    def __init__(self, name, type, componentLabels, blocks, description=''):
+        self.name            = name
+        self.type            = type
+        self.componentLabels = tuple(componentLabels)
+        self.description     = description
+        self.bulkDataBlocks  = list(blocks)
+        self.locations       = [MockFieldLocation(p, sorted(set(B.sectionPoint for B in self.bulkDataBlocks
+                                                                if str(B.position) == p and B.sectionPoint is not None),
+                                                            key=lambda SP: SP.number))
+                                for p in sorted(set(str(B.position) for B in self.bulkDataBlocks))]
+        if type == TENSOR_3D_FULL:
+            self.validInvariants = (MISES, TRESCA, PRESS, INV3, MAX_PRINCIPAL, MID_PRINCIPAL, MIN_PRINCIPAL)
+        elif type == VECTOR:
+            self.validInvariants = (MAGNITUDE,)
+        else:
+            self.validInvariants = ()
+    @property
+    def values(self):
+        return [MockFieldValue(B, r) for B in self.bulkDataBlocks for r in range(len(B))]
+    def getSubset(self, region=None, position=None, sectionPoint=None):
+        # region       : an instance or a set
+        # position     : a symbolic constant (or its name)
+        # sectionPoint : a section point object
+        #
+        Blocks = []
+        for B in self.bulkDataBlocks:
+            if position is not None and str(B.position) != str(position):
+                continue
+            if sectionPoint is not None and B.sectionPoint != sectionPoint:
+                continue
+            if isinstance(region, MockSet):
+                if B.instance.name != region.instance.name:
+                    continue
+                if B.nodeLabels is not None and region.NLabel is not None:
+                    B = B.take(np.isin(B.nodeLabels, region.NLabel))
+                elif B.elementLabels is not None and region.ELabel is not None:
+                    B = B.take(np.isin(B.elementLabels, region.ELabel))
+                else:
+                    continue
+            elif region is not None and B.instance.name != region.name:
+                continue
+            Blocks.append(B)
+        return MockFieldOutput(self.name, self.type, self.componentLabels, Blocks, self.description)
+#====================================================================
+class MockRepository(object):
+    # a read-only repository whose items are made by a function when they are accessed
+    #
+    def __init__(self, Keys, Make):
+        self._keys = list(Keys)
+        self._make = Make
+    def keys(self):
+        return list(self._keys)
+    def __contains__(self, Key):
+        return Key in self._keys
+    def __iter__(self):
+        return iter(self._keys)
+    def __len__(self):
+        return len(self._keys)
+    def __getitem__(self, Key):
+        if Key not in self._keys:
+            raise KeyError(Key)
+        return self._make(Key)
+    def values(self):
+        return [self[k] for k in self._keys]
+    def items(self):
+        return [(k, self[k]) for k in self._keys]
+#====================================================================
+class MockFrame(object):
+    # OdbFrame: frameId, frameValue, fieldOutputs
+    #
+    # fieldOutputs can be a dictionary or a function returning it (then the field
+    # outputs are made each time they are accessed and are not kept in memory)
+    #
+    def __init__(self, frameId, frameValue, fieldOutputs):
+        self.frameId        = frameId
+        self.incrementNumber= frameId
+        self.frameValue     = frameValue
+        self.description    = 'Increment %d: Step Time = %g' % (frameId, frameValue)
+        self._fieldOutputs  = fieldOutputs
+    @property
+    def fieldOutputs(self):
+        if callable(self._fieldOutputs):
+            return self._fieldOutputs()
+        return self._fieldOutputs
+#====================================================================
+class MockHistoryOutput(object):
+    # HistoryOutput: name, data ((time, value), ...)
+    #
+    def __init__(self, name, data, description=''):
+        self.name        = name
+        self.data        = tuple((float(t), float(v)) for t, v in data)
+        self.description = description
+#====================================================================
+class MockHistoryRegion(object):
+    # HistoryRegion: name, historyOutputs
+    #
+    def __init__(self, name, historyOutputs):
+        self.name           = name
+        self.historyOutputs = dict((H.name, H) for H in historyOutputs)
+#====================================================================
+class MockStep(object):
+    # OdbStep: name, frames, historyRegions
+    #
+    def __init__(self, name, frames, timePeriod=1.0, totalTime=0.0, historyRegions=()):
+        self.name           = name
+        self.frames         = frames
+        self.timePeriod     = timePeriod
+        self.totalTime      = totalTime
+        self.historyRegions = dict((R.name, R) for R in historyRegions)
+#====================================================================
+class MockOdb(object):
+    # Odb: rootAssembly, steps
+    #
+    def __init__(self, name, instances, steps, path=''):
+        self.name         = name
+        self.path         = path if path else name
+        self.isReadOnly   = True
+        self.rootAssembly = MockRootAssembly(instances)
+        self.steps        = dict((S.name, S) for S in steps)
+        self.closed       = False
+        self.session      = None
+    def close(self):
+        self.closed = True
+        if self.session is not None:
+            self.session.odbs.pop(self.path, None)
+#====================================================================
+class MockSession(object):
+    # session: openOdb, odbs
+    #
+    # Factory : function returning the ODB object of a file name (default: CL_ODBM_MakeODB())
+    # Delay   : time (s) spent in each openOdb, to mimic the cost of opening an ODB
+    #
+    def __init__(self, Factory=None, Delay=0.0):
+        self.odbs    = {}
+        self.Factory = Factory
+        self.Delay   = Delay
+        self.NOpen   = 0
+    def openOdb(self, name, readOnly=True):
+        if name in self.odbs:
+            return self.odbs[name]                # like Abaqus, an opened ODB is returned again
+        time.sleep(self.Delay)
+        ODB = self.Factory(name) if self.Factory is not None else CL_ODBM_MakeODB()
+        ODB.path       = name
+        ODB.isReadOnly = readOnly
+        ODB.session    = self
+        self.odbs[name] = ODB
+        self.NOpen     += 1
+        return ODB
+#====================================================================
+def _MockMises(data):
+    # von Mises stress of the rows of a (n,6) array (S11,S22,S33,S12,S13,S23)
+    #
+    s = np.asarray(data, np.float64)
+    p = s[:,0:3].sum(axis=1)/3.0
+    d = s[:,0:3] - p[:,None]
+    J2 = 0.5*(d**2).sum(axis=1) + (s[:,3:6]**2).sum(axis=1)
+    return np.sqrt(3.0*J2).astype(data.dtype)
+#====================================================================
+def CL_ODBM_HexMesh(nx, ny, nz, Size=1.0):
+    # This function returns a structured mesh of 8-node hexahedra:
+    #       NLabel, NOD, ELabel, ELM (2D array, node labels of each element)
+    #
+    # nx, ny, nz : number of elements in each direction
+    # Size       : edge length of the elements
+    #
+    x = np.arange(nx+1)*Size
+    y = np.arange(ny+1)*Size
+    z = np.arange(nz+1)*Size
+    Z, Y, X = np.meshgrid(z, y, x, indexing='ij')
+    NOD    = np.column_stack([X.ravel(), Y.ravel(), Z.ravel()])
+    NLabel = np.arange(1, len(NOD)+1, dtype=np.int32)
+    k, j, i = np.meshgrid(np.arange(nz), np.arange(ny), np.arange(nx), indexing='ij')
+    n0 = (k*(ny+1) + j)*(nx+1) + i
+    n0 = n0.ravel()
+    dx, dy, dz = 1, nx+1, (nx+1)*(ny+1)
+    ELM = np.column_stack([n0, n0+dx, n0+dx+dy, n0+dy,
+                           n0+dz, n0+dz+dx, n0+dz+dx+dy, n0+dz+dy]) + 1
+    ELabel = np.arange(1, len(ELM)+1, dtype=np.int32)
+    return NLabel, NOD, ELabel, ELM.astype(np.int32)
+#====================================================================
+def CL_ODBM_SplitWedges(ELM, NSplit):
+    # This function splits the first NSplit hexahedra of ELM into two 6-node wedges each and returns:
+    #       HEX : (2D array) the other hexahedra
+    #       WED : (2D array) the wedges
+    #
+    H = ELM[:NSplit]
+    WED = np.concatenate([H[:,[0,1,3,4,5,7]], H[:,[1,2,3,5,6,7]]])
+    return ELM[NSplit:], WED
+#====================================================================
+def CL_ODBM_MakeODB(nx=4, ny=4, nz=4, NIP=1, NF=3, InsName='PART-1-1', StepName='Step-1', Seed=0):
+    # This function returns a mock ODB with one instance meshed with hexahedra
+    # and one step with NF frames containing U (nodal), S and PEEQ (integration points)
+    # and the history outputs ALLIE, ALLKE (assembly) and RF1 (node 1)
+    #
+    # nx, ny, nz : number of elements in each direction
+    # NIP        : number of integration points per element (1 -> C3D8R, otherwise C3D8)
+    # NF         : number of frames
+    # Seed       : seed of the random field data
+    #
+    # Example: ODB = CL_ODBM_MakeODB(nx=20, ny=20, nz=20, NF=5)
+    #
+    NLabel, NOD, ELabel, ELM = CL_ODBM_HexMesh(nx, ny, nz)
+    EType = 'C3D8R' if NIP == 1 else 'C3D8'
+    Mesh  = (InsName, NLabel, NOD, ELabel, [EType]*len(ELabel), [tuple(e) for e in ELM])
+    return _CL_ODBM_Build([Mesh], {EType: NIP}, NF, [StepName], Seed)
+#====================================================================
+def CL_ODBM_SyntheticODB(NE=1000, NIP=1, NF=3, NSteps=1, NInstances=1, Wedges=0.0, Seed=0):
+    # This function returns a mock ODB of a given size (for tests and benchmarks):
+    #       NInstances instances ('PART-1-1', 'PART-2-1', ...) meshed with about NE elements each
+    #       (the number of nodes is about NE too), NSteps steps ('Step-1', ...) of NF frames each
+    #       containing U (nodal), S and PEEQ (integration points)
+    #
+    # NE     : approximate number of elements per instance
+    # NIP    : number of integration points of the hexahedra (1 -> C3D8R, otherwise C3D8),
+    #          the wedges (C3D6) have 1 integration point if NIP is 1, otherwise 2
+    # NF     : number of frames per step
+    # Wedges : fraction of the hexahedra split into two wedges (gives one bulk block per element type)
+    # Seed   : seed of the random field data
+    #
+    # Example: ODB = CL_ODBM_SyntheticODB(NE=10**6, NIP=8, NF=10, Wedges=0.1)
+    #
+    n  = max(int(round(NE**(1.0/3.0))), 1)
+    nz = max(int(np.ceil(float(NE)/(n*n))), 1)
+    NLabel, NOD, _, ELM = CL_ODBM_HexMesh(n, n, nz)
+    HEX, WED = CL_ODBM_SplitWedges(ELM, int(Wedges*len(ELM)))
+    HType = 'C3D8R' if NIP == 1 else 'C3D8'
+    EType = [HType]*len(HEX) + ['C3D6']*len(WED)
+    Conn  = [tuple(e) for e in HEX] + [tuple(e) for e in WED]
+    ELabel = np.arange(1, len(Conn)+1, dtype=np.int32)
+    Meshes = [('PART-%d-1' % (k+1), NLabel, NOD, ELabel, EType, Conn) for k in range(NInstances)]
+    NIPs   = {HType: NIP, 'C3D6': 1 if NIP == 1 else 2}
+    return _CL_ODBM_Build(Meshes, NIPs, NF, ['Step-%d' % (k+1) for k in range(NSteps)], Seed)
+#====================================================================
+def _CL_ODBM_Build(Meshes, NIPs, NF, StepNames, Seed):
+    # builds the mock ODB: Meshes is a list of (InsName, NLabel, NOD, ELabel, EType, Connectivity),
+    # NIPs gives the number of integration points of each element type
+    #
+    rng       = np.random.RandomState(Seed)
+    Instances = []
+    Base      = []                           # (Ins, U0, [(EType, S0, E0, IPEL, IPNum), ...])
+    for InsName, NLabel, NOD, ELabel, EType, Conn in Meshes:
+        Ins    = MockInstance(InsName, NLabel, NOD, ELabel, EType, Conn)
+        U0     = rng.standard_normal((len(NLabel), 3)).astype(np.float32)
+        Codes  = np.array(EType)
+        Blocks = []
+        for T in sorted(set(EType), key=EType.index):
+            L     = Ins.ELabel[Codes == T]
+            NIP   = NIPs[T]
+            S0    = rng.standard_normal((len(L)*NIP, 6)).astype(np.float32)
+            E0    = rng.random_sample(len(L)*NIP).astype(np.float32)
+            IPNum = np.tile(np.arange(1, NIP+1, dtype=np.int32), len(L))
+            Blocks.append((T, S0, E0, np.repeat(L, NIP), IPNum))
+        Instances.append(Ins)
+        Base.append((Ins, U0, Blocks))
+    SL = ('S11','S22','S33','S12','S13','S23')
+    def FieldOutput(t, Name):
+        B = []
+        for Ins, U0, Blocks in Base:
+            if Name == 'U':
+                B.append(MockFieldBulkData(NODAL, VECTOR, Ins, ('U1','U2','U3'), t*U0, nodeLabels=Ins.NLabel))
+                continue
+            for T, S0, E0, IPEL, IPNum in Blocks:
+                if Name == 'S':
+                    B.append(MockFieldBulkData(INTEGRATION_POINT, TENSOR_3D_FULL, Ins, SL, t*S0,
+                                               elementLabels=IPEL, integrationPoints=IPNum, baseElementType=T))
+                else:
+                    B.append(MockFieldBulkData(INTEGRATION_POINT, SCALAR, Ins, (), (t*E0)[:,None],
+                                               elementLabels=IPEL, integrationPoints=IPNum, baseElementType=T))
+        if Name == 'U':
+            return MockFieldOutput('U', VECTOR, ('U1','U2','U3'), B, 'Spatial displacement')
+        if Name == 'S':
+            return MockFieldOutput('S', TENSOR_3D_FULL, SL, B, 'Stress components')
+        return MockFieldOutput('PEEQ', SCALAR, (), B, 'Equivalent plastic strain')
+    def FieldOutputs(t):
+        return MockRepository(['U', 'S', 'PEEQ'], lambda Name: FieldOutput(t, Name))
+    Steps = []
+    for k, StepName in enumerate(StepNames):
+        Frames = []
+        for i in range(NF):
+            t = float(i)/max(NF-1, 1)
+            Frames.append(MockFrame(i, t, (lambda t=k+t: FieldOutputs(t))))
+        t = np.linspace(0.0, 1.0, 2*NF+1)
+        H = [MockHistoryRegion('Assembly ASSEMBLY',
+                               [MockHistoryOutput('ALLIE', zip(t, (k+t)**2), 'Internal energy'),
+                                MockHistoryOutput('ALLKE', zip(t, np.sin(k+t)), 'Kinetic energy')]),
+             MockHistoryRegion('Node ' + Instances[0].name + '.1',
+                               [MockHistoryOutput('RF1', zip(t[::2], -(k+t[::2])), 'Reaction force')])]
+        Steps.append(MockStep(StepName, Frames, totalTime=float(k), historyRegions=H))
+    return MockOdb('Mock.odb', Instances, Steps)
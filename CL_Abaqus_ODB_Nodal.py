@@ -0,0 +1,272 @@
+# By: Javad KAZEM
+#
+import numpy as np
+from CL_Abaqus_ODB_Reader import *
+
+'''
+(1) This module converts integration point fields (S, PEEQ, ...) to nodal fields
+
+(2) The values of each element are extrapolated from its integration points to its nodes with
+    a matrix per element type (the polynomial through the integration points, as Abaqus/Viewer
+    does), then the element-nodal values of the elements sharing a node are averaged
+    (scatter-add with np.bincount). The averaging can be limited to the elements of the same
+    group (element type, section, ...) and skipped at the nodes where the values of the
+    elements differ too much (averaging threshold).
+
+Example:
+import sys
+sys.path.append('d://_CL_Python//')
+from CL_Abaqus_ODB_Nodal import *
+Mesh = CL_ODBN_Mesh(ODB, 'PART-SPECIMEN-1')
+SN, SEN, Averaged = CL_ODBN_Nodal(ODB, 'PART-SPECIMEN-1', 'Step-Rolling', -1, 'S', 'data', Mesh,
+                                  Groups='type', Threshold=0.75)
+# SN[i] is the stress at the node Mesh['NOD'][i] (label Mesh['NLabel'][i]) where Averaged[i] is True,
+# SEN[k] is the stress of the element at the node Mesh['ELMNodes'][k] (averaged per type and threshold)
+
+(3) The element types are recognised from their name and number of nodes (hexahedra, wedges,
+    tetrahedra, quadrilaterals and triangles, linear and quadratic). For the other elements the
+    mean of the integration points is given to all the nodes, unless a matrix is added to
+    CL_ODBN_Matrices. The values of shells are extracted for one section point (SectionPoint).
+
+'''
+#====================================================================
+# extrapolation matrices given by the user: {EType : (NPE,NIP) array}, used before the built-in ones
+CL_ODBN_Matrices = {}
+#====================================================================
+# natural coordinates of the nodes of each element family (Abaqus node numbering)
+_CL_ODBN_Nodes = {
+    'HEX'  : [(-1,-1,-1), ( 1,-1,-1), ( 1, 1,-1), (-1, 1,-1), (-1,-1, 1), ( 1,-1, 1), ( 1, 1, 1), (-1, 1, 1),
+              ( 0,-1,-1), ( 1, 0,-1), ( 0, 1,-1), (-1, 0,-1), ( 0,-1, 1), ( 1, 0, 1), ( 0, 1, 1), (-1, 0, 1),
+              (-1,-1, 0), ( 1,-1, 0), ( 1, 1, 0), (-1, 1, 0)],
+    'WEDGE': [(0, 0,-1), (1, 0,-1), (0, 1,-1), (0, 0, 1), (1, 0, 1), (0, 1, 1),
+              (.5, 0,-1), (.5,.5,-1), (0,.5,-1), (.5, 0, 1), (.5,.5, 1), (0,.5, 1),
+              (0, 0, 0), (1, 0, 0), (0, 1, 0)],
+    'TET'  : [(0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1),
+              (.5, 0, 0), (.5,.5, 0), (0,.5, 0), (0, 0,.5), (.5, 0,.5), (0,.5,.5)],
+    'QUAD' : [(-1,-1), ( 1,-1), ( 1, 1), (-1, 1), ( 0,-1), ( 1, 0), ( 0, 1), (-1, 0)],
+    'TRI'  : [(0, 0), (1, 0), (0, 1), (.5, 0), (.5,.5), (0,.5)]}
+# element families of the 3D elements by number of nodes (the other ones are 2D: quads and triangles)
+_CL_ODBN_Families3D = {8: 'HEX', 20: 'HEX', 6: 'WEDGE', 15: 'WEDGE', 4: 'TET', 10: 'TET'}
+_CL_ODBN_Families2D = {4: 'QUAD', 8: 'QUAD', 3: 'TRI', 6: 'TRI'}
+# prefixes of the names of the 3D elements
+_CL_ODBN_Prefix3D = ('C3D', 'DC3D', 'AC3D', 'SC6', 'SC8', 'COH3D', 'CCL')
+# matrices computed so far: {(EType, NPE, NIP) : array}
+_CL_ODBN_Cache = {}
+#====================================================================
+def CL_ODBN_Mesh(ODB, InsName):
+    # This function reads the mesh of an instance once for CL_ODBN_Nodal and returns a dictionary:
+    #       'NOD', 'NLabel'                                       : see CL_ODBR_NOD
+    #       'ELMOffset', 'ELMNodes', 'ELabel', 'ETypeCode', 'ETypeNames' : see CL_ODBR_ELMCSR
+    #       'MI'       : the mesh index (see CL_ODBR_MeshIndex)
+    #       'NodeRows' : (1D array) the row in NOD of each node of ELMNodes
+    #
+    NOD, NLabel = CL_ODBR_NOD(ODB, InsName)
+    ELMOffset, ELMNodes, ELabel, ETypeCode, ETypeNames = CL_ODBR_ELMCSR(ODB, InsName)
+    return CL_ODBN_MeshArrays(NOD, NLabel, ELMOffset, ELMNodes, ELabel, ETypeCode, ETypeNames)
+#====================================================================
+def CL_ODBN_MeshArrays(NOD, NLabel, ELMOffset, ELMNodes, ELabel, ETypeCode, ETypeNames):
+    # same as CL_ODBN_Mesh, from arrays already extracted (or loaded from a cache)
+    #
+    MI = CL_ODBR_MeshIndex(NLabel, ELabel)
+    return {'NOD': NOD, 'NLabel': NLabel, 'ELMOffset': ELMOffset, 'ELMNodes': ELMNodes,
+            'ELabel': ELabel, 'ETypeCode': ETypeCode, 'ETypeNames': list(ETypeNames),
+            'MI': MI, 'NodeRows': CL_ODBR_LabelRows(MI['Node'], ELMNodes)}
+#====================================================================
+def CL_ODBN_Nodal(ODB, InsName, StepName, Frame, FieldName, SubFieldName='data', Mesh=None,
+                  Groups=None, Threshold=None, SectionPoint=None):
+    # This function returns an integration point field at the nodes (see CL_ODBN_Average):
+    #       Nodal    : (array) Nodal[i] is the mean of all the elements at the node of row i of
+    #                  Mesh['NLabel'] (nan if none)
+    #       ENAvg    : (array) ENAvg[k] is the value of the element at the node Mesh['ELMNodes'][k],
+    #                  averaged with the elements of the same group only and not averaged where
+    #                  the threshold is exceeded
+    #       Averaged : (1D bool array) False at the nodes where the elements were not averaged
+    #                  together (group boundaries or threshold): there, use ENAvg and not Nodal
+    #
+    # ODB, InsName, StepName, Frame, FieldName : see CL_ODBR_FieldOutput
+    # SubFieldName : (string) 'data' or a scalar sub-field ('mises', ...)
+    # Mesh         : None or the result of CL_ODBN_Mesh (to read the mesh only once)
+    # Groups, Threshold : see CL_ODBN_Average
+    # SectionPoint : None, or the number of the section point to extract (shells, beams: the
+    #                field of several section points must be extracted one section point at a time)
+    #
+    if Mesh is None:
+        Mesh = CL_ODBN_Mesh(ODB, InsName)
+    F  = CL_ODBR_FieldOutputRegion(ODB, InsName, StepName, Frame, FieldName,
+                                   [SubFieldName, 'elementLabel', 'integrationPoint'],
+                                   Position='INTEGRATION_POINT', SectionPoint=SectionPoint)
+    EN = CL_ODBN_Extrapolate(Mesh, F['elementLabel'], F['integrationPoint'], F[SubFieldName])
+    return CL_ODBN_Average(Mesh, EN, Groups, Threshold)
+#====================================================================
+def CL_ODBN_Extrapolate(Mesh, ElementLabels, IntegrationPoints, Values):
+    # This function extrapolates integration point values to the nodes of their elements and
+    # returns EN, the element-nodal values: EN[k] is the value of the element at the node
+    # Mesh['ELMNodes'][k] (nan for the elements without values)
+    #
+    # Mesh              : see CL_ODBN_Mesh
+    # ElementLabels     : (1D array) element label of each value (F['elementLabel'])
+    # IntegrationPoints : (1D array) integration point of each value (F['integrationPoint'])
+    # Values            : (array) the values (F['data'], F['mises'], ...)
+    #
+    # A ValueError is raised if an integration point of an element has several values
+    # (several section points).
+    #
+    Rows = CL_ODBR_LabelRows(Mesh['MI']['Element'], ElementLabels)
+    IP   = np.asarray(IntegrationPoints, np.int64)
+    ok   = (Rows >= 0) & (IP >= 0)
+    Key  = Rows[ok]*(int(IP.max(initial=0)) + 1) + IP[ok]
+    if len(Key) and np.bincount(Key).max() > 1:
+        raise ValueError('Several values at the same integration point (several section points?), '
+                         'extract one section point at a time (SectionPoint)')
+    V  = CL_ODBR_IPToElements(Mesh['MI'], ElementLabels, IntegrationPoints, Values)
+    EN = np.full((len(Mesh['ELMNodes']),) + V.shape[2:], np.nan, V.dtype)
+    ELMOffset = Mesh['ELMOffset']
+    for c, EType in enumerate(Mesh['ETypeNames']):
+        Rows = np.flatnonzero(Mesh['ETypeCode'] == c)
+        if len(Rows) == 0:
+            continue
+        VT  = V[Rows]
+        Has = (~np.isnan(VT.reshape(VT.shape[0], VT.shape[1], -1)).all(axis=2)).any(axis=0)
+        if not Has.any():
+            continue
+        NIP = int(np.flatnonzero(Has)[-1]) + 1
+        NPE = int(ELMOffset[Rows[0]+1] - ELMOffset[Rows[0]])
+        E   = CL_ODBN_Matrix(EType, NPE, NIP).astype(V.dtype)
+        Cols = ELMOffset[Rows][:,None] + np.arange(NPE)[None,:]
+        EN[Cols] = np.einsum('pi,ei...->ep...', E, VT[:,:NIP])
+    return EN
+#====================================================================
+def CL_ODBN_Average(Mesh, EN, Groups=None, Threshold=None):
+    # This function averages element-nodal values at the nodes and returns:
+    #       Nodal    : (array) mean of all the element values at each node (nan if none),
+    #                  in the order of Mesh['NLabel']
+    #       ENAvg    : (array) the element-nodal values averaged with the elements of the same
+    #                  group only, and not averaged where the threshold is exceeded (like EN)
+    #       Averaged : (1D bool array) True at the nodes where all the element values were
+    #                  averaged together (one group and threshold not exceeded)
+    #
+    # Mesh      : see CL_ODBN_Mesh
+    # EN        : (array) element-nodal values (see CL_ODBN_Extrapolate), a missing component (nan)
+    #             is left out of the average of this component
+    # Groups    : None     -> all the elements are averaged together
+    #             'type'   -> the elements of different types are not averaged together
+    #             an array -> a group number per element (for example the section of each element)
+    # Threshold : None, or the averaging threshold (for example 0.75): the values at a node are not
+    #             averaged if (max - min)/(max - min of the whole field) is larger than Threshold
+    #             (for several components, the largest ratio of the components is used)
+    #
+    EN   = np.asarray(EN)
+    NN   = Mesh['MI']['Node']['Size']
+    NPE  = np.diff(Mesh['ELMOffset'])
+    W    = EN.reshape(len(EN), -1)
+    NC   = W.shape[1]
+    #------------------------ the averaging key of each element-nodal value: node and group
+    if Groups is None:
+        G, NG = np.zeros(len(EN), np.int64), 1
+    else:
+        Groups = Mesh['ETypeCode'] if isinstance(Groups, str) and Groups == 'type' else np.asarray(Groups)
+        Names, Code = np.unique(Groups, return_inverse=True)
+        G, NG = np.repeat(Code.reshape(-1).astype(np.int64), NPE), len(Names)
+    Base = np.flatnonzero(Mesh['NodeRows'] >= 0)
+    Key  = Mesh['NodeRows'][Base].astype(np.int64)*NG + G[Base]
+    Cnt  = np.empty((NN*NG, NC), np.int64)       # per component: the missing components (nan)
+    Sum  = np.empty((NN*NG, NC), np.float64)     # of a value are left out of its average
+    Ok   = []
+    for j in range(NC):
+        Ok.append(~np.isnan(W[Base,j]))
+        Cnt[:,j] = np.bincount(Key[Ok[j]], minlength=NN*NG)
+        Sum[:,j] = np.bincount(Key[Ok[j]], W[Base[Ok[j]],j], minlength=NN*NG)
+    #------------------------ averages per node (all groups) and per key
+    NCnt  = Cnt.reshape(NN, NG, NC).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        Nodal = Sum.reshape(NN, NG, NC).sum(axis=1)/NCnt
+        Mean  = Sum/Cnt
+    Split = (Cnt.max(axis=1).reshape(NN, NG) > 0).sum(axis=1) > 1
+    ENAvg = np.full(W.shape, np.nan, W.dtype)
+    ENAvg[Base] = Mean[Key]
+    ENAvg[np.isnan(W)] = np.nan
+    if Threshold is not None and len(Key):
+        Over = np.zeros(NN*NG, bool)
+        for j in range(NC):
+            if not Ok[j].any():
+                continue
+            Wj  = np.ascontiguousarray(W[Base[Ok[j]],j])
+            Max = np.full(NN*NG, -np.inf, W.dtype)  # same dtype as Wj: fast path of ufunc.at
+            Min = np.full(NN*NG,  np.inf, W.dtype)
+            np.maximum.at(Max, Key[Ok[j]], Wj)
+            np.minimum.at(Min, Key[Ok[j]], Wj)
+            Range = float(Wj.max() - Wj.min())
+            if Range > 0:
+                Over |= (Cnt[:,j] > 0) & ((Max - Min) > Threshold*Range)
+        Rows = Base[Over[Key]]
+        ENAvg[Rows] = W[Rows]
+        Split |= Over.reshape(NN, NG).any(axis=1)
+    NCnt = NCnt.max(axis=1)
+    Shape = EN.shape[1:]
+    Nodal = Nodal.astype(W.dtype).reshape((NN,) + Shape)
+    return Nodal, ENAvg.reshape((len(EN),) + Shape), (NCnt > 0) & ~Split
+#====================================================================
+def CL_ODBN_Matrix(EType, NPE, NIP):
+    # This function returns the extrapolation matrix E (NPE,NIP) of an element type:
+    # the values at the nodes of an element are E.dot(values at its integration points)
+    #
+    # EType : (string) the element type (for example 'C3D8', 'C3D10', 'CPE4R')
+    # NPE   : number of nodes of the element
+    # NIP   : number of integration points
+    #
+    if EType in CL_ODBN_Matrices:
+        return np.asarray(CL_ODBN_Matrices[EType], np.float64)
+    Key = (EType, NPE, NIP)
+    if Key not in _CL_ODBN_Cache:
+        Family = (_CL_ODBN_Families3D if EType.upper().startswith(_CL_ODBN_Prefix3D) else
+                  _CL_ODBN_Families2D).get(NPE)
+        Rule   = _CL_ODBN_Rule(Family, NIP) if Family is not None else None
+        if Rule is None:
+            E = np.full((NPE, NIP), 1.0/NIP)      # unknown element: mean of the integration points
+        else:
+            XI, Exp = Rule
+            XN = np.array(_CL_ODBN_Nodes[Family][:NPE], np.float64)
+            E  = _CL_ODBN_Basis(XN, Exp).dot(np.linalg.inv(_CL_ODBN_Basis(XI, Exp)))
+        _CL_ODBN_Cache[Key] = E
+    return _CL_ODBN_Cache[Key]
+#====================================================================
+def _CL_ODBN_Rule(Family, NIP):
+    # returns the natural coordinates of the integration points (Abaqus numbering) and
+    # the exponents of the polynomial through them, or None for an unknown rule
+    #
+    Gauss = {1: [0.0], 2: [-1/np.sqrt(3.0), 1/np.sqrt(3.0)], 3: [-np.sqrt(0.6), 0.0, np.sqrt(0.6)]}
+    Tri   = {1: ([(1/3.0, 1/3.0)], [(0,0)]),
+             3: ([(1/6.0, 1/6.0), (2/3.0, 1/6.0), (1/6.0, 2/3.0)], [(0,0), (1,0), (0,1)])}
+    if Family in ('HEX', 'QUAD'):
+        Dim = 3 if Family == 'HEX' else 2
+        n   = int(round(NIP**(1.0/Dim)))
+        if n not in Gauss or n**Dim != NIP:
+            return None
+        Index = [I[::-1] for I in np.ndindex(*([n]*Dim))]          # first direction fastest
+        return (np.array([[Gauss[n][i] for i in I] for I in Index]), np.array(Index))
+    if Family == 'TRI':
+        if NIP not in Tri:
+            return None
+        return np.array(Tri[NIP][0]), np.array(Tri[NIP][1])
+    if Family == 'TET':
+        a, b = 0.1381966011250105, 0.5854101966249685
+        if NIP == 1:
+            return np.array([(0.25, 0.25, 0.25)]), np.zeros((1, 3), int)
+        if NIP == 4:
+            return (np.array([(a,a,a), (b,a,a), (a,b,a), (a,a,b)]),
+                    np.array([(0,0,0), (1,0,0), (0,1,0), (0,0,1)]))
+        return None
+    if Family == 'WEDGE':
+        Split = {1: (1, 1), 2: (1, 2), 3: (3, 1), 6: (3, 2), 9: (3, 3)}
+        if NIP not in Split:
+            return None
+        nt, nz = Split[NIP]
+        XI  = [(g, h, z) for z in Gauss[nz] for g, h in Tri[nt][0]]    # triangle points fastest
+        Exp = [(i, j, k) for k in range(nz) for i, j in Tri[nt][1]]
+        return np.array(XI), np.array(Exp)
+    return None
+#====================================================================
+def _CL_ODBN_Basis(X, Exp):
+    # values of the monomials x^i y^j z^k (exponents Exp) at the points X
+    #
+    return np.prod(X[:,None,:]**Exp[None,:,:], axis=2)
@@ -2,6 +2,17 @@
 #
 import numpy as np 
 import os
+import time
+import hashlib
+import functools
+import inspect
+import numbers
+import contextlib
+from collections import OrderedDict
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None                            # Python 2.7 (Abaqus 2023 and older)
 
 '''
 (1) This module is developed for extracting the results from Abaqus ODB files
@@ -16,6 +27,9 @@ CL_ODBR_Say_Hello() # calling say hello function
 
 (3) Be careful. Every time this module is modified, Abaqus should be restarted.
 
+(4) The time, the number of values and the memory of the functions can be measured with
+    CL_ODBR_ProfileStart / CL_ODBR_ProfileStop (off by default).
+
 '''
 #====================================================================
 def CL_ODBR_Say_Hello():
@@ -33,9 +47,87 @@ def CL_ODBR_OpenODB(session, FName):
     #
     # Example: ODB = CL_ODBR_OpenODB(session, ODBFName)
     #
-    ODB = session.openOdb(name=FName)
+    with _CL_ODBR_Phase('openOdb'):
+        ODB = session.openOdb(name=FName)
     return ODB
 #====================================================================
+class CL_ODBR_ODBPool(object):
+    # This class keeps the opened ODB files: an ODB is opened once and the same object
+    # is returned when it is requested again. At most MaxOpen ODB files stay open,
+    # the least recently used one is closed when another one is opened.
+    #
+    # session  : abaqus session (or CL_Abaqus_ODB_Mock.MockSession outside Abaqus)
+    # MaxOpen  : maximum number of opened ODB files
+    # ReadOnly : open the ODB files read-only
+    #
+    # Pool.Times is a list of (FName, time spent in openOdb) and Pool.Report() returns
+    # the number of opens, reuses, closes and the total opening time.
+    #
+    # Example:
+    # with CL_ODBR_ODBPool(session, MaxOpen=2) as Pool:         # all ODB files are closed at the end
+    #     for FName in ODBFNames:
+    #         with Pool.Use(FName) as ODB:                        # not closed while it is used
+    #             U = CL_ODBR_FieldOutputBulk(ODB, InsName, StepName, -1, 'U', 'data')
+    #
+    def __init__(self, session, MaxOpen=4, ReadOnly=True):
+        self.session  = session
+        self.MaxOpen  = max(int(MaxOpen), 1)
+        self.ReadOnly = ReadOnly
+        self.ODBs     = OrderedDict()             # key : [ODB, number of users], oldest first
+        self.Times    = []
+        self.NHits    = 0
+        self.NCloses  = 0
+    def __enter__(self):
+        return self
+    def __exit__(self, *Args):
+        self.CloseAll()
+        return False
+    def Open(self, FName):
+        # returns the ODB object of the file (opened if needed)
+        Key = os.path.normcase(os.path.abspath(FName))
+        if Key in self.ODBs:
+            self.ODBs[Key] = self.ODBs.pop(Key)   # most recently used last
+            self.NHits += 1
+            return self.ODBs[Key][0]
+        for Old in [k for k, v in self.ODBs.items() if v[1] == 0]:
+            if len(self.ODBs) < self.MaxOpen:
+                break
+            self.Close(Old)
+        t0  = time.time()
+        with _CL_ODBR_Phase('openOdb'):
+            ODB = self.session.openOdb(name=FName, readOnly=self.ReadOnly)
+        self.Times.append((FName, time.time() - t0))
+        self.ODBs[Key] = [ODB, 0]
+        return ODB
+    @contextlib.contextmanager
+    def Use(self, FName):
+        # context manager giving the ODB object, which is not closed by the pool while it is used
+        ODB = self.Open(FName)
+        Key = os.path.normcase(os.path.abspath(FName))
+        self.ODBs[Key][1] += 1
+        try:
+            yield ODB
+        finally:
+            if Key in self.ODBs:
+                self.ODBs[Key][1] -= 1
+    def Close(self, FName):
+        # closes one ODB file
+        Key = os.path.normcase(os.path.abspath(FName))
+        if Key in self.ODBs:
+            self.ODBs.pop(Key)[0].close()
+            self.NCloses += 1
+    def CloseAll(self):
+        # closes all the ODB files of the pool
+        for Key in list(self.ODBs):
+            self.Close(Key)
+    def Report(self):
+        # returns a dictionary with the number of opens, reuses, closes and the opening time
+        return {'opened' : len(self.Times),
+                'reused' : self.NHits,
+                'closed' : self.NCloses,
+                'open'   : len(self.ODBs),
+                'time'   : sum(t for _, t in self.Times)}
+#====================================================================
 def CL_ODBR_InsNames(ODB):
     # this function returns a list of instances names
     # ODB : The ODB object
@@ -50,43 +142,206 @@ def CL_ODBR_StepNames(ODB):
     StepNames = ODB.steps.keys()
     return StepNames
 #====================================================================
-def CL_ODBR_FramesTime(ODB,StepName):
+def CL_ODBR_FramesTime(ODB,StepName,Start=0):
     # this function returns a 1D array contains the time corresponding to each frame
     # ODB      : The ODB object
     # StepName : (string), the name of the step
+    # Start    : the first frame (only the frames Start, Start+1, ... are read)
     #
     Frames = ODB.steps[StepName].frames
     NF     = len(Frames)
-    FTime  = np.zeros(NF)
-    for i,f in enumerate(Frames):
-        FTime[i] = f.frameValue
+    FTime  = np.zeros(max(NF-Start, 0))
+    for i in range(Start, NF):
+        FTime[i-Start] = Frames[i].frameValue
     return FTime
 #====================================================================
+def CL_ODBR_HistoryRegionNames(ODB,StepName):
+    # this function returns the names of the history regions of a step as a list of strings
+    # ODB      : The ODB object
+    # StepName : (string), the name of the step
+    #
+    # Example: CL_ODBR_HistoryRegionNames(ODB,'Step-1') -> ['Assembly ASSEMBLY', 'Node PART-1-1.5', ...]
+    #
+    return list(ODB.steps[StepName].historyRegions.keys())
+#====================================================================
+def CL_ODBR_HistoryOutputNames(ODB,StepName,RegionName):
+    # this function returns the names of the history outputs of a history region as a list of strings
+    # ODB        : The ODB object
+    # StepName   : (string), the name of the step
+    # RegionName : (string), the name of the history region
+    #
+    return list(ODB.steps[StepName].historyRegions[RegionName].historyOutputs.keys())
+#====================================================================
+def CL_ODBR_HistoryOutput(ODB,StepName,RegionName,OutputName):
+    # this function returns a 2D array (n,2) of (step time, value) of one history output
+    # ODB        : The ODB object
+    # StepName   : (string), the name of the step
+    # RegionName : (string), the name of the history region
+    # OutputName : (string), the name of the history output (for example 'ALLIE' or 'RF1')
+    #
+    Data = ODB.steps[StepName].historyRegions[RegionName].historyOutputs[OutputName].data
+    return np.array(Data, float).reshape(len(Data),2)
+#====================================================================
+def CL_ODBR_HistoryOutputs(ODB,Outputs,StepNames=None):
+    # This function returns several history outputs over several steps:
+    #       Time : (1D array) total time of each sample (step total time + step time)
+    #       H    : (2D array) H[i,j] is the value of Outputs[j] at Time[i]
+    #              (nan if Outputs[j] has no sample at Time[i])
+    #
+    # ODB       : The ODB object
+    # Outputs   : a list of (RegionName, OutputName)
+    # StepNames : a list of step names (default: all steps)
+    #
+    # The data of each output is converted to an array at once, and the outputs are
+    # placed on the common time axis with np.searchsorted (no loop over the samples).
+    #
+    # Example:
+    # Time, H = CL_ODBR_HistoryOutputs(ODB, [('Assembly ASSEMBLY','ALLIE'), ('Assembly ASSEMBLY','ALLKE')])
+    #
+    if StepNames is None:
+        StepNames = CL_ODBR_StepNames(ODB)
+    Parts = []                                    # (column, time, values)
+    for StepName in StepNames:
+        Step    = ODB.steps[StepName]
+        Regions = Step.historyRegions
+        for j, (RegionName, OutputName) in enumerate(Outputs):
+            if RegionName not in Regions.keys():
+                continue
+            HOs = Regions[RegionName].historyOutputs
+            if OutputName not in HOs.keys():
+                continue
+            A = np.array(HOs[OutputName].data, float).reshape(-1,2)
+            Parts.append((j, Step.totalTime + A[:,0], A[:,1]))
+    if not Parts:
+        return np.zeros(0), np.zeros((0, len(Outputs)))
+    Time = np.unique(np.concatenate([t for _, t, _ in Parts]))
+    H    = np.full((len(Time), len(Outputs)), np.nan)
+    for j, t, v in Parts:
+        H[np.searchsorted(Time, t), j] = v
+    return Time, H
+#====================================================================
+def CL_ODBR_FrameIterator(ODB, InsName, StepName, FieldName, SubFieldNames, Frames='All', Buffer=1, Bulk=True):
+    # This function is a generator, it yields (FrameIndex, FrameValue, F) frame by frame
+    # where F is the dictionary of the sub-fields of the field (see CL_ODBR_FieldOutputBulk).
+    # At most Buffer frames are read ahead and the Abaqus objects of a frame are released
+    # once its values are extracted, so the memory does not grow with the number of frames.
+    #
+    # ODB           : The ODB object
+    # InsName       : (string), the name of the instance
+    # StepName      : (string), the name of the step
+    # FieldName     : (string) the name of the field (for example: 'S' 'U' 'UT' 'PEEQ')
+    # SubFieldNames : ('All', a string or a list of strings) the name of the components
+    # Frames        : 'All', a frame number, a list of frame numbers or a slice
+    # Buffer        : number of frames read before they are yielded
+    # Bulk          : True -> arrays as in CL_ODBR_FieldOutputBulk, False -> lists as in CL_ODBR_FieldOutput
+    #
+    # Example:
+    # for i, t, F in CL_ODBR_FrameIterator(ODB, 'PART-1-1', 'Step-1', 'U', 'data'):
+    #     UMax[i] = np.abs(F['data']).max()
+    #
+    Ins        = ODB.rootAssembly.instances[InsName]
+    StepFrames = ODB.steps[StepName].frames
+    Index      = CL_ODBR_FrameIndices(len(StepFrames), Frames)
+    Buffer     = max(int(Buffer), 1)
+    for i0 in range(0, len(Index), Buffer):
+        Chunk = []
+        for i in Index[i0:i0+Buffer]:
+            Frame = StepFrames[i]
+            with _CL_ODBR_Phase('getSubset'):
+                FO = Frame.fieldOutputs[FieldName].getSubset(region=Ins)
+            if Bulk:
+                F = _CL_ODBR_BulkValues(FO, SubFieldNames)
+            else:
+                F = _CL_ODBR_FieldValues(FO, SubFieldNames)
+            Chunk.append((i, Frame.frameValue, F))
+            del Frame, FO, F
+        Chunk.reverse()
+        while Chunk:
+            yield Chunk.pop()
+#====================================================================
 def CL_ODBR_ELM(ODB,InsName):
     # This function returns:
     #       ELM    (2D array) connectivity matrix for each instance
+    #                         (padded with zeros up to the largest number of nodes per element)
     #       ELabel (1D array) element labels
     #       EType  (list) element types
     #
     # ODB      : The ODB object
     # InsName  : (string), the name of the instance
     #
-    Ins    = ODB.rootAssembly.instances[InsName]
-    NE     = len(Ins.elements)
-    ELM    = np.zeros((NE,30),np.int32)
-    ELabel = np.zeros(NE,np.int32)
-    EType  = [None]*NE
-    NPEmax = 0
-    for i,e in enumerate(Ins.elements):
-        n = e.connectivity
-        NPE = len(n)
-        NPEmax = max(NPE,NPEmax)
-        ELM[i,0:NPE] = n
-        ELabel[i] = e.label
-        EType[i] = e.type
-    ELM = ELM[:,0:NPEmax]
+    # see CL_ODBR_ELMCSR for a compact version of the connectivity and the element types
+    #
+    ELMOffset, ELMNodes, ELabel, ETypeCode, ETypeNames = CL_ODBR_ELMCSR(ODB,InsName)
+    ELM   = CL_ODBR_ELMPadded(ELMOffset, ELMNodes)
+    EType = [ETypeNames[c] for c in ETypeCode.tolist()]
     return ELM, ELabel, EType
 #====================================================================
+def CL_ODBR_ELMCSR(ODB,InsName):
+    # This function returns the connectivity in a compressed (CSR) form:
+    #       ELMOffset  (1D array) the nodes of element i are ELMNodes[ELMOffset[i]:ELMOffset[i+1]]
+    #       ELMNodes   (1D array) node labels of all elements
+    #       ELabel     (1D array) element labels
+    #       ETypeCode  (1D array) element type of each element as an index in ETypeNames
+    #       ETypeNames (list) element type names
+    #
+    # ODB      : The ODB object
+    # InsName  : (string), the name of the instance
+    #
+    # The elements are read in one pass and converted to arrays at the end
+    # (there is no limit on the number of nodes per element).
+    #
+    Elements = ODB.rootAssembly.instances[InsName].elements
+    NE       = len(Elements)
+    Labels   = [None]*NE
+    Codes    = [None]*NE
+    Conn     = [None]*NE
+    TypeCode = {}
+    _CL_ODBR_Count(NE)
+    for i,e in enumerate(Elements):
+        t = e.type
+        c = TypeCode.get(t)
+        if c is None:
+            c = TypeCode[t] = len(TypeCode)
+        Labels[i] = e.label
+        Codes[i]  = c
+        Conn[i]   = e.connectivity
+    ETypeNames = sorted(TypeCode, key=TypeCode.get)
+    ETypeCode  = np.array(Codes, np.uint8 if len(ETypeNames) < 256 else np.int32).reshape(NE)
+    ELabel     = np.array(Labels, np.int32).reshape(NE)
+    NPE        = np.fromiter((len(n) for n in Conn), np.int64, NE)
+    ELMOffset  = np.zeros(NE+1, np.int64)
+    np.cumsum(NPE, out=ELMOffset[1:])
+    ELMNodes   = np.fromiter((l for n in Conn for l in n), np.int32, int(ELMOffset[-1]))
+    return ELMOffset, ELMNodes, ELabel, ETypeCode, ETypeNames
+#====================================================================
+def CL_ODBR_ELMPadded(ELMOffset, ELMNodes):
+    # This function converts a CSR connectivity (see CL_ODBR_ELMCSR) to a 2D array
+    # padded with zeros up to the largest number of nodes per element
+    #
+    NPE = np.diff(ELMOffset)
+    NE  = len(NPE)
+    ELM = np.zeros((NE, int(NPE.max()) if NE else 0), np.int32)
+    Row = np.repeat(np.arange(NE), NPE)
+    Col = np.arange(len(ELMNodes)) - np.repeat(ELMOffset[:-1], NPE)
+    ELM[Row,Col] = ELMNodes
+    return ELM
+#====================================================================
+def CL_ODBR_ELMByType(ELMOffset, ELMNodes, ETypeCode, ETypeNames):
+    # This function splits a CSR connectivity (see CL_ODBR_ELMCSR) into one block per element type
+    # and returns a dictionary {EType : (Rows, ELM)}
+    #       Rows : (1D array) the rows of the elements of this type (in ELabel)
+    #       ELM  : (2D array) connectivity of these elements
+    #
+    B = {}
+    for c, Name in enumerate(ETypeNames):
+        Rows = np.flatnonzero(ETypeCode == c)
+        if len(Rows) == 0:
+            continue
+        NPE  = int(ELMOffset[Rows[0]+1] - ELMOffset[Rows[0]])
+        Cols = ELMOffset[Rows][:,None] + np.arange(NPE)[None,:]
+        B[Name] = (Rows, ELMNodes[Cols])
+    return B
+#====================================================================
 def CL_ODBR_NOD(ODB,InsName):
     # This function returns:
     #       NOD    : (2D array) Nodal coordinate table as a 2D array
@@ -95,15 +350,139 @@ def CL_ODBR_NOD(ODB,InsName):
     # ODB      : The ODB object
     # InsName  : (string), the name of the instance
     #
-    Ins    = ODB.rootAssembly.instances[InsName]
-    NN     = len(Ins.nodes)
-    NOD    = np.zeros((NN,3))
-    NLabel = np.zeros(NN,np.int32)
-    for i,n in enumerate(Ins.nodes):
-        NOD[i,:]  = n.coordinates
-        NLabel[i] = n.label
+    # The nodes are read in one pass and converted to arrays at the end.
+    #
+    Nodes  = ODB.rootAssembly.instances[InsName].nodes
+    NN     = len(Nodes)
+    Labels = [None]*NN
+    XYZ    = [None]*NN
+    _CL_ODBR_Count(NN)
+    for i,n in enumerate(Nodes):
+        Labels[i] = n.label
+        XYZ[i]    = n.coordinates
+    NOD    = np.array(XYZ, float).reshape(NN,3)
+    NLabel = np.array(Labels, np.int32).reshape(NN)
     return NOD, NLabel
 #====================================================================
+def CL_ODBR_MeshIndex(NLabel, ELabel):
+    # This function returns the mesh index of an instance, a dictionary:
+    #       'Node'    : label map of the nodes    (label -> row in NOD)
+    #       'Element' : label map of the elements (label -> row in ELM)
+    # A label map is a dense lookup array when the labels are compact, otherwise
+    # the sorted labels (looked up with np.searchsorted), see CL_ODBR_LabelMap.
+    #
+    # NLabel : (1D array) node labels (from CL_ODBR_NOD)
+    # ELabel : (1D array) element labels (from CL_ODBR_ELM or CL_ODBR_ELMCSR)
+    #
+    # Example:
+    # NOD, NLabel = CL_ODBR_NOD(ODB, InsName)
+    # ELM, ELabel, EType = CL_ODBR_ELM(ODB, InsName)
+    # MI = CL_ODBR_MeshIndex(NLabel, ELabel)
+    # U  = CL_ODBR_FieldOutputBulk(ODB, InsName, StepName, -1, 'U', ['data','nodeLabel'])
+    # UN = CL_ODBR_NodalToMesh(MI, U['nodeLabel'], U['data'])     # UN[i] is the displacement of NOD[i]
+    #
+    return {'Node': CL_ODBR_LabelMap(NLabel), 'Element': CL_ODBR_LabelMap(ELabel)}
+#====================================================================
+def CL_ODBR_LabelMap(Labels, MaxFill=4):
+    # This function returns a dictionary mapping labels to rows:
+    #       'Min'    : smallest label
+    #       'Dense'  : (1D array) Dense[label-Min] is the row of the label (-1 if unused), or None
+    #       'Sorted' : (1D array) sorted labels      (when Dense is None)
+    #       'Order'  : (1D array) rows of the sorted labels (when Dense is None)
+    #
+    # Labels  : (1D array) the labels, Labels[i] is the label of row i
+    # MaxFill : a dense lookup array is used if it is at most MaxFill times longer than Labels
+    #
+    Labels = np.asarray(Labels, np.int64)
+    M = {'Min': 0, 'Dense': None, 'Sorted': None, 'Order': None, 'Size': len(Labels)}
+    if len(Labels) == 0:
+        M['Dense'] = np.zeros(0, np.int32)
+        return M
+    M['Min'] = int(Labels.min())
+    Span = int(Labels.max()) - M['Min'] + 1
+    if Span <= MaxFill*len(Labels) + 1024:
+        M['Dense'] = np.full(Span, -1, np.int32)
+        M['Dense'][Labels - M['Min']] = np.arange(len(Labels), dtype=np.int32)
+    else:
+        M['Order']  = np.argsort(Labels, kind='stable').astype(np.int32)
+        M['Sorted'] = Labels[M['Order']]
+    return M
+#====================================================================
+def CL_ODBR_LabelRows(Map, Labels):
+    # This function returns the rows (1D int array) of the labels (-1 for unknown labels)
+    #
+    # Map    : a label map (see CL_ODBR_LabelMap), for example MI['Node']
+    # Labels : (1D array) the labels to look up
+    #
+    L    = np.asarray(Labels, np.int64)
+    Rows = np.full(L.shape, -1, np.int32)
+    if Map['Dense'] is not None:
+        i  = L - Map['Min']
+        ok = (i >= 0) & (i < len(Map['Dense']))
+        Rows[ok] = Map['Dense'][i[ok]]
+    else:
+        p  = np.minimum(np.searchsorted(Map['Sorted'], L), len(Map['Sorted']) - 1)
+        ok = Map['Sorted'][p] == L
+        Rows[ok] = Map['Order'][p[ok]]
+    return Rows
+#====================================================================
+def CL_ODBR_NodalToMesh(MI, NodeLabels, Values, Fill=np.nan):
+    # This function reorders nodal values to the order of the nodes of the instance
+    # and returns an array V with V[i] = value of the node NOD[i] (Fill if no value)
+    #
+    # MI         : the mesh index (see CL_ODBR_MeshIndex)
+    # NodeLabels : (1D array) node label of each value (F['nodeLabel'])
+    # Values     : (array) the values (F['data'], F['mises'], ...)
+    # Fill       : value of the nodes without value
+    #
+    Values = np.asarray(Values)
+    Rows   = CL_ODBR_LabelRows(MI['Node'], NodeLabels)
+    ok     = Rows >= 0
+    V      = np.full((MI['Node']['Size'],) + Values.shape[1:], Fill, np.result_type(Values.dtype, np.float32))
+    V[Rows[ok]] = Values[ok]
+    return V
+#====================================================================
+def CL_ODBR_IPToElements(MI, ElementLabels, IntegrationPoints, Values, Fill=np.nan, Reduce=None):
+    # This function scatters integration point values onto the elements of the instance
+    # and returns:
+    #       Reduce=None   : an array V with V[i,j] = value at the integration point j+1 of ELM[i]
+    #       Reduce='mean' : an array V with V[i] = mean of the values of ELM[i]
+    #       Reduce='max'  : an array V with V[i] = maximum of the values of ELM[i]
+    # (Fill where there is no value)
+    #
+    # MI                : the mesh index (see CL_ODBR_MeshIndex)
+    # ElementLabels     : (1D array) element label of each value (F['elementLabel'])
+    # IntegrationPoints : (1D array) integration point of each value (F['integrationPoint']),
+    #                     None for one value per element
+    # Values            : (array) the values (F['data'], F['mises'], ...)
+    #
+    Values = np.asarray(Values)
+    Rows   = CL_ODBR_LabelRows(MI['Element'], ElementLabels)
+    if IntegrationPoints is None:
+        IP = np.zeros(len(Rows), np.int64)
+    else:
+        IP = np.asarray(IntegrationPoints, np.int64) - 1
+    ok     = (Rows >= 0) & (IP >= 0)
+    NIP    = int(IP[ok].max()) + 1 if ok.any() else 1
+    dtype  = np.result_type(Values.dtype, np.float32)
+    V      = np.full((MI['Element']['Size'], NIP) + Values.shape[1:], np.nan, dtype)
+    V[Rows[ok], IP[ok]] = Values[ok]
+    if Reduce is None:
+        if not (isinstance(Fill, float) and np.isnan(Fill)):
+            V[np.isnan(V)] = Fill
+        return V
+    Valid = ~np.isnan(V)
+    Count = Valid.sum(axis=1)
+    if Reduce == 'mean':
+        R = np.where(Valid, V, 0).sum(axis=1)/np.maximum(Count, 1)
+    elif Reduce == 'max':
+        R = np.where(Valid, V, -np.inf).max(axis=1)
+    else:
+        raise ValueError('Unknown reduction: ' + str(Reduce))
+    R = R.astype(dtype)
+    R[Count == 0] = Fill
+    return R
+#====================================================================
 def CL_ODBR_FieldOutputNames(ODB,StepName,Frame):
     # This function returnes all field output names
     #
@@ -115,6 +494,32 @@ def CL_ODBR_FieldOutputNames(ODB,StepName,Frame):
     FNames = FO.keys()
     return FNames
 #====================================================================
+# the sub-fields extracted when SubFieldNames is 'All'
+CL_ODBR_AllSubFields = [
+                        'conjugateData'       ,
+                        'data'                ,
+                        'elementLabel'        ,
+                        'face'                ,
+                        'instance'            ,
+                        'integrationPoint'    ,
+                        'inv3'                ,
+                        'localCoordSystem'    ,
+                        'magnitude'           ,
+                        'maxInPlanePrincipal' ,
+                        'maxPrincipal'        ,
+                        'midPrincipal'        ,
+                        'minInPlanePrincipal' ,
+                        'minPrincipal'        ,
+                        'mises'               ,
+                        'nodeLabel'           ,
+                        'outOfPlanePrincipal' ,
+                        'position'            ,
+                        'precision'           ,
+                        'press'               ,
+                        'sectionPoint'        ,
+                        'tresca'              ,
+                        'type'                ]
+#====================================================================
 def CL_ODBR_FieldOutput(ODB, InsName, StepName, Frame, FieldName, SubFieldNames):
     # This function returns the field outputs as a dictionary
     #
@@ -125,37 +530,44 @@ def CL_ODBR_FieldOutput(ODB, InsName, StepName, Frame, FieldName, SubFieldNames)
     # FieldName     : (string) the name of the field (for example: 'S' 'U' 'UT' 'PEEQ')
     # SubFieldNames : ('ALL' or a list of strings) the name of the components (see below).
     #
-    Ins  = ODB.rootAssembly.instances[InsName]
+    FO = _CL_ODBR_Subset(ODB, InsName, StepName, Frame, FieldName)
+    return _CL_ODBR_FieldValues(FO, SubFieldNames)
+#====================================================================
+def _CL_ODBR_Subset(ODB, InsName, StepName, Frame, FieldName, Region=None, Position=None, SectionPoint=None):
+    # returns the field output object restricted to the instance (or to a region of
+    # the instance, see CL_ODBR_Region) and optionally to one position and one section point
+    #
+    Reg  = CL_ODBR_Region(ODB, InsName, Region)
     FO   = ODB.steps[StepName].frames[Frame].fieldOutputs[FieldName]
-    FO   = FO.getSubset(region=Ins)
-    Vals = FO.values
-    n    = len(Vals)
+    with _CL_ODBR_Phase('getSubset'):
+        FO = FO.getSubset(region=Reg)
+        if Position is not None:
+            FO = FO.getSubset(position=_CL_ODBR_Position(Position))
+        if SectionPoint is not None:
+            FO = FO.getSubset(sectionPoint=_CL_ODBR_SectionPoint(FO, SectionPoint))
+    return FO
+#====================================================================
+def _CL_ODBR_SectionPoint(FO, SectionPoint):
+    # returns the section point object of a field output (SectionPoint: its number or the object)
+    #
+    if not isinstance(SectionPoint, numbers.Integral):
+        return SectionPoint
+    for L in FO.locations:
+        for SP in L.sectionPoints:
+            if SP.number == SectionPoint:
+                return SP
+    raise ValueError('No section point %d in the field %s' % (SectionPoint, FO.name))
+#====================================================================
+def _CL_ODBR_FieldValues(FO, SubFieldNames):
+    # loops over FO.values and returns the requested sub-fields as a dictionary of lists
+    #
+    with _CL_ODBR_Phase('FO.values'):
+        Vals = FO.values
+        n    = len(Vals)
+    _CL_ODBR_Count(n)
     #------------------------
     if SubFieldNames == 'All':
-        SubFieldNames = [
-                         'conjugateData'       ,
-                         'data'                ,
-                         'elementLabel'        ,
-                         'face'                ,
-                         'instance'            ,
-                         'integrationPoint'    ,
-                         'inv3'                ,
-                         'localCoordSystem'    ,
-                         'magnitude'           ,
-                         'maxInPlanePrincipal' ,
-                         'maxPrincipal'        ,
-                         'midPrincipal'        ,
-                         'minInPlanePrincipal' ,
-                         'minPrincipal'        ,
-                         'mises'               ,
-                         'nodeLabel'           ,
-                         'outOfPlanePrincipal' ,
-                         'position'            ,
-                         'precision'           ,
-                         'press'               ,
-                         'sectionPoint'        ,
-                         'tresca'              ,
-                         'type '               ]
+        SubFieldNames = CL_ODBR_AllSubFields
     #------------------------
     F = {}
     #------------------------
@@ -187,7 +599,7 @@ def CL_ODBR_FieldOutput(ODB, InsName, StepName, Frame, FieldName, SubFieldNames)
     f_instance = False
     if 'instance' in SubFieldNames:
         f_instance = True
-    F['instance'] = [None]*n
+        F['instance'] = [None]*n
     #------------------------
     f_integrationPoint = False
     if 'integrationPoint' in SubFieldNames:
@@ -329,6 +741,618 @@ def CL_ODBR_FieldOutput(ODB, InsName, StepName, Frame, FieldName, SubFieldNames)
         if f_type:
             F['type'               ][i] = str(V.type)                    if V.type                is not None else None
     return F
+#====================================================================
+# sub-fields that are read from FO.bulkDataBlocks (FieldValue name : FieldBulkData name)
+CL_ODBR_BulkArrays = {
+                      'data'             : 'data'              ,
+                      'conjugateData'    : 'conjugateData'     ,
+                      'elementLabel'     : 'elementLabels'     ,
+                      'nodeLabel'        : 'nodeLabels'        ,
+                      'integrationPoint' : 'integrationPoints' ,
+                      'mises'            : 'mises'             }
+# sub-fields that are constant inside one bulk block
+CL_ODBR_BulkConstants = ['baseElementType', 'componentLabels', 'instance', 'position', 'precision', 'type']
+#====================================================================
+def CL_ODBR_FieldOutputBulk(ODB, InsName, StepName, Frame, FieldName, SubFieldNames):
+    # This function returns the field outputs as a dictionary of arrays
+    # It is the fast version of CL_ODBR_FieldOutput: the values are read from
+    # FO.bulkDataBlocks (one block per element type) into contiguous arrays
+    # instead of looping over FO.values.
+    #
+    # ODB           : The ODB object
+    # InsName       : (string), the name of the instance
+    # StepName      : (string), the name of the step
+    # Frame         : Frame number (-1 for the last frame)
+    # FieldName     : (string) the name of the field (for example: 'S' 'U' 'UT' 'PEEQ')
+    # SubFieldNames : ('All', a string or a list of strings) the name of the components.
+    #                 'data', 'conjugateData', 'elementLabel', 'nodeLabel', 'integrationPoint', 'mises'
+    #                 and 'baseElementType', 'componentLabels', 'instance', 'position', 'precision', 'type'
+    #                 are read from the bulk blocks, the other ones (invariants, ...) are read value by value.
+    #
+    # Returned arrays:
+    #       data, conjugateData : (n,NC) float arrays, (n,) for scalar fields; if the blocks have
+    #                             different components (for example solids and shells in one
+    #                             instance) the columns are all the components of the blocks
+    #                             (see CL_ODBR_ComponentColumns), nan where a value has no such component
+    #       componentLabels     : (n,) strings, the component labels of the block of each value ('S11,S22,S12')
+    #       labels, int. points : (n,) int32 arrays
+    #       invariants          : (n,) float arrays (nan where Abaqus returns None)
+    #       strings             : (n,) string arrays
+    #       a sub-field which is not available in any block is returned as None
+    #
+    # Example: S = CL_ODBR_FieldOutputBulk(ODB, 'PART-1-1', 'Step-1', -1, 'S', ['data','mises'])
+    #
+    FO = _CL_ODBR_Subset(ODB, InsName, StepName, Frame, FieldName)
+    return _CL_ODBR_BulkValues(FO, SubFieldNames)
+#====================================================================
+def _CL_ODBR_SubFieldList(SubFieldNames):
+    # returns SubFieldNames as a list
+    #
+    if SubFieldNames == 'All':
+        return list(CL_ODBR_AllSubFields)
+    if isinstance(SubFieldNames, str):
+        return [SubFieldNames]
+    return list(SubFieldNames)
+#====================================================================
+def _CL_ODBR_BulkValues(FO, SubFieldNames):
+    # reads the requested sub-fields of a field output object from its bulk blocks
+    #
+    SubFieldNames = _CL_ODBR_SubFieldList(SubFieldNames)
+    with _CL_ODBR_Phase('FO.bulkDataBlocks'):
+        Blocks = FO.bulkDataBlocks
+        NRow   = [len(B.data) for B in Blocks]
+    _CL_ODBR_Count(sum(NRow))
+    F      = {}
+    Rest   = []
+    for Name in SubFieldNames:
+        if Name in CL_ODBR_BulkArrays:
+            F[Name] = _CL_ODBR_BulkArray(Blocks, CL_ODBR_BulkArrays[Name], NRow)
+        elif Name in CL_ODBR_BulkConstants:
+            F[Name] = _CL_ODBR_BulkConstant(Blocks, Name, NRow)
+        else:
+            Rest.append(Name)
+    if Rest:
+        Vals = _CL_ODBR_FieldValues(FO, Rest)
+        for Name in Rest:
+            F[Name] = _CL_ODBR_Dense(Vals[Name]) if Name in Vals else None
+    return F
+#====================================================================
+def _CL_ODBR_BulkArray(Blocks, Attr, NRow):
+    # concatenates one attribute of all bulk blocks into a preallocated array
+    #
+    Parts = [getattr(B, Attr, None) for B in Blocks]
+    Parts = [None if P is None or len(P) == 0 else P for P in Parts]
+    First = [P for P in Parts if P is not None]
+    if not First:
+        return None
+    First = np.asarray(First[0])
+    Shape = (sum(NRow),) + First.shape[1:]
+    if Attr in ('data', 'conjugateData') and First.ndim == 2 and First.shape[1] == 1:
+        Shape = Shape[0:1]                       # scalar field
+    if Attr in ('data', 'conjugateData'):
+        Labels = [tuple(str(c) for c in getattr(B, 'componentLabels', ())) for B in Blocks]
+        Widths = set(np.asarray(P).shape[1:] for P in Parts if P is not None)
+        if len(set(Labels)) > 1 or len(Widths) > 1:
+            return _CL_ODBR_UnionArray(Parts, NRow, Labels)
+    Out = np.empty(Shape, First.dtype)
+    i0  = 0
+    for P, nr in zip(Parts, NRow):
+        if P is None:
+            Out[i0:i0+nr] = np.nan if Out.dtype.kind == 'f' else -1
+        else:
+            P = np.asarray(P)
+            if len(P) != nr:
+                if nr % len(P):
+                    raise ValueError('Bulk block with %d values and %d %s' % (nr, len(P), Attr))
+                P = np.repeat(P, nr//len(P), axis=0)   # one label per element
+            Out[i0:i0+nr] = P.reshape((nr,) + Shape[1:])
+        i0 += nr
+    return Out
+#====================================================================
+def _CL_ODBR_UnionArray(Parts, NRow, Labels):
+    # data of blocks with different components: (n, all the components) array, the components
+    # of each block in their columns (see CL_ODBR_ComponentColumns) and nan in the other ones
+    #
+    Union = CL_ODBR_ComponentColumns([','.join(L) for L, nr in zip(Labels, NRow) if nr])
+    Parts = [None if P is None else np.asarray(P).reshape((nr, -1)) for P, nr in zip(Parts, NRow)]
+    if any(P is not None and P.shape[1] != len(L) for P, L in zip(Parts, Labels)):
+        Union = list(range(max(P.shape[1] for P in Parts if P is not None)))   # no labels: by position
+        Labels = [list(range(P.shape[1])) if P is not None else [] for P in Parts]
+    dtype = np.result_type(np.float32, *[P.dtype for P in Parts if P is not None])
+    Out = np.full((sum(NRow), len(Union)), np.nan, dtype)
+    i0  = 0
+    for P, nr, L in zip(Parts, NRow, Labels):
+        if P is not None:
+            Out[i0:i0+nr, [Union.index(c) for c in L]] = P
+        i0 += nr
+    return Out
+#====================================================================
+def CL_ODBR_ComponentColumns(ComponentLabels):
+    # This function returns the component labels of the columns of 'data' (see CL_ODBR_FieldOutputBulk)
+    #
+    # ComponentLabels : the 'componentLabels' sub-field (the labels of each value, 'S11,S22,S12')
+    #
+    # Example: Cols = CL_ODBR_ComponentColumns(S['componentLabels']); S12 = S['data'][:,Cols.index('S12')]
+    #
+    Columns = []
+    for L in _CL_ODBR_Unique(ComponentLabels):
+        for c in (L.split(',') if L else []):
+            if c not in Columns:
+                Columns.append(c)
+    return Columns
+#====================================================================
+def _CL_ODBR_Unique(A):
+    # the distinct values of A in the order of their first occurrence
+    #
+    A = np.asarray(A)
+    if not len(A):
+        return []
+    _, First = np.unique(A, return_index=True)
+    return [A[i] for i in sorted(First)]
+#====================================================================
+def _CL_ODBR_BulkConstant(Blocks, Name, NRow):
+    # repeats a block-level attribute (position, type, ...) for each value of the block
+    #
+    Parts = []
+    for B, nr in zip(Blocks, NRow):
+        V = getattr(B, Name, None)
+        if Name == 'instance' and V is not None:
+            V = V.name
+        elif Name == 'componentLabels' and V is not None:
+            V = ','.join(str(c) for c in V)
+        Parts.append(np.repeat(np.array([str(V) if V is not None else '']), nr))
+    if not Parts:
+        return np.zeros(0, str)
+    return np.concatenate(Parts)
+#====================================================================
+def _CL_ODBR_Dense(L):
+    # converts a list of sub-field values to an array (None -> nan for numbers)
+    #
+    if not any(v is None for v in L):
+        return np.array(L)
+    if all(v is None or isinstance(v, (int, float)) for v in L):
+        return np.array([np.nan if v is None else v for v in L], float)
+    A = np.empty(len(L), object)
+    A[:] = L
+    return A
+#====================================================================
+# sub-fields stored as int32 columns and as categorical codes by CL_ODBR_Columns
+CL_ODBR_IntSubFields    = ['elementLabel', 'nodeLabel', 'integrationPoint', 'face', 'sectionPoint']
+CL_ODBR_StringSubFields = ['baseElementType', 'componentLabels', 'instance', 'position', 'precision', 'type']
+#====================================================================
+def CL_ODBR_FieldOutputColumns(ODB, InsName, StepName, Frame, FieldName, SubFieldNames, Struct=False):
+    # This function returns the field outputs as typed columns (see CL_ODBR_Columns):
+    #       Col  : {SubFieldName : array} or one structured array if Struct is True
+    #       Cat  : {SubFieldName : list of strings} the categories of the string sub-fields
+    #       Mask : {SubFieldName : bool array} True where Abaqus returned None
+    #
+    # ODB, InsName, StepName, Frame, FieldName, SubFieldNames : see CL_ODBR_FieldOutputBulk
+    # Struct : False -> a dictionary of arrays, True -> one structured array (one row per value)
+    #
+    # Example:
+    # Col, Cat, Mask = CL_ODBR_FieldOutputColumns(ODB, InsName, StepName, -1, 'S', ['data','mises','elementLabel'])
+    # Svm = Col['mises']                                          # float32 for a single precision ODB
+    #
+    FO = _CL_ODBR_Subset(ODB, InsName, StepName, Frame, FieldName)
+    Names = _CL_ODBR_SubFieldList(SubFieldNames)
+    F = _CL_ODBR_BulkValues(FO, Names + ([] if 'precision' in Names else ['precision']))
+    Precision = F['precision'] if 'precision' in Names else F.pop('precision')
+    return CL_ODBR_Columns(F, Precision, Struct)
+#====================================================================
+def CL_ODBR_Columns(F, Precision=None, Struct=False):
+    # This function converts the dictionary returned by CL_ODBR_FieldOutput (lists) or
+    # CL_ODBR_FieldOutputBulk (arrays) to typed columns and returns Col, Cat, Mask:
+    #       Col  : {SubFieldName : array}
+    #              numbers        -> float32 or float64 according to the precision of the values
+    #              labels, points -> int32 (-1 for None)
+    #              strings        -> int8 codes (-1 for None), Cat[SubFieldName][code] is the string
+    #              a sub-field which is None for all values is returned as None
+    #       Cat  : {SubFieldName : list of strings}
+    #       Mask : {SubFieldName : bool array} True where the value is None
+    #              (only for the sub-fields with missing values)
+    #       Struct is True -> Col is one structured array with a field per sub-field (the
+    #                         sub-fields which are None for all values are left out)
+    #
+    # F         : the dictionary of sub-field values
+    # Precision : None (from F['precision'] if available, else float64), a precision name
+    #             ('SINGLE_PRECISION', 'DOUBLE_PRECISION'), or the list/array of the precisions
+    #
+    if Precision is None:
+        Precision = F.get('precision')
+    Float = _CL_ODBR_FloatType(Precision)
+    Col   = {}
+    Cat   = {}
+    Mask  = {}
+    for Name, V in F.items():
+        if V is None:
+            Col[Name] = None
+            continue
+        if isinstance(V, np.ndarray) and V.dtype != object:
+            Missing = np.zeros(len(V), bool)
+            if V.dtype.kind == 'f':
+                Missing = np.isnan(V) if V.ndim == 1 else np.isnan(V).all(axis=tuple(range(1, V.ndim)))
+        else:
+            Missing = np.array([v is None for v in V], bool)
+        if len(V) and Missing.all():
+            Col[Name] = None
+            continue
+        if Name in CL_ODBR_StringSubFields:
+            Col[Name], Cat[Name] = _CL_ODBR_Categorical(V, Missing)
+        elif Name in CL_ODBR_IntSubFields:
+            Col[Name] = _CL_ODBR_Typed(V, Missing, np.int32, -1)
+        else:
+            Col[Name] = _CL_ODBR_Typed(V, Missing, Float, np.nan)
+        if Missing.any():
+            Mask[Name] = Missing
+    if Struct:
+        Names = [Name for Name in Col if Col[Name] is not None]
+        n     = len(Col[Names[0]]) if Names else 0
+        A = np.empty(n, [(Name, Col[Name].dtype, Col[Name].shape[1:]) for Name in Names])
+        for Name in Names:
+            A[Name] = Col[Name]
+        Col = A
+    return Col, Cat, Mask
+#====================================================================
+def _CL_ODBR_FloatType(Precision):
+    # float32 if all the values are single precision, float64 otherwise
+    #
+    if Precision is None:
+        return np.float64
+    if isinstance(Precision, str):
+        Precision = [Precision]
+    Names = set(str(p) for p in np.unique(np.asarray(Precision, str)))
+    return np.float32 if Names == set(['SINGLE_PRECISION']) else np.float64
+#====================================================================
+def _CL_ODBR_Typed(V, Missing, dtype, Fill):
+    # converts a list or an array of numbers (or of small arrays) to an array of dtype
+    # (the missing values are set to Fill)
+    #
+    if isinstance(V, np.ndarray) and V.dtype != object:
+        A = V.astype(dtype, copy=False)
+        if Missing.any() and dtype is np.int32:
+            A = A.copy()
+            A[Missing] = Fill
+        return A
+    Shape = np.shape(V[int(np.argmin(Missing))])
+    A = np.full((len(V),) + Shape, Fill, dtype)
+    if not Missing.any():
+        A[...] = np.array(list(V), dtype)
+    else:
+        Rows = np.flatnonzero(~Missing)
+        A[Rows] = np.array([V[i] for i in Rows], dtype)
+    return A
+#====================================================================
+def _CL_ODBR_Categorical(V, Missing):
+    # converts a list or an array of strings to int8 codes (-1 for None) and the list of categories
+    #
+    S = np.asarray(['' if m else str(v) for v, m in zip(V, Missing)] if Missing.any() else V, str)
+    Names, Codes = np.unique(S, return_inverse=True)
+    Names = [str(s) for s in Names]
+    if Missing.any():
+        if '' in Names and not (S[~Missing] == '').any():
+            k = Names.index('')
+            Names.pop(k)
+            Codes = np.where(Codes > k, Codes - 1, Codes)
+        Codes[Missing] = -1
+    dtype = np.int8 if len(Names) < 2**7 else np.int32
+    return Codes.reshape(-1).astype(dtype), Names
+#====================================================================
+def CL_ODBR_ExtractPlan(ODB, Plan, Bulk=True):
+    # This function extracts several fields from several frames in one pass and
+    # returns a dictionary: {(InsName, StepName, FrameIndex, FieldName) : {SubFieldName : values}}
+    # Each instance, step and frame is looked up once, each frame is visited once and
+    # the subset of a field is made once even if it is requested by several entries.
+    #
+    # ODB  : The ODB object
+    # Plan : a list of (InsName, StepName, Frames, FieldName, SubFieldNames)
+    #        Frames : frame number (-1 for the last frame), a list of frame numbers,
+    #                 a slice (for example slice(0,None,10) for every 10th frame) or 'All'
+    # Bulk : True  -> the values are read as in CL_ODBR_FieldOutputBulk (arrays)
+    #        False -> the values are read as in CL_ODBR_FieldOutput (lists)
+    #
+    # FrameIndex in the keys is always the positive frame number.
+    #
+    # Example:
+    # Plan = [('PART-SPECIMEN-1', 'Step-Rolling', -1   , 'U'   , 'data' ),
+    #         ('PART-SPECIMEN-1', 'Step-Rolling', -1   , 'S'   , 'mises'),
+    #         ('PART-SPECIMEN-1', 'Step-Rolling', 'All', 'PEEQ', 'data' )]
+    # R = CL_ODBR_ExtractPlan(ODB, Plan)
+    # U = R[('PART-SPECIMEN-1', 'Step-Rolling', NF-1, 'U')]['data']
+    #
+    #------------------------ group the requests by frame
+    Instances = {}
+    Steps     = {}
+    Work      = {}           # (StepName, FrameIndex) : {(InsName, FieldName) : [SubFieldNames]}
+    for InsName, StepName, Frames, FieldName, SubFieldNames in Plan:
+        if InsName not in Instances:
+            Instances[InsName] = ODB.rootAssembly.instances[InsName]
+        if StepName not in Steps:
+            Steps[StepName] = ODB.steps[StepName].frames
+        for Frame in CL_ODBR_FrameIndices(len(Steps[StepName]), Frames):
+            Fields = Work.setdefault((StepName, Frame), {})
+            Names  = Fields.setdefault((InsName, FieldName), [])
+            for Name in _CL_ODBR_SubFieldList(SubFieldNames):
+                if Name not in Names:
+                    Names.append(Name)
+    #------------------------ extract frame by frame
+    R = {}
+    for (StepName, Frame), Fields in Work.items():
+        FOs = Steps[StepName][Frame].fieldOutputs
+        for (InsName, FieldName), Names in Fields.items():
+            with _CL_ODBR_Phase('getSubset'):
+                FO = FOs[FieldName].getSubset(region=Instances[InsName])
+            if Bulk:
+                R[(InsName, StepName, Frame, FieldName)] = _CL_ODBR_BulkValues(FO, Names)
+            else:
+                R[(InsName, StepName, Frame, FieldName)] = _CL_ODBR_FieldValues(FO, Names)
+    return R
+#====================================================================
+def CL_ODBR_FrameIndices(NF, Frames):
+    # This function returns the list of the (positive) frame numbers of a frame selection
+    #
+    # NF     : (int) number of frames of the step
+    # Frames : 'All', a frame number (negative from the end), a list of frame numbers or a slice
+    #          (IndexError if a frame number is not in the step)
+    #
+    Index = range(NF)
+    if isinstance(Frames, type(u'')) or isinstance(Frames, str):
+        if Frames != 'All':
+            raise ValueError('Unknown frame selection: ' + Frames)
+        return list(Index)
+    if isinstance(Frames, slice):
+        return list(Index[Frames])
+    if not isinstance(Frames, numbers.Integral):
+        return [Index[int(f)] for f in Frames]
+    return [Index[int(Frames)]]
+#====================================================================
+def CL_ODBR_FieldOutputRegion(ODB, InsName, StepName, Frame, FieldName, SubFieldNames,
+                              Region=None, Position=None, Bulk=True, SectionPoint=None):
+    # This function returns the field outputs of a region of an instance as a dictionary.
+    # The subset is made by Abaqus (getSubset) before any value is read, so the cost
+    # depends on the size of the region and not on the size of the instance.
+    #
+    # ODB, InsName, StepName, Frame, FieldName, SubFieldNames : see CL_ODBR_FieldOutput
+    # Region   : None (whole instance) or a region, see CL_ODBR_Region
+    # Position : None (all positions) or 'NODAL', 'INTEGRATION_POINT', 'CENTROID', 'ELEMENT_NODAL', ...
+    # Bulk     : True -> arrays as in CL_ODBR_FieldOutputBulk, False -> lists as in CL_ODBR_FieldOutput
+    # SectionPoint : None (all section points) or the number (or the object) of one section point
+    #                (shells, beams)
+    #
+    # Example:
+    # U = CL_ODBR_FieldOutputRegion(ODB, 'PART-SPECIMEN-1', 'Step-Rolling', -1, 'U', ['data','nodeLabel'],
+    #                               Region='CONTACT-NODES')
+    # S = CL_ODBR_FieldOutputRegion(ODB, 'PART-SPECIMEN-1', 'Step-Rolling', -1, 'S', ['mises'],
+    #                               Region=('ELEMENTS', [101, 102, 103]), Position='CENTROID')
+    #
+    FO = _CL_ODBR_Subset(ODB, InsName, StepName, Frame, FieldName, Region, Position, SectionPoint)
+    if Bulk:
+        return _CL_ODBR_BulkValues(FO, SubFieldNames)
+    return _CL_ODBR_FieldValues(FO, SubFieldNames)
+#====================================================================
+def CL_ODBR_Region(ODB, InsName, Region=None):
+    # This function returns the ODB object of a region of an instance
+    #
+    # ODB     : The ODB object
+    # InsName : (string), the name of the instance
+    # Region  : None              -> the instance
+    #           'NAME'            -> the node set, element set or surface NAME of the instance
+    #           ('NSET'   , NAME) -> the node set NAME
+    #           ('ELSET'  , NAME) -> the element set NAME
+    #           ('SURFACE', NAME) -> the surface NAME
+    #           ('NODES'   , Labels) -> the nodes with these labels
+    #           ('ELEMENTS', Labels) -> the elements with these labels
+    #
+    # For ('NODES', Labels) and ('ELEMENTS', Labels) a set is created in the instance
+    # (its name is made from the labels, so the same labels give the same set).
+    #
+    Ins = ODB.rootAssembly.instances[InsName]
+    if Region is None:
+        return Ins
+    if isinstance(Region, str):
+        for Repo in (Ins.nodeSets, Ins.elementSets, Ins.surfaces):
+            if Region in Repo.keys():
+                return Repo[Region]
+        raise KeyError('No node set, element set or surface ' + Region + ' in ' + InsName)
+    Kind, Value = Region
+    Kind = Kind.upper()
+    if Kind == 'NSET':
+        return Ins.nodeSets[Value]
+    if Kind == 'ELSET':
+        return Ins.elementSets[Value]
+    if Kind == 'SURFACE':
+        return Ins.surfaces[Value]
+    if Kind not in ('NODES', 'ELEMENTS'):
+        raise ValueError('Unknown region type: ' + Kind)
+    Labels = tuple(int(l) for l in np.unique(np.asarray(Value, np.int64)))
+    Name   = 'CL_ODBR_%s_%s' % (Kind, hashlib.sha1(str(Labels).encode('utf-8')).hexdigest()[:12].upper())
+    Repo   = Ins.nodeSets if Kind == 'NODES' else Ins.elementSets
+    if Name in Repo.keys():
+        return Repo[Name]
+    if Kind == 'NODES':
+        return Ins.NodeSetFromNodeLabels(name=Name, nodeLabels=Labels)
+    return Ins.ElementSetFromElementLabels(name=Name, elementLabels=Labels)
+#====================================================================
+def _CL_ODBR_Position(Position):
+    # converts a position name to the Abaqus symbolic constant (the name is kept outside Abaqus)
+    #
+    if not isinstance(Position, str):
+        return Position
+    try:
+        import abaqusConstants
+        return getattr(abaqusConstants, Position.upper())
+    except ImportError:
+        return Position.upper()
+#====================================================================
+# timer of the profiling (time.perf_counter does not exist in Python 2.7)
+_CL_ODBR_Clock = getattr(time, 'perf_counter', time.time)
+# the active profiling report (None when the profiling is off)
+_CL_ODBR_Prof = None
+#====================================================================
+def CL_ODBR_ProfileStart(Name='', Memory=False):
+    # This function starts the profiling of the CL_ODBR_* functions. Until CL_ODBR_ProfileStop
+    # is called, the wall time, the number of values processed, the bytes of the returned arrays
+    # and (if Memory is True) the peak memory of each function and of each phase
+    # (openOdb, getSubset, FO.values, FO.bulkDataBlocks, ...) are added up.
+    #
+    # Name   : (string) the name of the report (for example the ODB file name)
+    # Memory : True -> the peak memory is measured with tracemalloc (slower)
+    #
+    # When the profiling is off, the cost is one test per function call.
+    #
+    # Example:
+    # CL_ODBR_ProfileStart(ODBFName)
+    # ODB = CL_ODBR_OpenODB(session, ODBFName)
+    # U   = CL_ODBR_FieldOutput(ODB, InsName, StepName, -1, 'U', 'data')
+    # with CL_ODBR_Phase('savez'):
+    #     np.savez_compressed('U.npz', U['data'])
+    # CL_ODBR_ProfileWrite(CL_ODBR_ProfileStop(), 'profile.csv')
+    #
+    global _CL_ODBR_Prof
+    Memory = bool(Memory) and tracemalloc is not None and hasattr(tracemalloc, 'reset_peak')
+    Started = False
+    if Memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        Started = True
+    _CL_ODBR_Prof = {'name': Name, 'memory': Memory, 'started': Started,
+                     'start': time.time(), 'stats': {}, 'stack': []}
+#====================================================================
+def CL_ODBR_ProfileStop():
+    # This function stops the profiling and returns the report as a dictionary:
+    #       'name', 'start', 'wall' (s)
+    #       'stats' : a list of {'kind', 'name', 'calls', 'time', 'values', 'bytes', 'peak'}
+    #                 kind is 'function' or 'phase', time is the total wall time (s) including
+    #                 the nested calls, peak is the largest peak memory of one call (bytes)
+    #
+    global _CL_ODBR_Prof
+    P = _CL_ODBR_Prof
+    _CL_ODBR_Prof = None
+    if P is None:
+        return None
+    if P['started']:
+        tracemalloc.stop()
+    Stats = sorted(P['stats'].values(), key=lambda S: -S['time'])
+    return {'name': P['name'], 'start': P['start'], 'wall': time.time() - P['start'], 'stats': Stats}
+#====================================================================
+def CL_ODBR_ProfileWrite(Report, FName):
+    # This function writes a report of CL_ODBR_ProfileStop to a file
+    #       *.json : the report as it is
+    #       *.csv  : one line per function/phase, appended to the file if it exists
+    #                (so the reports of many ODB files can be collected in one table)
+    #
+    import json
+    if FName.lower().endswith('.json'):
+        with open(FName, 'w') as f:
+            json.dump(Report, f, indent=1)
+        return
+    Columns = ['kind', 'name', 'calls', 'time', 'values', 'bytes', 'peak']
+    New     = not os.path.isfile(FName) or os.path.getsize(FName) == 0
+    with open(FName, 'a') as f:
+        if New:
+            f.write(','.join(['report'] + Columns) + '\n')
+        for S in Report['stats']:
+            f.write(','.join(['"%s"' % Report['name']] + [str(S[c]) for c in Columns]) + '\n')
+#====================================================================
+def CL_ODBR_Phase(Name):
+    # This function returns a context manager which adds the time spent in a block to the
+    # profiling report (for example around np.savez_compressed), it does nothing if the
+    # profiling is off
+    #
+    return _CL_ODBR_Phase(Name)
+#====================================================================
+class _CL_ODBR_Phase(object):
+    # context manager measuring one phase (or one function call) for the profiling report
+    #
+    __slots__ = ('Name', 'Kind', 'Values', 'Bytes', 'P', 't0', 'Mem0', 'Peak')
+    def __init__(self, Name, Kind='phase'):
+        self.Name   = Name
+        self.Kind   = Kind
+        self.Values = 0
+        self.Bytes  = 0
+        self.P      = None
+    def __enter__(self):
+        P = _CL_ODBR_Prof
+        if P is None:
+            return self
+        self.P = P
+        if P['memory']:
+            Cur, Peak = tracemalloc.get_traced_memory()
+            if P['stack']:
+                P['stack'][-1].Peak = max(P['stack'][-1].Peak, Peak)
+            tracemalloc.reset_peak()
+            self.Mem0 = Cur
+            self.Peak = Cur
+        P['stack'].append(self)
+        self.t0 = _CL_ODBR_Clock()
+        return self
+    def __exit__(self, *Args):
+        P = self.P
+        if P is None:
+            return False
+        dt = _CL_ODBR_Clock() - self.t0
+        if P['stack'] and P['stack'][-1] is self:
+            P['stack'].pop()
+        Peak = 0
+        if P['memory']:
+            self.Peak = max(self.Peak, tracemalloc.get_traced_memory()[1])
+            Peak = self.Peak - self.Mem0
+            if P['stack']:
+                P['stack'][-1].Peak = max(P['stack'][-1].Peak, self.Peak)
+        Key = self.Kind + ':' + self.Name
+        S = P['stats'].get(Key)
+        if S is None:
+            S = P['stats'][Key] = {'kind': self.Kind, 'name': self.Name, 'calls': 0,
+                                   'time': 0.0, 'values': 0, 'bytes': 0, 'peak': 0}
+        S['calls']  += 1
+        S['time']   += dt
+        S['values'] += self.Values
+        S['bytes']  += self.Bytes
+        S['peak']    = max(S['peak'], Peak)
+        return False
+#====================================================================
+def _CL_ODBR_Count(n):
+    # adds n processed values to the running functions and phases
+    #
+    P = _CL_ODBR_Prof
+    if P is not None:
+        for Ph in P['stack']:
+            Ph.Values += n
+#====================================================================
+def _CL_ODBR_Bytes(R):
+    # bytes of the arrays in a returned object
+    #
+    if isinstance(R, np.ndarray):
+        return R.nbytes
+    if isinstance(R, dict):
+        return sum(_CL_ODBR_Bytes(v) for v in R.values())
+    if isinstance(R, tuple):
+        return sum(_CL_ODBR_Bytes(v) for v in R)
+    if isinstance(R, list):
+        return 8*len(R) + sum(v.nbytes for v in R if isinstance(v, np.ndarray))
+    return 0
+#====================================================================
+def _CL_ODBR_Profiled(Function, Kind='function', Name=None):
+    # returns the function measured in the profiling report
+    #
+    Name = Function.__name__ if Name is None else Name
+    @functools.wraps(Function)
+    def Profiled(*Args, **KWArgs):
+        if _CL_ODBR_Prof is None:
+            return Function(*Args, **KWArgs)
+        with _CL_ODBR_Phase(Name, Kind) as Ph:
+            R = Function(*Args, **KWArgs)
+            Ph.Bytes = _CL_ODBR_Bytes(R)
+        return R
+    return Profiled
+#====================================================================
+# profiling of all CL_ODBR_* functions (keep this block at the end of the module)
+_CL_ODBR_NoProfile = ['CL_ODBR_Say_Hello', 'CL_ODBR_ProfileStart', 'CL_ODBR_ProfileStop',
+                      'CL_ODBR_ProfileWrite', 'CL_ODBR_Phase']
+for _Name, _Function in list(globals().items()):
+    if (_Name.startswith('CL_ODBR_') and inspect.isfunction(_Function) and
+            not inspect.isgeneratorfunction(_Function) and _Name not in _CL_ODBR_NoProfile):
+        globals()[_Name] = _CL_ODBR_Profiled(_Function)
+_CL_ODBR_FieldValues = _CL_ODBR_Profiled(_CL_ODBR_FieldValues, 'phase', 'FieldValue loop')
+_CL_ODBR_BulkValues  = _CL_ODBR_Profiled(_CL_ODBR_BulkValues , 'phase', 'bulk copy')
 
 
 
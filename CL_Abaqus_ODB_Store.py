@@ -0,0 +1,317 @@
+# By: Javad KAZEM
+#
+import numpy as np
+import os
+import re
+import json
+import hashlib
+from CL_Abaqus_ODB_Reader import CL_ODBR_ExtractPlan, CL_ODBR_FramesTime, CL_ODBR_FrameIndices
+
+'''
+(1) This module saves the extracted arrays of many ODB files in one store directory
+
+(2) The arrays of the same (instance, step, field, component) are appended to the same
+    binary file (a new chunk file is started when a file is larger than ChunkSize) and
+    an index file (index.jsonl) gives the position of each array:
+    (odb index, instance, step, frame, field, component) -> file, offset, dtype, shape
+    The data is not compressed, so any array (or a part of it) is read with np.memmap
+    without loading the rest of the store, and the arrays of the same field of all ODB
+    files are next to each other in the file (stacking them is one contiguous read).
+
+Example:
+import sys
+sys.path.append('d://_CL_Python//')
+from CL_Abaqus_ODB_Store import *
+R = CL_ODBR_ExtractPlan(ODB, Plan)                       # or CL_ODBB_Load(...)
+CL_ODBS_Write('D://DOE-Results//Store', Index, R)        # for each ODB file
+U = CL_ODBS_Read('D://DOE-Results//Store', 0, 'PART-SPECIMEN-1', 'Step-Rolling', 20, 'U', 'data')
+Keys, U = CL_ODBS_Stack('D://DOE-Results//Store', 'PART-SPECIMEN-1', 'Step-Rolling', 'U', 'data')
+
+(3) The frames of the ODB of a running job can be extracted as they are written: each call of
+    CL_ODBS_Update extracts only the frames added since the previous call (a checkpoint file
+    per ODB keeps the plan and the number of extracted frames of each step).
+
+Example (in a loop while the job runs):
+New = CL_ODBS_Update(session, ODBFName, 'D://Monitor//Store', 0,
+                     [('PART-SPECIMEN-1', 'Step-Rolling', 'All', 'S', 'mises')])
+
+'''
+#====================================================================
+# default maximum size of a chunk file (bytes)
+CL_ODBS_ChunkSize = 2**30
+#====================================================================
+def CL_ODBS_Write(StoreDir, OdbIndex, R, ChunkSize=None):
+    # This function appends the arrays of one ODB to the store
+    #
+    # StoreDir  : the store directory (created if needed)
+    # OdbIndex  : (int) the index of the ODB file
+    # R         : {(InsName, StepName, Frame, FieldName) : {SubFieldName : array}}
+    #             as returned by CL_ODBR_ExtractPlan or CL_ODBB_Load (None values are skipped)
+    # ChunkSize : maximum size of a chunk file in bytes (default: CL_ODBS_ChunkSize)
+    #
+    # Example: CL_ODBB_Run(..., Writer=lambda i, R: CL_ODBS_Write(StoreDir, i, R))
+    #
+    for (InsName, StepName, Frame, FieldName), F in R.items():
+        for Name, V in F.items():
+            if V is not None:
+                CL_ODBS_Append(StoreDir, OdbIndex, InsName, StepName, Frame, FieldName, Name, V, ChunkSize)
+#====================================================================
+def CL_ODBS_Append(StoreDir, OdbIndex, InsName, StepName, Frame, FieldName, Name, A, ChunkSize=None):
+    # This function appends one array to the store
+    #
+    # StoreDir : the store directory
+    # OdbIndex : (int) the index of the ODB file
+    # InsName, StepName, Frame, FieldName : where the array comes from
+    # Name     : (string) the name of the component (for example 'data' or 'mises')
+    # A        : the array (numbers or strings)
+    #
+    A = np.ascontiguousarray(A)
+    if A.dtype.hasobject:
+        raise TypeError('arrays of python objects can not be stored: ' + FieldName + '/' + Name)
+    ChunkSize = CL_ODBS_ChunkSize if ChunkSize is None else ChunkSize
+    if not os.path.isdir(StoreDir):
+        os.makedirs(StoreDir)
+    Column = _CL_ODBS_Column(InsName, StepName, FieldName, Name)
+    Chunk  = 0                                    # the last chunk file of the column
+    while os.path.isfile(os.path.join(StoreDir, '%s.%05d.bin' % (Column, Chunk+1))):
+        Chunk += 1
+    Path = os.path.join(StoreDir, '%s.%05d.bin' % (Column, Chunk))
+    if os.path.isfile(Path) and 0 < os.path.getsize(Path) and os.path.getsize(Path) + A.nbytes > ChunkSize:
+        Chunk += 1                                # start a new chunk file
+    File = '%s.%05d.bin' % (Column, Chunk)
+    Path = os.path.join(StoreDir, File)
+    with open(Path, 'ab') as f:
+        f.seek(0, 2)
+        Offset = f.tell()
+        A.tofile(f)
+    Entry = {'odb': int(OdbIndex), 'ins': InsName, 'step': StepName, 'frame': int(Frame),
+             'field': FieldName, 'name': Name, 'file': File, 'offset': Offset,
+             'dtype': A.dtype.str, 'shape': list(A.shape)}
+    with open(os.path.join(StoreDir, 'index.jsonl'), 'a') as f:
+        f.write(json.dumps(Entry) + '\n')
+#====================================================================
+def CL_ODBS_Index(StoreDir):
+    # This function returns the list of the arrays in the store (as dictionaries with
+    # 'odb', 'ins', 'step', 'frame', 'field', 'name', 'file', 'offset', 'dtype', 'shape')
+    # An array written twice is listed once (the last one).
+    #
+    E = {}
+    Index = os.path.join(StoreDir, 'index.jsonl')
+    if not os.path.isfile(Index):
+        return []
+    with open(Index) as f:
+        for Line in f:
+            try:
+                e = json.loads(Line)
+            except ValueError:
+                continue                          # line cut by a killed run
+            E[_CL_ODBS_Key(e)] = e
+    return list(E.values())
+#====================================================================
+def CL_ODBS_Read(StoreDir, OdbIndex, InsName, StepName, Frame, FieldName, Name, Index=None):
+    # This function returns one array of the store as a read-only memory map
+    # (use np.array(...) to load it, or index it to read only a part)
+    #
+    # StoreDir : the store directory
+    # OdbIndex, InsName, StepName, Frame, FieldName, Name : see CL_ODBS_Append
+    # Index    : None, or the list returned by CL_ODBS_Index (to avoid reading it again)
+    #
+    Index = CL_ODBS_Index(StoreDir) if Index is None else Index
+    Key   = (int(OdbIndex), InsName, StepName, int(Frame), FieldName, Name)
+    for e in Index:
+        if _CL_ODBS_Key(e) == Key:
+            return _CL_ODBS_Map(StoreDir, e, 1)[0]
+    raise KeyError('not in the store: ' + str(Key))
+#====================================================================
+def CL_ODBS_Stack(StoreDir, InsName, StepName, FieldName, Name, Frame=None, OdbIndices=None, Index=None):
+    # This function returns the arrays of one field of several ODB files (and/or frames) stacked:
+    #       Keys : (list) (OdbIndex, Frame) of each row of A
+    #       A    : A[i] is the array of Keys[i], shape (len(Keys),) + shape of one array
+    # Nothing is loaded: if the arrays are next to each other in one file, A is a memory map
+    # of the file (one contiguous read), otherwise (several chunk files, or arrays written
+    # between other ones) A is a CL_ODBS_Concat of one memory map per run of consecutive
+    # arrays, which reads only the rows it is indexed with (np.asarray(A) loads all of them).
+    #
+    # StoreDir   : the store directory
+    # InsName, StepName, FieldName, Name : see CL_ODBS_Append
+    # Frame      : None (all the stored frames) or a frame number
+    # OdbIndices : None (all the ODB files) or a list of ODB indices
+    # Index      : None, or the list returned by CL_ODBS_Index
+    #
+    Index = CL_ODBS_Index(StoreDir) if Index is None else Index
+    Odbs  = None if OdbIndices is None else set(int(i) for i in OdbIndices)
+    E = [e for e in Index if e['ins'] == InsName and e['step'] == StepName and
+         e['field'] == FieldName and e['name'] == Name and
+         (Frame is None or e['frame'] == int(Frame)) and (Odbs is None or e['odb'] in Odbs)]
+    if not E:
+        raise KeyError('not in the store: ' + '/'.join([InsName, StepName, FieldName, Name]))
+    E.sort(key=lambda e: (e['file'], e['offset']))
+    Keys  = [(e['odb'], e['frame']) for e in E]
+    Shape = E[0]['shape']
+    dtype = E[0]['dtype']
+    if any(e['shape'] != Shape or e['dtype'] != dtype for e in E):
+        raise ValueError('the arrays of ' + FieldName + '/' + Name + ' do not have the same shape')
+    Size  = int(np.prod(Shape))*np.dtype(dtype).itemsize
+    Runs  = [[E[0], 1]]                           # [first entry, number of arrays] of each run
+    for e in E[1:]:
+        First, n = Runs[-1]
+        if e['file'] == First['file'] and e['offset'] == First['offset'] + n*Size:
+            Runs[-1][1] += 1
+        else:
+            Runs.append([e, 1])
+    Parts = [_CL_ODBS_Map(StoreDir, e, n) for e, n in Runs]
+    return Keys, (Parts[0] if len(Parts) == 1 else CL_ODBS_Concat(Parts))
+#====================================================================
+class CL_ODBS_Concat(object):
+    # This class is the concatenation along the first axis of arrays of the same shape and
+    # dtype (the memory maps of CL_ODBS_Stack) without copying them:
+    #       A[i], A[i, ...], A[i:j], A[Rows] (list, array of indices or of booleans) read
+    #       only the rows asked for, the indices of the other axes are applied to each row
+    #       (A[Rows, k] is A[Rows][:, k]); np.asarray(A) loads everything
+    #
+    # Parts : list of arrays (or memory maps), A.Parts
+    #
+    def __init__(self, Parts):
+        self.Parts = list(Parts)
+        self.Start = np.cumsum([0] + [len(P) for P in self.Parts])
+        self.dtype = self.Parts[0].dtype
+        self.shape = (int(self.Start[-1]),) + self.Parts[0].shape[1:]
+        self.ndim  = len(self.shape)
+        if any(P.dtype != self.dtype or P.shape[1:] != self.shape[1:] for P in self.Parts):
+            raise ValueError('the arrays do not have the same shape and dtype')
+    def __len__(self):
+        return self.shape[0]
+    def __array__(self, dtype=None, copy=None):
+        A = np.concatenate(self.Parts)
+        return A if dtype is None else A.astype(dtype, copy=False)
+    def __getitem__(self, Key):
+        Key  = Key if isinstance(Key, tuple) else (Key,)
+        if Key and Key[0] is not Ellipsis:
+            Rows, Rest = np.arange(len(self))[Key[0]], Key[1:]
+        else:
+            Rows, Rest = np.arange(len(self)), Key
+        Part = np.searchsorted(self.Start, Rows, 'right') - 1
+        if Rows.ndim == 0:                        # one row
+            return self.Parts[Part][(Rows - self.Start[Part],) + Rest]
+        Out = None
+        for k in np.unique(Part):
+            m = Part == k
+            V = self.Parts[k][(slice(None),) + Rest][Rows[m] - self.Start[k]]
+            if Out is None:
+                Out = np.empty((len(Rows),) + V.shape[1:], V.dtype)
+            Out[m] = V
+        if Out is None:                           # no row
+            Out = np.empty((0,) + self.Parts[0][(slice(0, 0),) + Rest].shape[1:], self.dtype)
+        return Out
+#====================================================================
+def CL_ODBS_Update(session, FName, StoreDir, OdbIndex, Plan, ChunkSize=None, Bulk=True):
+    # This function extracts the frames added to an ODB since the last call and appends them
+    # to the store, it returns {StepName : list of the extracted frame numbers}
+    #
+    # session   : abaqus session
+    # FName     : full path of the ODB file (the ODB is opened again at each call, so that
+    #             the frames written by the running job are seen, and closed at the end)
+    # StoreDir  : the store directory
+    # OdbIndex  : (int) the index of the ODB file
+    # Plan      : the extraction plan (see CL_ODBR_ExtractPlan), the frame selection of each
+    #             entry is applied to the new frames only ('All' -> all the new frames), the
+    #             frame numbers not written yet are extracted by a later call
+    # ChunkSize : see CL_ODBS_Append
+    # Bulk      : see CL_ODBR_ExtractPlan
+    #
+    # The steps which do not exist yet are skipped. If a step has less frames than
+    # extracted before (the job was started again), it is extracted again from frame 0
+    # (the stored frames of the previous run are replaced as the new ones are extracted).
+    # The plan is saved in the checkpoint: if it is not the plan of the previous call, all
+    # the steps are extracted again from frame 0 with the new plan.
+    #
+    C = CL_ODBS_Checkpoint(StoreDir, OdbIndex)
+    P = _CL_ODBS_Plan(Plan)
+    if C.get('plan') != P:
+        C['steps'] = {}
+    if FName in session.odbs.keys():
+        session.odbs[FName].close()               # an opened ODB does not see the new frames
+    ODB = session.openOdb(name=FName, readOnly=True)
+    try:
+        Work  = []
+        Steps = {}
+        for InsName, StepName, Frames, FieldName, SubFieldNames in Plan:
+            if StepName not in ODB.steps.keys():
+                continue
+            if StepName not in Steps:
+                S = C['steps'].setdefault(StepName, {'frames': 0, 'time': []})
+                Steps[StepName] = len(ODB.steps[StepName].frames)
+                if Steps[StepName] < S['frames']:
+                    S['frames'] = 0
+                    S['time']   = []
+            Done   = C['steps'][StepName]['frames']
+            if not isinstance(Frames, (str, slice)):  # frames not written yet: taken by a later call
+                Frames = [int(f) for f in np.atleast_1d(Frames) if int(f) < Steps[StepName]]
+            Frames = [f for f in CL_ODBR_FrameIndices(Steps[StepName], Frames) if f >= Done]
+            if Frames:
+                Work.append((InsName, StepName, Frames, FieldName, SubFieldNames))
+        if Work:
+            CL_ODBS_Write(StoreDir, OdbIndex, CL_ODBR_ExtractPlan(ODB, Work, Bulk), ChunkSize)
+        for StepName, NF in Steps.items():
+            S = C['steps'][StepName]
+            S['time'].extend(float(t) for t in CL_ODBR_FramesTime(ODB, StepName, S['frames']))
+            S['frames'] = NF
+    finally:
+        ODB.close()
+    #------------------------ the checkpoint is written once the arrays are in the store
+    C['path'] = os.path.abspath(FName)
+    C['plan'] = P
+    Checkpoint = os.path.join(StoreDir, 'checkpoint-%d.json' % int(OdbIndex))
+    with open(Checkpoint + '.tmp', 'w') as f:
+        json.dump(C, f)
+    os.replace(Checkpoint + '.tmp', Checkpoint)
+    New = {}
+    for InsName, StepName, Frames, FieldName, SubFieldNames in Work:
+        New[StepName] = sorted(set(New.get(StepName, [])) | set(Frames))
+    return New
+#====================================================================
+def CL_ODBS_Checkpoint(StoreDir, OdbIndex):
+    # This function returns the checkpoint of CL_ODBS_Update of one ODB as a dictionary
+    # {'path': ODB file, 'plan': extraction plan (JSON lists, see CL_ODBS_Update),
+    #  'steps': {StepName : {'frames': number of extracted frames, 'time': frame values}}}
+    #
+    Checkpoint = os.path.join(StoreDir, 'checkpoint-%d.json' % int(OdbIndex))
+    if not os.path.isfile(Checkpoint):
+        return {'path': None, 'plan': None, 'steps': {}}
+    with open(Checkpoint) as f:
+        return json.load(f)
+#====================================================================
+def _CL_ODBS_Plan(Plan):
+    # the plan as saved in the checkpoint (JSON lists, slices -> {'slice':[start,stop,step]})
+    #
+    P = []
+    for InsName, StepName, Frames, FieldName, SubFieldNames in Plan:
+        if isinstance(Frames, slice):
+            Frames = {'slice': [Frames.start, Frames.stop, Frames.step]}
+        elif not isinstance(Frames, str):
+            Frames = [int(f) for f in np.atleast_1d(Frames)]
+        if not isinstance(SubFieldNames, str):
+            SubFieldNames = list(SubFieldNames)
+        P.append([InsName, StepName, Frames, FieldName, SubFieldNames])
+    return json.loads(json.dumps(P))
+#====================================================================
+def _CL_ODBS_Map(StoreDir, e, n):
+    # memory map of n consecutive arrays starting at the entry e
+    #
+    Shape = tuple([n] + e['shape'])
+    if int(np.prod(Shape)) == 0:
+        return np.zeros(Shape, e['dtype'])
+    return np.memmap(os.path.join(StoreDir, e['file']), dtype=e['dtype'], mode='r',
+                     offset=e['offset'], shape=Shape)
+#====================================================================
+def _CL_ODBS_Key(e):
+    # the identifier of an entry of the index
+    #
+    return (e['odb'], e['ins'], e['step'], e['frame'], e['field'], e['name'])
+#====================================================================
+def _CL_ODBS_Column(InsName, StepName, FieldName, Name):
+    # the base name of the files of one column (readable part + short hash)
+    #
+    S = '|'.join([InsName, StepName, FieldName, Name])
+    H = hashlib.sha1(S.encode('utf-8')).hexdigest()[:8]
+    return re.sub('[^A-Za-z0-9_.-]', '_', '.'.join([InsName, StepName, FieldName, Name])) + '.' + H
@@ -24,20 +24,21 @@ Frame      = -1                # frame (-1 for the last frame)
 #-------------------------------------------------------------------- List of file indices of the ODB files
 Indices = [i for i in range(Index_from,Index_to+1)]
 #-------------------------------------------------------------------- Extract and save the fields
-for Index in Indices:
-    print('-'*80, 'Loading ODB')
-    ODBFName  = os.path.join(SimDir, str(Index), 'Jobnew.odb')
-    print('ODBFName:', ODBFName)
-    #---------------------------------- open ODB file
-    ODB = CL_ODBR_OpenODB(session, ODBFName)
-    #---------------------------------- extract the fields
-    U    = np.array(CL_ODBR_FieldOutput(ODB, InsName, StepName, Frame, 'U'   ,'data' )['data' ]) # displacements
-    Svm  = np.array(CL_ODBR_FieldOutput(ODB, InsName, StepName, Frame, 'S'   ,'mises')['mises']) # Von mises stresses
-    PEEQ = np.array(CL_ODBR_FieldOutput(ODB, InsName, StepName, Frame, 'PEEQ','data' )['data' ]) # Plastic equivalent strain
-    #---------------------------------- save the fields
-    np.savez_compressed(os.path.join(ExtDir, 'Specimen-U-'   +str(Index)+'.npz'), U   )
-    np.savez_compressed(os.path.join(ExtDir, 'Specimen-Svm-' +str(Index)+'.npz'), Svm )
-    np.savez_compressed(os.path.join(ExtDir, 'Specimen-PEEQ-'+str(Index)+'.npz'), PEEQ)
+with CL_ODBR_ODBPool(session, MaxOpen=1) as Pool: # only one ODB file is kept open
+    for Index in Indices:
+        print('-'*80, 'Loading ODB')
+        ODBFName  = os.path.join(SimDir, str(Index), 'Jobnew.odb')
+        print('ODBFName:', ODBFName)
+        #---------------------------------- open ODB file (the previous one is closed)
+        ODB = Pool.Open(ODBFName)
+        #---------------------------------- extract the fields
+        U    = np.array(CL_ODBR_FieldOutput(ODB, InsName, StepName, Frame, 'U'   ,'data' )['data' ]) # displacements
+        Svm  = np.array(CL_ODBR_FieldOutput(ODB, InsName, StepName, Frame, 'S'   ,'mises')['mises']) # Von mises stresses
+        PEEQ = np.array(CL_ODBR_FieldOutput(ODB, InsName, StepName, Frame, 'PEEQ','data' )['data' ]) # Plastic equivalent strain
+        #---------------------------------- save the fields
+        np.savez_compressed(os.path.join(ExtDir, 'Specimen-U-'   +str(Index)+'.npz'), U   )
+        np.savez_compressed(os.path.join(ExtDir, 'Specimen-Svm-' +str(Index)+'.npz'), Svm )
+        np.savez_compressed(os.path.join(ExtDir, 'Specimen-PEEQ-'+str(Index)+'.npz'), PEEQ)
 #--------------------------------------------------------------------
 print('='*10 + '> END <' + '='*10 + '\n')
 
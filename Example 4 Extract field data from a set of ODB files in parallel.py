@@ -0,0 +1,44 @@
+'''
+* This script should be executed with "abaqus python" (not in Abaqus CAE)
+
+* This script extract the field data from the *.odb file for each case using several processes
+'''
+#---------------------------- Add to path
+import sys
+sys.path.append('d://_CL_Python//') # adding directory to the path
+#-------------------------------------------------------------------- Import modules
+from CL_Abaqus_ODB_Batch import *
+from CL_Abaqus_ODB_Store import *
+import os
+#-------------------------------------------------------------------- BEGIN
+print('='*10 + '> BEGIN <' + '='*10 + '\n')
+#-------------------------------------------------------------------- Options
+SimDir     = 'D:\Rolling\Case-2-Two Rollers\DOE-Simulations'       # Simulation directory
+ExtDir     = 'D:\Rolling\Case-2-Two Rollers\DOE-Results'           # The directort where the extracted data will be saved
+Index_from = 0          # the index of the first ODB file
+Index_to   = 1000       # the index of the last ODB file
+InsName    = 'PART-SPECIMEN-1' # instance name
+StepName   = 'Step-Rolling'    # step name
+Frame      = -1                # frame (-1 for the last frame)
+NWorkers   = 8                 # number of abaqus python processes
+#-------------------------------------------------------------------- List of ODB files
+Jobs = [(Index, os.path.join(SimDir, str(Index), 'Jobnew.odb')) for Index in range(Index_from,Index_to+1)]
+#-------------------------------------------------------------------- Fields to extract
+Plan = [(InsName, StepName, Frame, 'U'   , 'data' ),  # displacements
+        (InsName, StepName, Frame, 'S'   , 'mises'),  # Von mises stresses
+        (InsName, StepName, Frame, 'PEEQ', 'data' )]  # Plastic equivalent strain
+#-------------------------------------------------------------------- Save the fields of each finished ODB in one store
+StoreDir = os.path.join(ExtDir, 'Store')
+def Writer(Index, R):
+    print('-'*80, 'Saving ODB', Index)
+    CL_ODBS_Write(StoreDir, Index, R)
+#-------------------------------------------------------------------- Extract (run again to resume)
+Done, Failed = CL_ODBB_Run(Jobs, Plan, os.path.join(ExtDir, 'Batch'), NWorkers=NWorkers, Writer=Writer)
+print('Extracted:', len(Done))
+for Index in sorted(Failed):
+    print('Failed:', Index, Failed[Index])
+#-------------------------------------------------------------------- Read all displacement fields (n_cases, n_nodes, 3)
+Keys, U = CL_ODBS_Stack(StoreDir, InsName, StepName, 'U', 'data')
+print('U:', U.shape)
+#--------------------------------------------------------------------
+print('='*10 + '> END <' + '='*10 + '\n')
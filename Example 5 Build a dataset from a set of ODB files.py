@@ -0,0 +1,45 @@
+'''
+* This script can be executed in the Abaqus environment (or with "abaqus python")
+
+* This script builds one dataset from the fields of all the cases of the DOE:
+  the stacked arrays (n_cases, n_nodes, ...) and the maxima, minima, means and percentiles
+'''
+#---------------------------- Add to path
+import sys
+sys.path.append('d://_CL_Python//') # adding directory to the path
+#-------------------------------------------------------------------- Import modules
+from CL_Abaqus_ODB_Dataset import *
+import numpy as np 
+import os
+#-------------------------------------------------------------------- BEGIN
+print('='*10 + '> BEGIN <' + '='*10 + '\n')
+#-------------------------------------------------------------------- Options
+SimDir     = 'D:\Rolling\Case-2-Two Rollers\DOE-Simulations'       # Simulation directory
+ExtDir     = 'D:\Rolling\Case-2-Two Rollers\DOE-Results'           # The directort where the extracted data will be saved
+Index_from = 0          # the index of the first ODB file
+Index_to   = 1000       # the index of the last ODB file
+InsName    = 'PART-SPECIMEN-1' # instance name
+StepName   = 'Step-Rolling'    # step name
+Frame      = -1                # frame (-1 for the last frame)
+#-------------------------------------------------------------------- Fields of the dataset
+Fields = [('U'   , InsName, StepName, Frame, 'U'   , 'data' ),  # displacements
+          ('Svm' , InsName, StepName, Frame, 'S'   , 'mises'),  # Von mises stresses
+          ('PEEQ', InsName, StepName, Frame, 'PEEQ', 'data' )]  # Plastic equivalent strain
+Names  = [f[0] for f in Fields]
+#-------------------------------------------------------------------- Read the cases from the ODB files
+Loader = CL_ODBA_ODBLoader(session, os.path.join(SimDir, '%d', 'Jobnew.odb'), Fields)
+# or from the files of Example 3:
+# Loader = CL_ODBA_NpzLoader([(Name, os.path.join(ExtDir, 'Specimen-' + Name + '-%d.npz')) for Name in Names])
+#-------------------------------------------------------------------- Build the dataset (memory-mapped stacks)
+D = CL_ODBA_Dataset(range(Index_from, Index_to+1), Names, Loader, OutDir=os.path.join(ExtDir, 'Dataset'),
+                    Percentiles=[5, 50, 95])
+for Index in sorted(D['failed']):
+    print('Failed:', Index, D['failed'][Index])
+#-------------------------------------------------------------------- Results
+Svm = D['fields']['Svm']
+print('U stack       :', D['fields']['U']['stack'].shape)             # (n_cases, n_nodes, 3)
+print('max Svm       :', np.nanmax(Svm['case_max']))                  # largest von Mises stress of all cases
+print('worst case    :', D['cases'][int(np.nanargmax(Svm['case_max']))])
+print('median PEEQ   :', D['fields']['PEEQ']['percentiles'][50].shape)  # per integration point
+#--------------------------------------------------------------------
+print('='*10 + '> END <' + '='*10 + '\n')
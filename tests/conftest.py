@@ -0,0 +1,35 @@
+# By: Javad KAZEM
+#
+import os
+import sys
+import numpy as np
+
+# the modules are in the directory above the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from CL_Abaqus_ODB_Mock import *
+#====================================================================
+def MixedODB(Seed=0):
+    # mock ODB with 2 hexahedra (8 integration points): the stress of element 1 has 6 components,
+    # the stress of element 2 has 3 components (S11, S22, S12) as a shell
+    #
+    rng = np.random.RandomState(Seed)
+    ODB = CL_ODBM_MakeODB(nx=2, ny=1, nz=1, NIP=8, NF=1)
+    Ins = ODB.rootAssembly.instances['PART-1-1']
+    IP  = np.arange(1, 9, dtype=np.int32)
+    B1  = MockFieldBulkData(INTEGRATION_POINT, TENSOR_3D_FULL, Ins, ('S11','S22','S33','S12','S13','S23'),
+                            rng.standard_normal((8, 6)).astype(np.float32), baseElementType='C3D8',
+                            elementLabels=np.ones(8, np.int32), integrationPoints=IP)
+    B2  = MockFieldBulkData(INTEGRATION_POINT, SymbolicConstant('TENSOR_3D_SURFACE'), Ins, ('S11','S22','S12'),
+                            rng.standard_normal((8, 3)).astype(np.float32), baseElementType='C3D8',
+                            elementLabels=np.full(8, 2, np.int32), integrationPoints=IP)
+    FO  = MockFieldOutput('S', TENSOR_3D_FULL, ('S11','S22','S33','S12','S13','S23'), [B1, B2])
+    ODB.steps['Step-1'].frames[-1]._fieldOutputs = {'S': FO}
+    return ODB
+#====================================================================
+def OpenODB(path, readOnly=True):
+    # opener of the batch workers (CL_ODBB_Run(..., Opener='conftest:OpenODB')): a small mock ODB,
+    # the files with 'bad' in their name can not be opened
+    #
+    if 'bad' in os.path.basename(path):
+        raise IOError('can not open ' + path)
+    return CL_ODBM_MakeODB(nx=2, ny=2, nz=2, NF=2)
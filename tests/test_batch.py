@@ -0,0 +1,55 @@
+# By: Javad KAZEM
+#
+import os
+import sys
+import time
+import pytest
+from CL_Abaqus_ODB_Batch import *
+
+'''
+Checks of the worker processes of CL_Abaqus_ODB_Batch on mock ODB files
+(the workers are the python running the tests, run with "python -m pytest tests")
+
+'''
+#====================================================================
+Plan = [('PART-1-1', 'Step-1', -1, 'S', ['mises'])]
+#====================================================================
+def _Run(Jobs, OutDir, **Options):
+    # CL_ODBB_Run with python workers opening the ODB files with conftest.OpenODB
+    #
+    return CL_ODBB_Run(Jobs, Plan, OutDir, Command=[sys.executable], Opener='conftest:OpenODB', **Options)
+#====================================================================
+@pytest.fixture(autouse=True)
+def _WorkerPath(monkeypatch):
+    # the workers import conftest from the tests directory
+    monkeypatch.setenv('PYTHONPATH', os.path.dirname(os.path.abspath(__file__)))
+#====================================================================
+def test_resume_from_manifest(tmp_path):
+    # a failed ODB is not tried again in the same run, a second run extracts only the ODB not done
+    Out  = str(tmp_path / 'out')
+    Jobs = [(i, str(tmp_path / ('%s%d.odb' % ('bad' if i == 2 else 'job', i)))) for i in range(4)]
+    t0   = time.time()
+    Done, Failed = _Run(Jobs, Out, NWorkers=2, Retries=2, RetryDelay=60.0)
+    assert time.time() - t0 < 30.0
+    assert Done == [0, 1, 3] and list(Failed) == [2] and 'can not open' in Failed[2]
+    S = CL_ODBB_ReadManifest(os.path.join(Out, 'manifest.jsonl'))
+    assert [S[i]['status'] for i in range(4)] == ['done', 'done', 'failed', 'done']
+    Written = []
+    Jobs[2] = (2, str(tmp_path / 'job2.odb'))
+    Done, Failed = _Run(Jobs, Out, NWorkers=2, Writer=lambda i, R: Written.append(i))
+    assert Done == [0, 1, 2, 3] and Failed == {} and Written == [2]
+    R = CL_ODBB_Load(os.path.join(Out, 'ODB-2.npz'))
+    assert R[('PART-1-1', 'Step-1', 1, 'S')]['mises'].shape == (8,)
+#====================================================================
+def test_locked_retried(tmp_path):
+    # a locked ODB is tried again after RetryDelay, then reported as locked
+    Out = str(tmp_path / 'out')
+    open(str(tmp_path / 'job0.lck'), 'w').close()
+    t0  = time.time()
+    Done, Failed = _Run([(0, str(tmp_path / 'job0.odb'))], Out, NWorkers=1, Retries=1, RetryDelay=0.1)
+    assert Done == [] and 'locked' in Failed[0] and time.time() - t0 >= 0.1
+    assert CL_ODBB_ReadManifest(os.path.join(Out, 'manifest.jsonl'))[0]['status'] == 'locked'
+#====================================================================
+def test_workers_validated(tmp_path):
+    with pytest.raises(ValueError):
+        _Run([(0, str(tmp_path / 'job0.odb'))], str(tmp_path / 'out'), NWorkers=0)
@@ -0,0 +1,39 @@
+# By: Javad KAZEM
+#
+import os
+import numpy as np
+from CL_Abaqus_ODB_Cache import *
+from CL_Abaqus_ODB_Mock import *
+
+'''
+Checks of the extraction cache of CL_Abaqus_ODB_Cache with a mock session
+(run with "python -m pytest tests")
+
+'''
+#====================================================================
+def test_hit_does_not_open(tmp_path):
+    # the second request is read from the cache without opening the ODB, a changed ODB is read again
+    FName = str(tmp_path / 'Job.odb')
+    with open(FName, 'w') as f:
+        f.write('odb')
+    Cache = str(tmp_path / 'cache')
+    S     = MockSession()
+    F1    = CL_ODBC_FieldOutput(S, FName, 'PART-1-1', 'Step-1', -1, 'S', ['data', 'mises', 'nodeLabel'], Cache)
+    NOD1, NLabel1 = CL_ODBC_NOD(S, FName, 'PART-1-1', Cache)
+    ELM1, ELabel1, EType1 = CL_ODBC_ELM(S, FName, 'PART-1-1', Cache)
+    assert S.NOpen == 1
+    S.odbs[FName].close()                         # a hit must not open it again
+    F2    = CL_ODBC_FieldOutput(S, FName, 'PART-1-1', 'Step-1', -1, 'S', ['data', 'mises', 'nodeLabel'], Cache)
+    NOD2, NLabel2 = CL_ODBC_NOD(S, FName, 'PART-1-1', Cache)
+    ELM2, ELabel2, EType2 = CL_ODBC_ELM(S, FName, 'PART-1-1', Cache)
+    assert S.NOpen == 1 and S.odbs == {}
+    np.testing.assert_array_equal(F2['data'], F1['data'])
+    np.testing.assert_array_equal(F2['mises'], F1['mises'])
+    assert F1['nodeLabel'] is None and F2['nodeLabel'] is None
+    np.testing.assert_array_equal(NOD2, NOD1)
+    np.testing.assert_array_equal(ELM2, ELM1)
+    assert EType2 == EType1 and len(CL_ODBC_Entries(Cache)) == 3
+    with open(FName, 'a') as f:
+        f.write(' written again')
+    CL_ODBC_NOD(S, FName, 'PART-1-1', Cache)
+    assert S.NOpen == 2
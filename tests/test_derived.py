@@ -0,0 +1,83 @@
+# By: Javad KAZEM
+#
+import numpy as np
+import pytest
+import CL_Abaqus_ODB_Derived
+from CL_Abaqus_ODB_Derived import *
+from CL_Abaqus_ODB_Mock import *
+from conftest import MixedODB
+
+'''
+Checks of CL_ODBD_Derive against the invariants of the FieldValue objects of the mock
+(run with "python -m pytest tests")
+
+'''
+#====================================================================
+# the invariants computed by the mock FieldValue objects
+_Names = ['mises', 'tresca', 'press', 'inv3', 'maxPrincipal', 'midPrincipal', 'minPrincipal',
+          'maxInPlanePrincipal', 'minInPlanePrincipal', 'outOfPlanePrincipal']
+#====================================================================
+def _Reference(Data6):
+    # invariants of (n,6) tensors given by the mock FieldValue objects
+    #
+    B = MockFieldBulkData(INTEGRATION_POINT, TENSOR_3D_FULL, None, ('S11','S22','S33','S12','S13','S23'),
+                          np.asarray(Data6, np.float64))
+    return dict((Name, np.array([getattr(MockFieldValue(B, r), Name) for r in range(len(B))]))
+                for Name in _Names)
+#====================================================================
+@pytest.mark.parametrize('n', [1, 2, 3, 4, 7, 100])
+def test_derive_6_components(n):
+    D = np.random.RandomState(n).standard_normal((n, 6))
+    F = CL_ODBD_Derive(D, _Names, 'TENSOR_3D_FULL')
+    R = _Reference(D)
+    for Name in _Names:
+        np.testing.assert_allclose(F[Name], R[Name], rtol=1e-9, atol=1e-9, err_msg=Name)
+#====================================================================
+@pytest.mark.parametrize('n', [1, 2, 3, 4, 7])
+def test_derive_3_components(n):
+    # plane stress (S11, S22, S12): same as the 3D tensors with S33 = S13 = S23 = 0
+    D  = np.random.RandomState(n).standard_normal((n, 3))
+    D6 = np.zeros((n, 6))
+    D6[:,[0, 1, 3]] = D
+    F = CL_ODBD_Derive(D, _Names, 'TENSOR_3D_SURFACE')
+    R = _Reference(D6)
+    for Name in _Names:
+        np.testing.assert_allclose(F[Name], R[Name], rtol=1e-9, atol=1e-9, err_msg=Name)
+#====================================================================
+def test_derive_chunks(monkeypatch):
+    # the last chunk has 3 rows of 3 components
+    monkeypatch.setattr(CL_Abaqus_ODB_Derived, 'CL_ODBD_Chunk', 4)
+    D = np.random.RandomState(0).standard_normal((7, 3))
+    F = CL_ODBD_Derive(D, ['mises'], 'TENSOR_3D_SURFACE')
+    for i in range(len(D)):
+        np.testing.assert_allclose(F['mises'][i], CL_ODBD_Derive(D[i:i+1], ['mises'], 'TENSOR_3D_SURFACE')['mises'][0])
+#====================================================================
+def test_field_output_equals_values():
+    ODB = CL_ODBM_SyntheticODB(NE=200, NIP=8, NF=2, Wedges=0.2)
+    F   = CL_ODBD_FieldOutput(ODB, 'PART-1-1', 'Step-1', -1, 'S', _Names)
+    FO  = ODB.steps['Step-1'].frames[-1].fieldOutputs['S']
+    for Name in _Names:
+        R = np.array([getattr(v, Name) for v in FO.values])
+        np.testing.assert_allclose(F[Name], R, rtol=1e-4, atol=1e-4, err_msg=Name)
+#====================================================================
+def test_principal_directions():
+    D = np.random.RandomState(1).standard_normal((5, 6))
+    P, Dir = CL_ODBD_Principals(D, Directions=True)
+    T = CL_ODBD_Tensor(D)
+    for k in range(3):
+        np.testing.assert_allclose(np.einsum('nij,nj->ni', T, Dir[:,k]), P[:,k,None]*Dir[:,k], atol=1e-9)
+#====================================================================
+def test_field_output_mixed_components():
+    # solids and shells in one instance
+    ODB = MixedODB()
+    F   = CL_ODBD_FieldOutput(ODB, 'PART-1-1', 'Step-1', -1, 'S', ['mises', 'maxPrincipal'])
+    B1  = ODB.steps['Step-1'].frames[-1].fieldOutputs['S'].bulkDataBlocks[0]
+    R   = _Reference(B1.data)
+    for Name in ['mises', 'maxPrincipal']:
+        np.testing.assert_allclose(F[Name][:8], R[Name], rtol=1e-5, atol=1e-5, err_msg=Name)
+    B2  = ODB.steps['Step-1'].frames[-1].fieldOutputs['S'].bulkDataBlocks[1]
+    D6  = np.zeros((len(B2.data), 6))
+    D6[:,[0, 1, 3]] = B2.data
+    R   = _Reference(D6)
+    for Name in ['mises', 'maxPrincipal']:
+        np.testing.assert_allclose(F[Name][8:], R[Name], rtol=1e-5, atol=1e-5, err_msg=Name)
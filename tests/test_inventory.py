@@ -0,0 +1,62 @@
+# By: Javad KAZEM
+#
+import os
+from CL_Abaqus_ODB_Inventory import *
+from CL_Abaqus_ODB_Mock import *
+
+'''
+Checks of the catalog of CL_Abaqus_ODB_Inventory on mock ODB files
+(run with "python -m pytest tests")
+
+'''
+#====================================================================
+def _Tree(Root):
+    # a directory tree with 3 ODB files, one of them can not be opened
+    os.makedirs(os.path.join(Root, 'sub'))
+    Names = [os.path.join(Root, 'a.odb'), os.path.join(Root, 'bad.odb'), os.path.join(Root, 'sub', 'c.odb')]
+    for FName in Names:
+        with open(FName, 'w') as f:
+            f.write('odb')
+    return Names
+#====================================================================
+def test_scan_and_check(tmp_path):
+    Root = str(tmp_path)
+    a, bad, c = _Tree(Root)
+    Opened = []
+    def Opener(FName, readOnly=True):
+        Opened.append(FName)
+        if 'bad' in FName:
+            raise IOError('can not open')
+        return CL_ODBM_SyntheticODB(NE=20, NF=4, NSteps=2, Wedges=0.5)
+    C = CL_ODBI_Scan(Root, Opener=Opener, Log=False)
+    assert sorted(Opened) == sorted([a, bad, c]) and 'can not open' in C['odbs'][bad]['error']
+    E   = C['odbs'][a]
+    Ins = Opener(a).rootAssembly.instances['PART-1-1']
+    assert E['instances']['PART-1-1']['elements'] == len(Ins.elements)
+    assert E['instances']['PART-1-1']['nodes'] == len(Ins.nodes) and len(E['instances']['PART-1-1']['types']) == 2
+    assert E['steps']['Step-2']['frames'] == 4 and len(E['steps']['Step-2']['time']) == 4
+    assert 'MISES' in E['steps']['Step-1']['fields']['S']['invariants']
+    #------------------------ only the changed (and unreadable) ODB files are opened again
+    del Opened[:]
+    with open(c, 'a') as f:
+        f.write(' written again')
+    C = CL_ODBI_Scan(Root, Opener=Opener, Log=False)
+    assert sorted(Opened) == sorted([bad, c])
+    assert CL_ODBI_Load(os.path.join(Root, CL_ODBI_Catalog))['odbs'][a] == E
+    #------------------------ plans checked without opening the ODB files
+    del Opened[:]
+    Good = [('PART-1-1', 'Step-1', 'All', 'S', ['data', 'mises']), ('PART-1-1', 'Step-2', [0, -1], 'U', 'magnitude'),
+            ('PART-1-1', 'Step-2', slice(1, 3), 'PEEQ', 'data')]
+    assert CL_ODBI_Check(C, a, Good) == []
+    Bad  = [('PART-2-1', 'Step-1', -1, 'S', 'data'), ('PART-1-1', 'Step-3', -1, 'S', 'data'),
+            ('PART-1-1', 'Step-1', 4, 'S', 'data'), ('PART-1-1', 'Step-1', slice(5, 9), 'S', 'data'),
+            ('PART-1-1', 'Step-1', -1, 'LE', 'data'), ('PART-1-1', 'Step-1', -1, 'S', 'magnitude'),
+            ('PART-1-1', 'Step-1', -1, 'S', 'nothing')]
+    P = CL_ODBI_Check(C, a, Bad)
+    assert len(P) == len(Bad)
+    for Problem, Expected in zip(P, ['no instance', 'no step', 'bad frame selection', 'no frame selected',
+                                     'no field', 'not an invariant', 'unknown sub-field']):
+        assert Expected in Problem, Problem
+    assert CL_ODBI_Check(C, bad, Good)[0].startswith('not readable')
+    assert CL_ODBI_Check(C, os.path.join(Root, 'd.odb'), Good)[0].startswith('not in the catalog')
+    assert Opened == []
@@ -0,0 +1,107 @@
+# By: Javad KAZEM
+#
+import numpy as np
+import pytest
+from CL_Abaqus_ODB_Nodal import *
+from CL_Abaqus_ODB_Mock import *
+from conftest import MixedODB
+
+'''
+Checks of the extrapolation matrices and of the nodal averaging of CL_Abaqus_ODB_Nodal
+(run with "python -m pytest tests")
+
+'''
+#====================================================================
+# natural coordinates of the nodes of the hexahedra and quadrilaterals (Abaqus numbering)
+_Hex  = [(-1,-1,-1), ( 1,-1,-1), ( 1, 1,-1), (-1, 1,-1), (-1,-1, 1), ( 1,-1, 1), ( 1, 1, 1), (-1, 1, 1),
+         ( 0,-1,-1), ( 1, 0,-1), ( 0, 1,-1), (-1, 0,-1), ( 0,-1, 1), ( 1, 0, 1), ( 0, 1, 1), (-1, 0, 1),
+         (-1,-1, 0), ( 1,-1, 0), ( 1, 1, 0), (-1, 1, 0)]
+_Quad = [(-1,-1), ( 1,-1), ( 1, 1), (-1, 1), ( 0,-1), ( 1, 0), ( 0, 1), (-1, 0)]
+#====================================================================
+def _Gauss(n, Dim):
+    # natural coordinates of the n^Dim Gauss points (Abaqus numbering: first direction fastest)
+    #
+    g = {2: [-1/np.sqrt(3.0), 1/np.sqrt(3.0)], 3: [-np.sqrt(0.6), 0.0, np.sqrt(0.6)]}[n]
+    if Dim == 2:
+        return np.array([(x, y) for y in g for x in g])
+    return np.array([(x, y, z) for z in g for y in g for x in g])
+#====================================================================
+def _Trilinear(X):
+    # a trilinear (or bilinear) polynomial with all its terms
+    #
+    x, y = X[:,0], X[:,1]
+    if X.shape[1] == 2:
+        return 1.0 + 2.0*x - 3.0*y + 0.5*x*y
+    z = X[:,2]
+    return 1.0 + 2.0*x - 3.0*y + 4.0*z + 0.5*x*y - 0.25*y*z + 1.5*x*z - 0.75*x*y*z
+#====================================================================
+@pytest.mark.parametrize('EType, NPE, n, Dim', [('C3D8', 8, 2, 3), ('C3D20', 20, 3, 3),
+                                                ('CPE4', 4, 2, 2), ('CPS8', 8, 3, 2)])
+def test_matrix_trilinear(EType, NPE, n, Dim):
+    XN = np.array((_Hex if Dim == 3 else _Quad)[:NPE], np.float64)
+    E  = CL_ODBN_Matrix(EType, NPE, n**Dim)
+    np.testing.assert_allclose(E.dot(_Trilinear(_Gauss(n, Dim))), _Trilinear(XN), atol=1e-12)
+#====================================================================
+def test_matrix_constant():
+    # one integration point: the value is given to all the nodes
+    for EType, NPE in [('C3D8R', 8), ('C3D4', 4), ('C3D6', 6), ('CPE4R', 4)]:
+        np.testing.assert_allclose(CL_ODBN_Matrix(EType, NPE, 1), np.ones((NPE, 1)))
+#====================================================================
+def test_nodal_linear_field():
+    # a linear field of the coordinates is found exactly at the nodes of a hexahedral mesh
+    NLabel, NOD, ELabel, ELM = CL_ODBM_HexMesh(3, 2, 2)
+    Offset = np.arange(0, ELM.size + 1, 8)
+    Mesh = CL_ODBN_MeshArrays(NOD, NLabel, Offset, ELM.ravel(), ELabel, np.zeros(len(ELabel), int), ['C3D8'])
+    XI = _Gauss(2, 3)
+    XC = NOD[ELM - 1].mean(axis=1)                        # centres of the (unit) elements
+    X  = (XC[:,None,:] + 0.5*XI[None,:,:]).reshape(-1, 3)
+    Values = 1.0 + X.dot([2.0, -3.0, 4.0])
+    EN = CL_ODBN_Extrapolate(Mesh, np.repeat(ELabel, 8), np.tile(np.arange(1, 9), len(ELabel)), Values)
+    Nodal, ENAvg, Averaged = CL_ODBN_Average(Mesh, EN)
+    np.testing.assert_allclose(Nodal, 1.0 + NOD.dot([2.0, -3.0, 4.0]), atol=1e-9)
+    assert Averaged.all()
+#====================================================================
+def test_nodal_groups():
+    # two groups of elements are not averaged together at the nodes they share
+    ODB  = CL_ODBM_SyntheticODB(NE=100, NIP=8, NF=2, Wedges=0.3)
+    Mesh = CL_ODBN_Mesh(ODB, 'PART-1-1')
+    N0, E0, A0 = CL_ODBN_Nodal(ODB, 'PART-1-1', 'Step-1', -1, 'PEEQ', 'data', Mesh)
+    N1, E1, A1 = CL_ODBN_Nodal(ODB, 'PART-1-1', 'Step-1', -1, 'PEEQ', 'data', Mesh, Groups='type')
+    assert A0.all() and not A1.all()
+    np.testing.assert_allclose(E0, N0[Mesh['NodeRows']])
+    Shared = ~A1[Mesh['NodeRows']]
+    assert not np.allclose(E1[Shared], E0[Shared])
+    np.testing.assert_allclose(E1[~Shared], E0[~Shared], rtol=1e-6)
+#====================================================================
+def test_nodal_mixed_components():
+    # a missing component of an element (shell) is left out of the average of this component
+    ODB  = MixedODB()
+    Mesh = CL_ODBN_Mesh(ODB, 'PART-1-1')
+    Nodal, ENAvg, Averaged = CL_ODBN_Nodal(ODB, 'PART-1-1', 'Step-1', -1, 'S', 'data', Mesh)
+    assert Nodal.shape == (len(Mesh['NLabel']), 6) and Averaged.all()
+    Rows = Mesh['NodeRows'][:8]                   # the nodes of element 1
+    assert not np.isnan(Nodal[Rows]).any()
+    assert np.isnan(ENAvg[8:][:,[2, 4, 5]]).all()
+    B1, B2 = ODB.steps['Step-1'].frames[-1].fieldOutputs['S'].bulkDataBlocks
+    EN1 = CL_ODBN_Matrix('C3D8', 8, 8).dot(B1.data.astype(np.float64))
+    EN2 = CL_ODBN_Matrix('C3D8', 8, 8).dot(B2.data.astype(np.float64))
+    Shared = np.flatnonzero(np.isin(Mesh['ELMNodes'][:8], Mesh['ELMNodes'][8:]))
+    In2    = [list(Mesh['ELMNodes'][8:]).index(n) for n in Mesh['ELMNodes'][Shared]]
+    np.testing.assert_allclose(Nodal[Rows[Shared],2], EN1[Shared,2], rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(Nodal[Rows[Shared],0], 0.5*(EN1[Shared,0] + EN2[In2,0]), rtol=1e-4, atol=1e-5)
+#====================================================================
+def test_nodal_section_points():
+    # the values of a shell at 2 section points are not mixed at the same integration point
+    ODB = CL_ODBM_MakeODB(nx=1, ny=1, nz=1, NIP=8, NF=1)
+    Ins = ODB.rootAssembly.instances['PART-1-1']
+    rng = np.random.RandomState(0)
+    B   = [MockFieldBulkData(INTEGRATION_POINT, SCALAR, Ins, (), rng.random_sample((8, 1)),
+                             elementLabels=np.ones(8, np.int32), integrationPoints=np.arange(1, 9),
+                             sectionPoint=MockSectionPoint(k)) for k in (1, 5)]
+    ODB.steps['Step-1'].frames[-1]._fieldOutputs = {'SE': MockFieldOutput('SE', SCALAR, (), B)}
+    with pytest.raises(ValueError):
+        CL_ODBN_Nodal(ODB, 'PART-1-1', 'Step-1', -1, 'SE')
+    Mesh = CL_ODBN_Mesh(ODB, 'PART-1-1')
+    for k, Bk in zip((1, 5), B):
+        Nodal, ENAvg, Averaged = CL_ODBN_Nodal(ODB, 'PART-1-1', 'Step-1', -1, 'SE', Mesh=Mesh, SectionPoint=k)
+        np.testing.assert_allclose(ENAvg, CL_ODBN_Matrix('C3D8', 8, 8).dot(Bk.data[:,0]), rtol=1e-6)
@@ -0,0 +1,143 @@
+# By: Javad KAZEM
+#
+import numpy as np
+import pytest
+from CL_Abaqus_ODB_Reader import *
+from CL_Abaqus_ODB_Mock import *
+from conftest import MixedODB
+
+'''
+Checks of CL_ODBR_FieldOutputBulk against the value by value CL_ODBR_FieldOutput on synthetic ODB files
+(run with "python -m pytest tests")
+
+'''
+#====================================================================
+@pytest.fixture(scope='module')
+def ODB():
+    return CL_ODBM_SyntheticODB(NE=300, NIP=8, NF=3, Wedges=0.2)
+#====================================================================
+@pytest.mark.parametrize('FieldName', ['U', 'S', 'PEEQ'])
+def test_bulk_equals_values(ODB, FieldName):
+    Names = ['data', 'elementLabel', 'nodeLabel', 'integrationPoint', 'magnitude', 'mises', 'tresca',
+             'press', 'maxPrincipal', 'minPrincipal', 'position', 'type', 'baseElementType']
+    L = CL_ODBR_FieldOutput(ODB, 'PART-1-1', 'Step-1', -1, FieldName, Names)
+    B = CL_ODBR_FieldOutputBulk(ODB, 'PART-1-1', 'Step-1', -1, FieldName, Names)
+    for Name in Names:
+        V = L[Name]
+        if all(v is None for v in V):
+            assert B[Name] is None or np.isnan(B[Name].astype(float)).all(), Name
+            continue
+        if isinstance(V[0], str) or Name in ('position', 'type', 'baseElementType'):
+            assert [str(v) for v in V] == [str(v) for v in B[Name]], Name
+            continue
+        np.testing.assert_allclose(np.asarray(B[Name], float), np.array(V, float), rtol=1e-5, atol=1e-5,
+                                   err_msg=Name)
+#====================================================================
+def test_bulk_mixed_components():
+    # solids (6 components) and shells (3 components) in one instance
+    ODB = MixedODB()
+    F   = CL_ODBR_FieldOutputBulk(ODB, 'PART-1-1', 'Step-1', -1, 'S', ['data', 'elementLabel', 'componentLabels'])
+    Cols = CL_ODBR_ComponentColumns(F['componentLabels'])
+    assert Cols == ['S11', 'S22', 'S33', 'S12', 'S13', 'S23']
+    assert F['data'].shape == (16, 6) and F['data'].dtype == np.float32
+    B1, B2 = ODB.steps['Step-1'].frames[-1].fieldOutputs['S'].bulkDataBlocks
+    np.testing.assert_array_equal(F['data'][:8], B1.data)
+    np.testing.assert_array_equal(F['data'][8:][:,[0, 1, 3]], B2.data)
+    assert np.isnan(F['data'][8:][:,[2, 4, 5]]).all()
+    assert list(F['componentLabels'][[0, 8]]) == ['S11,S22,S33,S12,S13,S23', 'S11,S22,S12']
+    np.testing.assert_array_equal(F['elementLabel'], [1]*8 + [2]*8)
+#====================================================================
+def test_columns_mixed_components():
+    Col, Cat, Mask = CL_ODBR_FieldOutputColumns(MixedODB(), 'PART-1-1', 'Step-1', -1, 'S',
+                                                ['data', 'componentLabels', 'elementLabel'])
+    assert Col['data'].shape == (16, 6) and Col['data'].dtype == np.float32
+    assert Cat['componentLabels'][Col['componentLabels'][-1]] == 'S11,S22,S12'
+    assert Col['elementLabel'].dtype == np.int32
+#====================================================================
+def test_values_only_requested(ODB):
+    # the value by value path returns only the requested sub-fields
+    for Bulk in (True, False):
+        R = CL_ODBR_ExtractPlan(ODB, [('PART-1-1', 'Step-1', [0, -1], 'U', ['data', 'nodeLabel'])], Bulk)
+        for Key, F in R.items():
+            assert sorted(F) == ['data', 'nodeLabel'], (Bulk, Key)
+#====================================================================
+def test_mesh_equals_loop(ODB):
+    # CL_ODBR_ELM and CL_ODBR_NOD give the arrays of the former loops over the elements and nodes
+    Ins  = ODB.rootAssembly.instances['PART-1-1']
+    NPE  = max(len(e.connectivity) for e in Ins.elements)
+    ELM0 = np.zeros((len(Ins.elements), NPE), np.int32)
+    for i, e in enumerate(Ins.elements):
+        ELM0[i, :len(e.connectivity)] = e.connectivity
+    ELM, ELabel, EType = CL_ODBR_ELM(ODB, 'PART-1-1')
+    assert ELM.dtype == np.int32 and ELabel.dtype == np.int32
+    np.testing.assert_array_equal(ELM, ELM0)
+    np.testing.assert_array_equal(ELabel, [e.label for e in Ins.elements])
+    assert EType == [e.type for e in Ins.elements] and len(set(EType)) == 2
+    NOD, NLabel = CL_ODBR_NOD(ODB, 'PART-1-1')
+    assert NOD.shape == (len(Ins.nodes), 3) and NLabel.dtype == np.int32
+    np.testing.assert_array_equal(NOD, [n.coordinates for n in Ins.nodes])
+    np.testing.assert_array_equal(NLabel, [n.label for n in Ins.nodes])
+#====================================================================
+def test_history_outputs():
+    # the outputs of 2 steps on the common time axis, against a loop over the samples
+    ODB     = CL_ODBM_SyntheticODB(NE=10, NF=3, NSteps=2)
+    Outputs = [('Assembly ASSEMBLY', 'ALLIE'), ('Node PART-1-1.1', 'RF1'), ('Assembly ASSEMBLY', 'NONE')]
+    Time, H = CL_ODBR_HistoryOutputs(ODB, Outputs)
+    Ref     = [{} for _ in Outputs]
+    for StepName in CL_ODBR_StepNames(ODB):
+        Step = ODB.steps[StepName]
+        for j, (RegionName, OutputName) in enumerate(Outputs):
+            HOs = Step.historyRegions[RegionName].historyOutputs
+            for t, v in (HOs[OutputName].data if OutputName in HOs else ()):
+                Ref[j][Step.totalTime + t] = v
+    np.testing.assert_array_equal(Time, sorted(set(Ref[0]) | set(Ref[1])))
+    for j in range(len(Outputs)):
+        np.testing.assert_array_equal(H[:,j], [Ref[j].get(t, np.nan) for t in Time])
+    A = CL_ODBR_HistoryOutput(ODB, 'Step-2', 'Node PART-1-1.1', 'RF1')
+    assert A.shape == (4, 2) and np.isnan(H[:,2]).all()
+    Time, H = CL_ODBR_HistoryOutputs(ODB, Outputs, [])
+    assert Time.shape == (0,) and H.shape == (0, 3)
+#====================================================================
+def test_odb_pool(tmp_path):
+    # open once, least recently used ODB closed first, an ODB in use is never closed
+    S = MockSession()
+    a, b, c, d = [str(tmp_path / (n + '.odb')) for n in 'abcd']
+    with CL_ODBR_ODBPool(S, MaxOpen=2) as Pool:
+        A = Pool.Open(a)
+        assert Pool.Open(a) is A and S.NOpen == 1
+        B = Pool.Open(b)
+        Pool.Open(a)                              # b is now the least recently used
+        Pool.Open(c)
+        assert B.closed and not A.closed and sorted(S.odbs) == [a, c]
+        with Pool.Use(a) as ODB:
+            assert ODB is A
+            Pool.Open(b)
+            Pool.Open(d)
+            assert not A.closed and len(S.odbs) == 2
+        assert Pool.Report()['opened'] == 5 and Pool.Report()['reused'] == 3
+    assert S.odbs == {} and A.closed and Pool.Report()['open'] == 0
+#====================================================================
+def test_columns(ODB):
+    # typed columns from the lists of CL_ODBR_FieldOutput and from CL_ODBR_FieldOutputColumns
+    Names = ['data', 'mises', 'elementLabel', 'integrationPoint', 'nodeLabel', 'position', 'precision']
+    L = CL_ODBR_FieldOutput(ODB, 'PART-1-1', 'Step-1', -1, 'S', Names)
+    Col, Cat, Mask = CL_ODBR_Columns(L)
+    Col2, Cat2, Mask2 = CL_ODBR_FieldOutputColumns(ODB, 'PART-1-1', 'Step-1', -1, 'S', Names)
+    assert Col['data'].dtype == np.float32 and Col['data'].shape == (len(L['data']), 6)
+    assert Col['elementLabel'].dtype == np.int32 and Col['position'].dtype == np.int8
+    assert Col['nodeLabel'] is None and Col2['nodeLabel'] is None and Mask == {} and Mask2 == {}
+    assert [Cat['position'][c] for c in Col['position']] == [str(p) for p in L['position']]
+    for Name in ['data', 'mises', 'elementLabel', 'integrationPoint']:
+        np.testing.assert_array_equal(Col2[Name], Col[Name], err_msg=Name)
+        assert Col2[Name].dtype == Col[Name].dtype, Name
+    A, Cat, Mask = CL_ODBR_Columns(L, Struct=True)
+    assert 'nodeLabel' not in A.dtype.names and A['data'].shape == Col['data'].shape
+    np.testing.assert_array_equal(A['mises'], Col['mises'])
+    #------------------------ missing values
+    Col, Cat, Mask = CL_ODBR_Columns({'elementLabel': [3, None, 5], 'mises': [1.0, 2.0, None],
+                                      'position': ['NODAL', None, 'NODAL']}, 'DOUBLE_PRECISION')
+    np.testing.assert_array_equal(Col['elementLabel'], [3, -1, 5])
+    np.testing.assert_array_equal(Col['mises'], [1.0, 2.0, np.nan])
+    assert Col['mises'].dtype == np.float64 and Cat['position'] == ['NODAL']
+    np.testing.assert_array_equal(Col['position'], [0, -1, 0])
+    np.testing.assert_array_equal(Mask['mises'], [False, False, True])
@@ -0,0 +1,56 @@
+# By: Javad KAZEM
+#
+import numpy as np
+from CL_Abaqus_ODB_Reader import *
+from CL_Abaqus_ODB_Store import *
+from CL_Abaqus_ODB_Mock import *
+from conftest import MixedODB
+
+'''
+Checks of the store of CL_Abaqus_ODB_Store on mock ODB files
+(run with "python -m pytest tests")
+
+'''
+#====================================================================
+def test_write_read_mixed_components(tmp_path):
+    R = CL_ODBR_ExtractPlan(MixedODB(), [('PART-1-1', 'Step-1', -1, 'S', ['data', 'componentLabels'])])
+    CL_ODBS_Write(str(tmp_path), 0, R)
+    F = R[('PART-1-1', 'Step-1', 0, 'S')]
+    np.testing.assert_array_equal(CL_ODBS_Read(str(tmp_path), 0, 'PART-1-1', 'Step-1', 0, 'S', 'data'), F['data'])
+    np.testing.assert_array_equal(CL_ODBS_Read(str(tmp_path), 0, 'PART-1-1', 'Step-1', 0, 'S', 'componentLabels'),
+                                  F['componentLabels'])
+#====================================================================
+def test_stack_chunks_not_copied(tmp_path):
+    # the arrays of several chunk files are stacked without being loaded
+    A = [np.arange(200, dtype=np.float64).reshape(100, 2) + 1000*i for i in range(6)]
+    for i, a in enumerate(A):
+        CL_ODBS_Append(str(tmp_path), i, 'PART-1-1', 'Step-1', 0, 'U', 'data', a, ChunkSize=3200)
+    Keys, U = CL_ODBS_Stack(str(tmp_path), 'PART-1-1', 'Step-1', 'U', 'data')
+    assert isinstance(U, CL_ODBS_Concat) and len(U.Parts) == 3
+    assert all(isinstance(P, np.memmap) for P in U.Parts)
+    assert Keys == [(i, 0) for i in range(6)] and U.shape == (6, 100, 2)
+    np.testing.assert_array_equal(np.asarray(U), np.array(A))
+    np.testing.assert_array_equal(U[4], A[4])
+    np.testing.assert_array_equal(U[1:5, 10], np.array(A)[1:5, 10])
+    np.testing.assert_array_equal(U[[5, 0]], np.array(A)[[5, 0]])
+#====================================================================
+def test_update_growing_frames(tmp_path):
+    # each call extracts only the new frames, a new plan extracts everything again
+    NF = [3]
+    S  = MockSession(Factory=lambda Name: CL_ODBM_MakeODB(NF=NF[0]))
+    D  = str(tmp_path)
+    Plan = [('PART-1-1', 'Step-1', 'All', 'U', 'data'), ('PART-1-1', 'Step-1', [0, 4], 'S', 'mises')]
+    assert CL_ODBS_Update(S, 'a.odb', D, 0, Plan) == {'Step-1': [0, 1, 2]}
+    assert CL_ODBS_Update(S, 'a.odb', D, 0, Plan) == {}
+    NF[0] = 5
+    assert CL_ODBS_Update(S, 'a.odb', D, 0, Plan) == {'Step-1': [3, 4]}
+    C = CL_ODBS_Checkpoint(D, 0)
+    assert C['steps']['Step-1']['frames'] == 5 and len(C['steps']['Step-1']['time']) == 5
+    Keys, U = CL_ODBS_Stack(D, 'PART-1-1', 'Step-1', 'U', 'data')
+    assert sorted(Keys) == [(0, f) for f in range(5)]
+    Keys, M = CL_ODBS_Stack(D, 'PART-1-1', 'Step-1', 'S', 'mises')
+    assert sorted(Keys) == [(0, 0), (0, 4)]
+    Plan = [('PART-1-1', 'Step-1', 'All', 'S', 'mises')]
+    assert CL_ODBS_Update(S, 'a.odb', D, 0, Plan) == {'Step-1': [0, 1, 2, 3, 4]}
+    Keys, M = CL_ODBS_Stack(D, 'PART-1-1', 'Step-1', 'S', 'mises')
+    assert sorted(Keys) == [(0, f) for f in range(5)]